@@ -1,64 +1,230 @@
+import argparse
+import io
 import sqlite3
+import time
+
 import streamlit as st
 import psycopg2
-import os
-
-# SQLite
-sqlite_conn = sqlite3.connect("modarte.db")
-sqlite_conn.row_factory = sqlite3.Row
-sqlite_cursor = sqlite_conn.cursor()
-
-# Postgres (Supabase)
-pg_conn = psycopg2.connect(
-    host=st.secrets["database"]["host"],
-    port=st.secrets["database"]["port"],
-    database=st.secrets["database"]["dbname"],
-    user=st.secrets["database"]["user"],
-    password=st.secrets["database"]["password"],
-    sslmode=st.secrets["database"]["sslmode"]
-)
 
-pg_cursor = pg_conn.cursor()
+from migracoes import aplicar_migracoes
 
 # =============================
-# MIGRAR PRODUTOS
+# MIGRAÇÃO SQLITE → SUPABASE
 # =============================
-sqlite_cursor.execute("SELECT * FROM produtos")
+# Lê o SQLite em lotes e carrega cada lote com COPY numa tabela temporária,
+# de onde entra na tabela final com ON CONFLICT DO NOTHING. O último id
+# migrado de cada tabela fica em public.migracao_sqlite, gravado na mesma
+# transação do lote: se a migração parar no meio, basta rodar de novo que
+# ela continua de onde parou.
+#
+# vendas_modarte é particionada por data_venda (sql/migracoes/008): a chave
+# é (id, data_venda) e a data é obrigatória. Vendas sem data no SQLite são
+# puladas e listadas no fim da tabela, sem interromper o lote.
+#
+# Um SQLite que já serviu de caixa offline (vendas_offline.py) tem a coluna
+# chave: as vendas com chave ainda não subiram e são enviadas pela
+# sincronização do app, então ficam de fora aqui.
+#
+# Uso:
+#   python Banco_Modarte_Supabase_teste.py [--sqlite modarte.db] [--lote 5000] [--reiniciar]
 
-for row in sqlite_cursor.fetchall():
-    pg_cursor.execute("""
-        INSERT INTO public.produtos (
-            id, produto, codigo, preco, lucro,
-            estoque_inicial, estoque_atual,
-            foto, renda_atual, lucro_atual
-        ) VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
-        ON CONFLICT (id) DO NOTHING
-    """, tuple(row))
+# tabela SQLite → (tabela Postgres, colunas, chave primária, colunas NOT NULL)
+TABELAS = {
+    "produtos": ("public.produtos", [
+        "id", "produto", "codigo", "preco", "lucro",
+        "estoque_inicial", "estoque_atual",
+        "foto", "renda_atual", "lucro_atual"
+    ], "id", []),
+    "vendas": ("public.vendas_modarte", [
+        "id", "produto_id", "quantidade",
+        "data_venda", "preco_unit", "lucro_unit"
+    ], "id, data_venda", ["data_venda"]),
+}
 
-pg_conn.commit()
-print("✅ Produtos migrados")
 
-# =============================
-# MIGRAR VENDAS
-# =============================
-sqlite_cursor.execute("SELECT * FROM vendas")
+def conectar_postgres():
+    return psycopg2.connect(
+        host=st.secrets["database"]["host"],
+        port=st.secrets["database"]["port"],
+        database=st.secrets["database"]["dbname"],
+        user=st.secrets["database"]["user"],
+        password=st.secrets["database"]["password"],
+        sslmode=st.secrets["database"]["sslmode"]
+    )
+
+
+def _valor_copy(valor):
+    # Formato texto do COPY: \N é nulo; barra, tab e quebras são escapadas
+    if valor is None:
+        return "\\N"
+    return (
+        str(valor)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def _buffer_copy(linhas):
+    buffer = io.StringIO()
+    for linha in linhas:
+        buffer.write("\t".join(_valor_copy(valor) for valor in linha))
+        buffer.write("\n")
+    buffer.seek(0)
+    return buffer
 
-for row in sqlite_cursor.fetchall():
+
+def preparar_checkpoint(pg_cursor, reiniciar):
     pg_cursor.execute("""
-        INSERT INTO public.vendas (
-            id, produto_id, quantidade,
-            preco_unitario, data_venda
-        ) VALUES (%s,%s,%s,%s,%s)
-        ON CONFLICT (id) DO NOTHING
-    """, tuple(row))
+        CREATE TABLE IF NOT EXISTS public.migracao_sqlite (
+            tabela text PRIMARY KEY,
+            ultimo_id bigint NOT NULL,
+            atualizado_em timestamptz NOT NULL DEFAULT now()
+        )
+    """)
 
-pg_conn.commit()
-print("✅ Vendas migradas")
+    if reiniciar:
+        pg_cursor.execute("DELETE FROM public.migracao_sqlite")
+
+
+def ultimo_migrado(pg_cursor, tabela):
+    pg_cursor.execute(
+        "SELECT ultimo_id FROM public.migracao_sqlite WHERE tabela = %s",
+        (tabela,)
+    )
+    resultado = pg_cursor.fetchone()
+    return resultado[0] if resultado else 0
+
+
+def _filtro_offline(sqlite_conn, tabela):
+    colunas = {linha[1] for linha in sqlite_conn.execute(f"PRAGMA table_info({tabela})")}
+    return "AND chave IS NULL" if "chave" in colunas else ""
+
+
+def migrar_tabela(sqlite_conn, pg_conn, tabela, tamanho_lote):
+    destino, colunas, chave, obrigatorias = TABELAS[tabela]
+    lista_colunas = ", ".join(colunas)
+    posicoes = [colunas.index(coluna) for coluna in obrigatorias]
+    pg_cursor = pg_conn.cursor()
+
+    ultimo_id = ultimo_migrado(pg_cursor, tabela)
+    if ultimo_id:
+        print(f"↪️  {tabela}: retomando após id {ultimo_id}")
+
+    pg_cursor.execute(f"""
+        CREATE TEMP TABLE IF NOT EXISTS _carga_{tabela}
+        (LIKE {destino} INCLUDING DEFAULTS)
+    """)
+
+    sqlite_cursor = sqlite_conn.execute(
+        f"SELECT {lista_colunas} FROM {tabela} WHERE id > ? {_filtro_offline(sqlite_conn, tabela)} ORDER BY id",
+        (ultimo_id,)
+    )
+
+    total = 0
+    puladas = []
+    inicio = time.perf_counter()
+
+    while True:
+        linhas = sqlite_cursor.fetchmany(tamanho_lote)
+        if not linhas:
+            break
+
+        validas = []
+        for linha in linhas:
+            if all(linha[i] is not None for i in posicoes):
+                validas.append(linha)
+            else:
+                puladas.append(linha[0])
+
+        pg_cursor.execute(f"TRUNCATE _carga_{tabela}")
+        pg_cursor.copy_expert(
+            f"COPY _carga_{tabela} ({lista_colunas}) FROM STDIN",
+            _buffer_copy(validas)
+        )
+        pg_cursor.execute(f"""
+            INSERT INTO {destino} ({lista_colunas})
+            SELECT {lista_colunas} FROM _carga_{tabela}
+            ON CONFLICT ({chave}) DO NOTHING
+        """)
+
+        # Checkpoint na mesma transação do lote
+        pg_cursor.execute("""
+            INSERT INTO public.migracao_sqlite (tabela, ultimo_id)
+            VALUES (%s, %s)
+            ON CONFLICT (tabela) DO UPDATE
+            SET ultimo_id = EXCLUDED.ultimo_id, atualizado_em = now()
+        """, (tabela, linhas[-1][0]))
+
+        pg_conn.commit()
+
+        total += len(validas)
+        decorrido = time.perf_counter() - inicio
+        print(f"   {tabela}: {total} linhas ({total / decorrido:,.0f} linhas/s)")
+
+    # Os ids vieram do SQLite: a sequência precisa continuar depois do maior
+    pg_cursor.execute(f"""
+        SELECT setval(
+            pg_get_serial_sequence('{destino}', 'id'),
+            COALESCE(MAX(id), 1),
+            MAX(id) IS NOT NULL
+        )
+        FROM {destino}
+    """)
+    pg_conn.commit()
+
+    decorrido = time.perf_counter() - inicio
+    taxa = total / decorrido if decorrido else 0
+    print(f"✅ {tabela} → {destino}: {total} linhas em {decorrido:.2f}s ({taxa:,.0f} linhas/s)")
+
+    if puladas:
+        print(
+            f"⚠️  {tabela}: {len(puladas)} linhas sem {', '.join(obrigatorias)} não foram migradas "
+            f"(ids: {', '.join(map(str, puladas[:20]))}{' ...' if len(puladas) > 20 else ''})"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migração do modarte.db para o Supabase")
+    parser.add_argument("--sqlite", default="modarte.db")
+    parser.add_argument("--lote", type=int, default=5000)
+    parser.add_argument("--reiniciar", action="store_true", help="ignora os checkpoints gravados")
+    args = parser.parse_args()
+
+    sqlite_conn = sqlite3.connect(args.sqlite)
+    pg_conn = conectar_postgres()
+
+    try:
+        # Num banco novo as tabelas ainda não existem (sql/migracoes/). A
+        # conexão do psycopg2 usada em `with` já faz commit/rollback.
+        aplicar_migracoes(lambda: pg_conn)
+
+        preparar_checkpoint(pg_conn.cursor(), args.reiniciar)
+        pg_conn.commit()
+
+        # Produtos antes das vendas (chave estrangeira)
+        for tabela in TABELAS:
+            migrar_tabela(sqlite_conn, pg_conn, tabela, args.lote)
+
+        # Vendas de meses sem partição caíram na partição padrão: criar os
+        # meses move essas vendas para eles
+        with pg_conn:
+            pg_cursor = pg_conn.cursor()
+            pg_cursor.execute("""
+                SELECT public.criar_particoes_vendas(MIN(data_venda)::date, MAX(data_venda)::date)
+                FROM public.vendas_modarte_padrao
+                HAVING COUNT(*) > 0
+            """)
+            criadas = pg_cursor.fetchall()
+            if criadas:
+                print(f"📅 {len(criadas)} partições mensais criadas para as vendas migradas")
+    finally:
+        sqlite_conn.close()
+        pg_conn.close()
+
+    print("🚀 Migração completa!")
 
-# =============================
-# FECHAR CONEXÕES
-# =============================
-sqlite_conn.close()
-pg_conn.close()
 
-print("🚀 Migração completa!")
+if __name__ == "__main__":
+    main()
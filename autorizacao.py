@@ -0,0 +1,121 @@
+import streamlit as st
+from psycopg2.pool import PoolError
+from supabase import create_client
+
+from conexao import ERROS_CONEXAO
+from dados import get_repositorio
+from emails_autorizados import EMAILS_AUTORIZADOS
+
+# =====================
+# AUTORIZAÇÃO
+# =====================
+# A checagem de acesso roda a cada rerun e a resposta do banco fica em cache
+# por alguns segundos. Revogações ficam no banco (usuarios_revogados) e são
+# conferidas antes de tudo, inclusive para a lista local: valem depois de
+# reiniciar e nas outras instâncias (no máximo TTL_AUTORIZACAO depois).
+# Revogar limpa o cache deste servidor na hora.
+#
+# Com o banco fora do ar (modo offline) vale a última resposta que este
+# servidor recebeu; sem nenhuma, só a lista local entra.
+#
+# O cadastro pelo link do Google (autorizar_email) não desfaz uma
+# revogação; só reativar_email, na tela de acessos, que é restrita aos
+# administradores (a lista local).
+
+TTL_AUTORIZACAO = 60
+
+_EMAILS_LOCAIS = {email.strip().lower() for email in EMAILS_AUTORIZADOS}
+
+
+def _normalizar(email):
+    return (email or "").strip()
+
+
+def cliente_sessao():
+    # Cliente do Supabase Auth (login e logout guardam a sessão do usuário
+    # nele): um por sessão do navegador, criado uma vez e não a cada rerun
+    if "supabase" not in st.session_state:
+        st.session_state.supabase = create_client(
+            st.secrets["supabase"]["url"],
+            st.secrets["supabase"]["anon_key"]
+        )
+    return st.session_state.supabase
+
+
+@st.cache_data(ttl=TTL_AUTORIZACAO, max_entries=1000, show_spinner=False)
+def _consultar_revogacao(email):
+    return get_repositorio().email_revogado(email)
+
+
+@st.cache_data(ttl=TTL_AUTORIZACAO, max_entries=1000, show_spinner=False)
+def _consultar_autorizacao(email):
+    return get_repositorio().email_autorizado(email)
+
+
+@st.cache_resource
+def _ultimas_respostas():
+    # (consulta, email) → última resposta do banco
+    return {}
+
+
+def _consultar(consulta, email):
+    chave = (consulta.__name__, email.lower())
+
+    try:
+        resposta = consulta(email)
+    except (*ERROS_CONEXAO, PoolError):
+        return _ultimas_respostas().get(chave)
+
+    _ultimas_respostas()[chave] = resposta
+    return resposta
+
+
+def _limpar_cache(email):
+    _consultar_revogacao.clear(email)
+    _consultar_autorizacao.clear(email)
+
+
+def usuario_autorizado(email):
+    email = _normalizar(email)
+
+    if _consultar(_consultar_revogacao, email):
+        return False
+
+    if email.lower() in _EMAILS_LOCAIS:
+        return True
+
+    return bool(_consultar(_consultar_autorizacao, email))
+
+
+def administrador(email):
+    return _normalizar(email).lower() in _EMAILS_LOCAIS and usuario_autorizado(email)
+
+
+def autorizar_email(email):
+    # Cadastro pelo link do Google. False se o acesso foi revogado.
+    email = _normalizar(email)
+
+    if get_repositorio().email_revogado(email):
+        return False
+
+    get_repositorio().autorizar_email(email)
+    _limpar_cache(email)
+    return True
+
+
+def revogar_autorizacao(email):
+    email = _normalizar(email)
+
+    get_repositorio().revogar_email(email)
+    _limpar_cache(email)
+
+
+def reativar_email(email):
+    email = _normalizar(email)
+
+    get_repositorio().reativar_email(email)
+    _limpar_cache(email)
+
+
+def emails_revogados():
+    return get_repositorio().emails_revogados()
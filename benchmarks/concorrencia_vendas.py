@@ -0,0 +1,126 @@
+# =====================
+# BENCHMARK - VENDAS CONCORRENTES
+# =====================
+# N caixas vendem o mesmo produto ao mesmo tempo até o estoque acabar.
+# Mede vendas/s e confere que nenhuma unidade foi vendida a mais.
+#
+# Uso (contra um Postgres local, nunca contra produção):
+#   python -m benchmarks.concorrencia_vendas --dsn postgresql://... --caixas 16 --estoque 2000
+#   python -m benchmarks.concorrencia_vendas --legado   # fluxo antigo, para comparação
+
+import argparse
+import os
+import threading
+import time
+from datetime import datetime
+
+from conexao import PoolConexoes
+from repositorio import EstoqueInsuficiente, executar_venda
+
+
+def criar_produto(pool, estoque):
+    with pool.transacao() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO public.produtos
+            (produto, foto, estoque_inicial, estoque_atual, preco, lucro, codigo)
+            VALUES ('BENCHMARK CONCORRENCIA', '', %s, %s, 10, 1, 'BENCH')
+            RETURNING id
+        """, (estoque, estoque))
+        return cursor.fetchone()[0]
+
+
+def remover_produto(pool, produto_id):
+    with pool.transacao() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM public.vendas_modarte WHERE produto_id = %s", (produto_id,))
+        cursor.execute("DELETE FROM public.produtos WHERE id = %s", (produto_id,))
+
+
+def venda_legada(cursor, produto_id):
+    # Como era antes: confere o estoque lido, insere e depois baixa sem condição
+    cursor.execute("SELECT estoque_atual FROM public.produtos WHERE id = %s", (produto_id,))
+    if cursor.fetchone()[0] < 1:
+        raise EstoqueInsuficiente()
+
+    cursor.execute("""
+        INSERT INTO public.vendas_modarte
+        (produto_id, quantidade, data_venda, preco_unit, lucro_unit)
+        VALUES (%s, 1, %s, 10, 1)
+    """, (produto_id, datetime.now()))
+    cursor.execute("""
+        UPDATE public.produtos
+        SET estoque_atual = estoque_atual - 1
+        WHERE id = %s
+    """, (produto_id,))
+
+
+def caixa(pool, produto_id, legado, vendas):
+    while True:
+        try:
+            with pool.transacao() as conn:
+                if legado:
+                    venda_legada(conn.cursor(), produto_id)
+                else:
+                    executar_venda(conn.cursor(), produto_id, 1, 10, 1, datetime.now())
+        except EstoqueInsuficiente:
+            return
+        vendas.append(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de vendas concorrentes")
+    parser.add_argument("--dsn", default=os.environ.get("MODARTE_DSN"))
+    parser.add_argument("--caixas", type=int, default=8)
+    parser.add_argument("--estoque", type=int, default=1000)
+    parser.add_argument("--legado", action="store_true")
+    args = parser.parse_args()
+
+    if not args.dsn:
+        parser.error("informe --dsn ou a variável MODARTE_DSN")
+
+    pool = PoolConexoes(minimo=1, maximo=args.caixas + 1, dsn=args.dsn)
+    produto_id = criar_produto(pool, args.estoque)
+    vendas = []
+
+    try:
+        threads = [
+            threading.Thread(target=caixa, args=(pool, produto_id, args.legado, vendas))
+            for _ in range(args.caixas)
+        ]
+
+        inicio = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duracao = time.perf_counter() - inicio
+
+        with pool.transacao() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT estoque_atual FROM public.produtos WHERE id = %s", (produto_id,))
+            estoque_final = cursor.fetchone()[0]
+            cursor.execute(
+                "SELECT COALESCE(SUM(quantidade), 0) FROM public.vendas_modarte WHERE produto_id = %s",
+                (produto_id,)
+            )
+            vendido = cursor.fetchone()[0]
+    finally:
+        remover_produto(pool, produto_id)
+        pool.fechar()
+
+    vendas_a_mais = max(vendido - args.estoque, 0)
+
+    print(f"Modo:            {'legado (2 comandos)' if args.legado else 'atômico (1 comando)'}")
+    print(f"Caixas:          {args.caixas}")
+    print(f"Estoque inicial: {args.estoque}")
+    print(f"Vendas:          {len(vendas)} em {duracao:.2f}s ({len(vendas) / duracao:,.0f} vendas/s)")
+    print(f"Estoque final:   {estoque_final}")
+    print(f"Vendas a mais:   {vendas_a_mais}")
+
+    if vendas_a_mais or estoque_final < 0:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
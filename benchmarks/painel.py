@@ -0,0 +1,236 @@
+# =====================
+# BENCHMARK - PAINEL COM DADOS SINTÉTICOS
+# =====================
+# Gera catálogos e históricos de vendas sintéticos (semente fixa) em escalas
+# diferentes e mede os caminhos quentes do app: carga dos produtos, KPIs,
+# histórico de vendas, rótulos de "Excluir Venda", PDF e a renderização da
+# listagem via AppTest. O banco é um SQLite temporário com o esquema do
+# modarte.db, servido pelo RepositorioSQLite (nunca toca em produção).
+#
+# Uso:
+#   python -m benchmarks.painel                       # escalas p e m
+#   python -m benchmarks.painel --escalas p m g --saida resultados.json
+#
+# A saída é JSON: uma entrada por (escala, etapa), com mediana e mínimo em
+# segundos (ou bytes, no tamanho do snapshot de produtos), para comparar
+# execuções ao longo do tempo.
+
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import streamlit.logger
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# escala → (produtos, vendas)
+ESCALAS = {
+    "p": (1_000, 20_000),
+    "m": (10_000, 200_000),
+    "g": (10_000, 1_000_000),
+}
+
+DIAS_HISTORICO = 365
+
+
+def gerar_banco(caminho, produtos, vendas, semente):
+    rng = np.random.default_rng(semente)
+
+    # Mesmo esquema do modarte.db
+    with sqlite3.connect(BASE_DIR / "modarte.db") as origem:
+        esquema = [
+            sql for (sql,) in origem.execute(
+                "SELECT sql FROM sqlite_master WHERE type = 'table' AND name IN ('produtos', 'vendas')"
+            )
+        ]
+
+    ids = np.arange(1, produtos + 1)
+    preco = rng.uniform(20, 300, produtos).round(2)
+    lucro = (preco * rng.uniform(0.2, 0.5, produtos)).round(2)
+
+    # Poucos produtos concentram a maior parte das vendas, como numa loja real
+    peso = rng.permutation(1.0 / np.arange(1, produtos + 1) ** 0.8)
+    produto_venda = rng.choice(ids, size=vendas, p=peso / peso.sum())
+    quantidade = rng.integers(1, 4, vendas)
+
+    inicio = datetime.combine(date.today() - timedelta(days=DIAS_HISTORICO), datetime.min.time())
+    segundos = np.sort(rng.integers(0, DIAS_HISTORICO * 86_400, vendas))
+    data_venda = (pd.Timestamp(inicio) + pd.to_timedelta(segundos, unit="s")).strftime("%Y-%m-%d %H:%M:%S")
+
+    vendido = np.bincount(produto_venda, weights=quantidade, minlength=produtos + 1)[1:].astype(int)
+    estoque_inicial = vendido + rng.integers(0, 60, produtos)
+    estoque_atual = estoque_inicial - vendido
+
+    with sqlite3.connect(caminho) as conn:
+        for sql in esquema:
+            conn.execute(sql)
+
+        conn.executemany(
+            "INSERT INTO produtos (id, produto, codigo, preco, lucro, estoque_inicial, estoque_atual, foto) "
+            "VALUES (?,?,?,?,?,?,?,?)",
+            zip(
+                ids.tolist(),
+                [f"Produto {i:05d}" for i in ids],
+                [f"C{i:05d}" for i in ids],
+                preco.tolist(),
+                lucro.tolist(),
+                estoque_inicial.tolist(),
+                estoque_atual.tolist(),
+                [""] * produtos
+            )
+        )
+
+        conn.executemany(
+            "INSERT INTO vendas (produto_id, quantidade, data_venda, preco_unit, lucro_unit) "
+            "VALUES (?,?,?,?,?)",
+            zip(
+                produto_venda.tolist(),
+                quantidade.tolist(),
+                data_venda.tolist(),
+                preco[produto_venda - 1].tolist(),
+                lucro[produto_venda - 1].tolist()
+            )
+        )
+
+    # Produto com mais vendas: o pior caso do histórico
+    return int(np.argmax(vendido) + 1)
+
+
+def cronometrar(funcao, repeticoes, preparar=None):
+    tempos = []
+    for _ in range(repeticoes):
+        if preparar is not None:
+            preparar()
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return {
+        "mediana_s": round(statistics.median(tempos), 6),
+        "min_s": round(min(tempos), 6),
+        "repeticoes": repeticoes,
+    }
+
+
+def medir_escala(escala, caminho, repeticoes, semente):
+    # Importados aqui: o backend é escolhido na primeira chamada a get_repositorio
+    import dados
+    from relatorios import gerar_pdf
+    from streamlit.testing.v1 import AppTest
+
+    produtos, vendas = ESCALAS[escala]
+
+    inicio = time.perf_counter()
+    produto_top = gerar_banco(caminho, produtos, vendas, semente)
+    geracao = time.perf_counter() - inicio
+
+    os.environ["MODARTE_SQLITE"] = str(caminho)
+    dados.get_repositorio.clear()
+    dados.invalidar_dados()
+
+    df = dados.carregar_produtos()
+    fim = date.today()
+    periodo = (fim - timedelta(days=90), fim)
+
+    historico_completo, _ = dados.historico_vendas(
+        produto_top, fim - timedelta(days=DIAS_HISTORICO + 1), fim, limite=vendas
+    )
+
+    def kpis():
+        # Mesmas somas de secao_painel em app.py
+        return (
+            df["renda_atual"].sum(),
+            df["lucro_atual"].sum(),
+            int(df["vendidos"].sum()),
+            int(df["estoque_atual"].sum()),
+        )
+
+    def rotulos():
+        # Mesma expressão de secao_historico_vendas em app.py
+        return (
+            historico_completo["data_venda"].dt.date.astype(str)
+            + " | " + historico_completo["quantidade"].astype(str) + " un | R$ "
+            + (historico_completo["quantidade"] * historico_completo["preco_unit"]).map("{:,.2f}".format)
+        )
+
+    def historico():
+        dados.historico_vendas(produto_top, *periodo)
+        for granularidade in dados.GRANULARIDADES:
+            dados.serie_vendas(produto_top, *periodo, granularidade)
+
+    app = AppTest.from_file(str(BASE_DIR / "app.py"), default_timeout=600)
+
+    def renderizar():
+        app.run()
+        if app.exception:
+            raise RuntimeError(app.exception[0].value)
+
+    # invalidar_dados antes de cada repetição: mede a consulta, não o cache
+    etapas = {
+        "carregar_produtos": cronometrar(dados.carregar_produtos, repeticoes, dados.invalidar_dados),
+        "kpis": cronometrar(kpis, repeticoes),
+        "historico_vendas": cronometrar(historico, repeticoes, dados.invalidar_dados),
+        "rotulos_excluir_venda": cronometrar(rotulos, repeticoes),
+        "gerar_pdf": cronometrar(lambda: gerar_pdf(df.sort_values("produto")), repeticoes),
+        "listagem_app_fria": cronometrar(renderizar, repeticoes, dados.invalidar_dados),
+        "listagem_app_quente": cronometrar(renderizar, repeticoes),
+    }
+
+    base = {
+        "escala": escala,
+        "produtos": produtos,
+        "vendas": vendas,
+        "vendas_produto_top": len(historico_completo),
+    }
+
+    resultados = [dict(base, etapa="gerar_dados", mediana_s=round(geracao, 6), min_s=round(geracao, 6), repeticoes=1)]
+    resultados.append(dict(base, etapa="memoria_produtos", bytes=dados.memoria_produtos()))
+    resultados += [dict(base, etapa=etapa, **tempos) for etapa, tempos in etapas.items()]
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do painel com dados sintéticos")
+    parser.add_argument("--escalas", nargs="+", choices=list(ESCALAS), default=["p", "m"])
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", help="arquivo JSON (padrão: imprime na tela)")
+    args = parser.parse_args()
+
+    os.environ["MODARTE_BACKEND"] = "sqlite"
+
+    # Fora do `streamlit run` o cache avisa a cada chamada que não há sessão
+    streamlit.logger.set_log_level("error")
+
+    relatorio = {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "plataforma": platform.platform(),
+        "semente": args.semente,
+        "resultados": [],
+    }
+
+    with tempfile.TemporaryDirectory() as pasta:
+        for escala in args.escalas:
+            caminho = Path(pasta) / f"modarte_{escala}.db"
+            relatorio["resultados"] += medir_escala(escala, caminho, args.repeticoes, args.semente)
+
+    texto = json.dumps(relatorio, indent=2, ensure_ascii=False)
+
+    if args.saida:
+        Path(args.saida).write_text(texto, encoding="utf-8")
+    else:
+        print(texto)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+# =====================
+# CONFERÊNCIA DOS PLANOS DE CONSULTA (EXPLAIN)
+# =====================
+# Aplica as migrações num Postgres local e roda EXPLAIN nas consultas do
+# painel, conferindo que cada uma usa o índice esperado. Em tabelas pequenas
+# o planejador prefere varrer tudo, então a conferência insere um volume
+# sintético e roda ANALYZE dentro de uma transação que é desfeita no fim.
+#
+# vendas_modarte é particionada por mês: no plano aparecem os índices de
+# cada partição (vendas_modarte_pAAAA_MM_...), e as consultas com início e
+# fim em data_venda também são conferidas quanto às partições lidas.
+#
+# Uso (contra um Postgres local, nunca contra produção):
+#   python -m benchmarks.planos_consultas --dsn postgresql://...
+#   python -m benchmarks.planos_consultas --planos   # imprime os planos inteiros
+
+import argparse
+import os
+import re
+from datetime import date, datetime, timedelta
+
+from conexao import PoolConexoes
+from migracoes import aplicar_migracoes
+from repositorio import (
+    FILTRO_APOS,
+    SQL_BUSCAR_PRODUTOS,
+    SQL_PAGINA_VENDAS,
+    SQL_PRODUTO_POR_ID,
+    SQL_SERIE_VENDAS,
+    SQL_UPSERT_PRODUTOS,
+    SQL_VENDAS_ALTERADAS,
+    SQL_VENDAS_DIARIAS,
+    SQL_VENDAS_NOVAS,
+    padrao_busca,
+)
+
+TEMPLATE_UPSERT = "(%s::text, %s::text, %s::integer, %s::integer, %s::numeric, %s::numeric, %s::text)"
+
+# Índices de vendas_modarte: o da tabela particionada ou o de uma partição
+PRODUTO_DATA = ("vendas_modarte_produto_data", r"vendas_modarte_p\d{4}_\d{2}_produto_id_data_venda_id_idx")
+PKEY_VENDAS = ("vendas_modarte_pkey", r"vendas_modarte_p\d{4}_\d{2}_pkey")
+ATUALIZADA_EM = ("vendas_modarte_atualizada_em", r"vendas_modarte_p\d{4}_\d{2}_atualizada_em_idx")
+
+# Partições lidas no plano (tabelas, não índices)
+PARTICAO_LIDA = re.compile(r"\bon (vendas_modarte_p(?:adrao|\d{4}_\d{2}))\b")
+
+# Consultas com período fechado: no máximo estas partições e nunca a padrão
+PARTICOES_NO_PERIODO = {
+    "pagina_vendas (primeira)": 4,
+    "pagina_vendas (seguinte)": 4,
+    "excluir_venda": 1,
+}
+
+
+def semear(cursor, produtos, vendas):
+    # Devolve o id de um dos produtos inseridos (com vendas)
+    cursor.execute("""
+        INSERT INTO public.produtos
+        (produto, codigo, preco, lucro, estoque_inicial, estoque_atual, foto)
+        SELECT 'PRODUTO EXPLAIN ' || i, 'EXPLAIN-' || i, 100, 30, 1000, 1000, ''
+        FROM generate_series(1, %s) i
+        RETURNING id
+    """, (produtos,))
+    ids = [produto_id for (produto_id,) in cursor.fetchall()]
+
+    # Um ano de vendas, cada mês na sua partição
+    cursor.execute("SELECT public.criar_particoes_vendas((now() - interval '1 year')::date, current_date)")
+
+    cursor.execute("""
+        INSERT INTO public.vendas_modarte
+        (produto_id, quantidade, data_venda, preco_unit, lucro_unit)
+        SELECT %s + i %% %s, 1, now() - (i %% 365) * interval '1 day', 100, 30
+        FROM generate_series(1, %s) i
+    """, (min(ids), len(ids), vendas))
+
+    cursor.execute("ANALYZE public.produtos, public.vendas_modarte, public.vendas_resumo_diario")
+    return min(ids)
+
+
+def consultas(cursor, busca_por_trecho, produto_id):
+    # (nome, sql, parâmetros, índices esperados). Cada item de "esperados"
+    # é uma tupla de alternativas (regex); todos os itens precisam aparecer no plano.
+    hoje = datetime.combine(date.today(), datetime.min.time())
+    periodo = {"produto_id": produto_id, "desde": hoje - timedelta(days=90), "ate": hoje, "limite": 51}
+
+    valores = cursor.mogrify(TEMPLATE_UPSERT, ("Produto", "", 1, 1, 10, 1, "C1")).decode()
+
+    indice_busca = "trgm" if busca_por_trecho else "prefixo"
+
+    return [
+        (
+            "buscar_produtos",
+            SQL_BUSCAR_PRODUTOS,
+            {"padrao": padrao_busca("vest", busca_por_trecho), "limite": 50},
+            [(f"produtos_produto_{indice_busca}",), (f"produtos_codigo_{indice_busca}",)]
+        ),
+        (
+            "produto_por_id",
+            SQL_PRODUTO_POR_ID,
+            {"produto_id": produto_id},
+            [("produtos_pkey",)]
+        ),
+        (
+            # O que o ON DELETE CASCADE roda ao excluir um produto
+            "excluir_produto (vendas em cascata)",
+            "DELETE FROM public.vendas_modarte WHERE produto_id = %(produto_id)s",
+            {"produto_id": produto_id},
+            [PRODUTO_DATA]
+        ),
+        (
+            "pagina_vendas (primeira)",
+            SQL_PAGINA_VENDAS.format(filtro_apos=""),
+            periodo,
+            [PRODUTO_DATA]
+        ),
+        (
+            "pagina_vendas (seguinte)",
+            SQL_PAGINA_VENDAS.format(filtro_apos=FILTRO_APOS),
+            dict(periodo, apos_data=hoje - timedelta(days=10), apos_id=100),
+            [PRODUTO_DATA]
+        ),
+        (
+            "excluir_venda",
+            "DELETE FROM public.vendas_modarte WHERE id = %(id)s AND data_venda = %(data_venda)s",
+            {"id": 100, "data_venda": hoje - timedelta(days=10)},
+            [PKEY_VENDAS]
+        ),
+        (
+            "serie_vendas",
+            SQL_SERIE_VENDAS,
+            {"unidade": "week", "produto_id": produto_id, "inicio": periodo["desde"].date(), "fim": hoje.date()},
+            [("vendas_resumo_diario_pkey",)]
+        ),
+        (
+            "vendas_diarias (reposição)",
+            SQL_VENDAS_DIARIAS,
+            {"desde": (hoje - timedelta(days=27)).date()},
+            [("vendas_resumo_diario_dia",)]
+        ),
+        (
+            "vendas_novas (reposição)",
+            SQL_VENDAS_NOVAS,
+            {"apos_id": 1_000_000_000, "desde": (hoje - timedelta(days=27)).date()},
+            [PKEY_VENDAS]
+        ),
+        (
+            # O volume sintético foi todo gravado agora: a marca fica depois dele
+            "vendas_alteradas (vendas locais)",
+            SQL_VENDAS_ALTERADAS,
+            {"apos_id": 1_000_000_000, "modificada_apos": hoje + timedelta(days=1)},
+            [PKEY_VENDAS, ATUALIZADA_EM]
+        ),
+        (
+            "importar_produtos (upsert por código)",
+            SQL_UPSERT_PRODUTOS.replace("VALUES %s", "VALUES " + valores),
+            None,
+            [("produtos_codigo_unico", "produtos_codigo")]
+        ),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Confere com EXPLAIN que as consultas do painel usam índices")
+    parser.add_argument("--dsn", default=os.environ.get("MODARTE_DSN"))
+    parser.add_argument("--planos", action="store_true", help="imprime os planos completos")
+    parser.add_argument("--produtos", type=int, default=20_000)
+    parser.add_argument("--vendas", type=int, default=200_000)
+    args = parser.parse_args()
+
+    if not args.dsn:
+        parser.error("informe --dsn ou a variável MODARTE_DSN")
+
+    pool = PoolConexoes(minimo=1, maximo=1, dsn=args.dsn)
+    falhas = 0
+
+    try:
+        aplicar_migracoes(pool.transacao)
+
+        with pool.transacao() as conn:
+            cursor = conn.cursor()
+            produto_id = semear(cursor, args.produtos, args.vendas)
+
+            cursor.execute("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')")
+            busca_por_trecho = cursor.fetchone()[0]
+
+            for nome, sql, params, esperados in consultas(cursor, busca_por_trecho, produto_id):
+                cursor.execute("EXPLAIN " + sql, params)
+                plano = "\n".join(linha for (linha,) in cursor.fetchall())
+
+                faltando = [
+                    " ou ".join(alternativas) for alternativas in esperados
+                    if not any(re.search(indice, plano) for indice in alternativas)
+                ]
+
+                if nome in PARTICOES_NO_PERIODO:
+                    particoes = set(PARTICAO_LIDA.findall(plano))
+                    if "vendas_modarte_padrao" in particoes or len(particoes) > PARTICOES_NO_PERIODO[nome]:
+                        faltando.append(f"poda de partições ({len(particoes)} lidas)")
+
+                if faltando:
+                    falhas += 1
+                    print(f"❌ {nome}: não usa {', '.join(faltando)}")
+                else:
+                    print(f"✅ {nome}")
+
+                if args.planos or faltando:
+                    print("   " + plano.replace("\n", "\n   "))
+
+            # Nada desta conferência (nem o volume sintético) fica no banco
+            conn.rollback()
+    finally:
+        pool.fechar()
+
+    if falhas:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# =====================
+# CONFERÊNCIA - SINCRONIZAÇÃO DO CAIXA OFFLINE
+# =====================
+# Simula uma loja que ficou sem conexão: vende N carrinhos num modarte.db
+# temporário (RepositorioOffline), enquanto outro caixa continua vendendo
+# no banco. Depois sincroniza e confere:
+# - cada carrinho entra uma vez só (inclusive um que já tinha subido antes
+#   da queda, e numa segunda sincronização);
+# - o carrinho sem estoque no banco fica em conflito, sem desfazer os outros;
+# - o estoque do banco bate com o que foi vendido.
+# Tudo é determinístico (mesma sequência de carrinhos a cada execução).
+#
+# Uso (contra um Postgres local, nunca contra produção):
+#   python -m benchmarks.sincronizacao_offline --dsn postgresql://...
+#   python -m benchmarks.sincronizacao_offline --carrinhos 2000 --lote 100
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from conexao import PoolConexoes
+from repositorio import RepositorioPostgres
+from vendas_offline import LOTE_SINCRONIZACAO, RepositorioOffline, sincronizar
+
+MODARTE_DB = Path(__file__).parent.parent / "modarte.db"
+
+
+def criar_produtos(repo, estoques):
+    with repo.transacao() as conn:
+        cursor = conn.cursor()
+        ids = []
+        for i, estoque in enumerate(estoques):
+            cursor.execute("""
+                INSERT INTO public.produtos
+                (produto, foto, estoque_inicial, estoque_atual, preco, lucro, codigo)
+                VALUES (%s, '', %s, %s, 10, 3, NULL)
+                RETURNING id
+            """, (f"BENCHMARK OFFLINE {i}", estoque, estoque))
+            ids.append(cursor.fetchone()[0])
+        return ids
+
+
+def remover(repo, ids, prefixo):
+    with repo.transacao() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM public.vendas_modarte WHERE produto_id = ANY(%s)", (ids,))
+        cursor.execute("DELETE FROM public.produtos WHERE id = ANY(%s)", (ids,))
+        cursor.execute("DELETE FROM public.escritas_aplicadas WHERE chave LIKE %s", (prefixo + "%",))
+
+
+def estoque_e_vendido(repo, produto_id):
+    with repo.transacao() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT p.estoque_atual, COALESCE(SUM(v.quantidade), 0)
+            FROM public.produtos p
+            LEFT JOIN public.vendas_modarte v ON v.produto_id = p.id
+            WHERE p.id = %s
+            GROUP BY p.estoque_atual
+        """, (produto_id,))
+        return cursor.fetchone()
+
+
+def item(produto_id, quantidade):
+    return {"produto_id": produto_id, "quantidade": quantidade, "preco": 10.0, "lucro": 3.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Confere a sincronização das vendas feitas offline")
+    parser.add_argument("--dsn", default=os.environ.get("MODARTE_DSN"))
+    parser.add_argument("--carrinhos", type=int, default=500)
+    parser.add_argument("--lote", type=int, default=LOTE_SINCRONIZACAO)
+    args = parser.parse_args()
+
+    if not args.dsn:
+        parser.error("informe --dsn ou a variável MODARTE_DSN")
+
+    pool = PoolConexoes(minimo=1, maximo=1, dsn=args.dsn)
+    repo = RepositorioPostgres(pool)
+    prefixo = f"benchmark-offline-{uuid.uuid4().hex}-"
+
+    # Produto farto (os carrinhos comuns) e produto com 3 peças (o conflito)
+    farto, escasso = criar_produtos(repo, [args.carrinhos * 2, 3])
+    falhas = []
+
+    try:
+        with tempfile.TemporaryDirectory() as pasta:
+            caminho = Path(pasta) / "modarte.db"
+            shutil.copy(MODARTE_DB, caminho)
+
+            offline = RepositorioOffline(caminho)
+            catalogo = repo.listar_produtos()
+            offline.espelhar_produtos(catalogo[catalogo["id"].isin([farto, escasso])])
+
+            # A loja cai e vende offline: 1 ou 2 peças por carrinho e, no
+            # meio, as 3 peças do produto escasso
+            inicio = datetime(2026, 1, 1, 9)
+            for i in range(args.carrinhos):
+                itens = [item(farto, 1 + i % 2)]
+                if i == args.carrinhos // 2:
+                    itens.append(item(escasso, 3))
+                offline.registrar_carrinho(itens, inicio + timedelta(minutes=i), prefixo + str(i))
+
+            # Enquanto isso, outro caixa vende 1 peça do escasso no banco
+            repo.registrar_carrinho([item(escasso, 1)], inicio, prefixo + "outro-caixa")
+
+            # O primeiro carrinho chegou a subir antes da queda (resposta perdida)
+            (chave, data_venda, itens), *_ = offline.carrinhos_pendentes()
+            repo.registrar_carrinhos([(chave, data_venda, itens)])
+
+            comeco = time.perf_counter()
+            gravados, repetidos, conflitos = sincronizar(repo, offline, args.lote)
+            duracao = time.perf_counter() - comeco
+
+            segunda = sincronizar(repo, offline, args.lote)
+            pendentes, em_conflito = offline.contar_pendentes()
+
+        esperado_farto = sum(1 + i % 2 for i in range(args.carrinhos))
+        estoque_farto, vendido_farto = estoque_e_vendido(repo, farto)
+        estoque_escasso, vendido_escasso = estoque_e_vendido(repo, escasso)
+
+        print(f"Carrinhos:        {args.carrinhos} (lotes de {args.lote})")
+        print(f"Sincronização:    {duracao:.2f}s ({args.carrinhos / duracao:,.0f} carrinhos/s)")
+        print(f"Gravados:         {gravados}, já aplicados: {repetidos}, em conflito: {conflitos}")
+
+        if (gravados, repetidos, conflitos) != (args.carrinhos - 2, 1, 1):
+            falhas.append("contagem da primeira sincronização")
+        if segunda != (0, 0, 0) or (pendentes, em_conflito) != (0, 1):
+            falhas.append("segunda sincronização repetiu ou perdeu carrinhos")
+
+        # O carrinho em conflito leva junto a peça do farto
+        conflito = args.carrinhos // 2
+        if vendido_farto != esperado_farto - (1 + conflito % 2):
+            falhas.append(f"vendido do produto farto: {vendido_farto}")
+        if estoque_farto != args.carrinhos * 2 - vendido_farto:
+            falhas.append(f"estoque do produto farto: {estoque_farto}")
+        if (estoque_escasso, vendido_escasso) != (2, 1):
+            falhas.append(f"produto escasso: estoque {estoque_escasso}, vendido {vendido_escasso}")
+    finally:
+        remover(repo, [farto, escasso], prefixo)
+        pool.fechar()
+
+    for falha in falhas:
+        print(f"❌ {falha}")
+
+    if falhas:
+        raise SystemExit(1)
+
+    print("✅ Sincronização conferida")
+
+
+if __name__ == "__main__":
+    main()
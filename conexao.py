@@ -0,0 +1,98 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import pool as pg_pool
+
+# =====================
+# POOL DE CONEXÕES
+# =====================
+# Várias sessões (e vários caixas) usam o banco ao mesmo tempo. Cada uso
+# pega uma conexão própria do pool e a devolve no fim, em vez de todos
+# disputarem uma única conexão compartilhada.
+
+ERROS_CONEXAO = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+
+class PoolConexoes:
+    def __init__(self, minimo=1, maximo=10, timeout=30, ping_apos=30, **parametros):
+        self._pool = pg_pool.ThreadedConnectionPool(minimo, maximo, **parametros)
+        # O ThreadedConnectionPool falha quando esgota; o semáforo faz a
+        # sessão esperar por uma vaga até o timeout.
+        self._vagas = threading.BoundedSemaphore(maximo)
+        self._maximo = maximo
+        self._timeout = timeout
+        self._ping_apos = ping_apos
+        self._ultimo_uso = {}
+
+    def _saudavel(self, conn):
+        if conn.closed:
+            return False
+
+        # Conexões usadas há pouco não pagam o round trip do ping
+        ultimo = self._ultimo_uso.get(conn)
+        if ultimo is None or time.monotonic() - ultimo < self._ping_apos:
+            return True
+
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def obter(self):
+        if not self._vagas.acquire(timeout=self._timeout):
+            raise pg_pool.PoolError("Nenhuma conexão livre no pool.")
+
+        try:
+            # Conexões quebradas (ex.: SSL derrubado) são descartadas e
+            # substituídas por novas de forma transparente.
+            for _ in range(self._maximo + 1):
+                conn = self._pool.getconn()
+                if self._saudavel(conn):
+                    return conn
+                self._descartar(conn)
+
+            raise pg_pool.PoolError("Não foi possível obter uma conexão saudável.")
+        except BaseException:
+            self._vagas.release()
+            raise
+
+    def _descartar(self, conn):
+        self._ultimo_uso.pop(conn, None)
+        self._pool.putconn(conn, close=True)
+
+    def devolver(self, conn, descartar=False):
+        try:
+            if descartar or conn.closed:
+                self._descartar(conn)
+            else:
+                self._ultimo_uso[conn] = time.monotonic()
+                self._pool.putconn(conn)
+        finally:
+            self._vagas.release()
+
+    @contextmanager
+    def transacao(self):
+        conn = self.obter()
+        descartar = False
+
+        try:
+            yield conn
+            conn.commit()
+        except BaseException as erro:
+            descartar = isinstance(erro, ERROS_CONEXAO)
+            if not conn.closed:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    descartar = True
+            raise
+        finally:
+            self.devolver(conn, descartar)
+
+    def fechar(self):
+        self._pool.closeall()
@@ -0,0 +1,415 @@
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from datetime import datetime, time, timedelta
+
+import pandas as pd
+import streamlit as st
+from psycopg2.pool import PoolError
+
+from conexao import ERROS_CONEXAO, PoolConexoes
+from fila_escritas import FilaCheia, FilaEscritas
+from instrumentacao import ConexaoSQLiteMedida, CursorPostgresMedido
+from repositorio import (
+    GRANULARIDADES,
+    EstoqueInsuficiente,
+    RepositorioPostgres,
+    RepositorioSQLite,
+)
+from vendas_locais import SnapshotVendas
+from vendas_offline import RepositorioOffline, sincronizar
+
+BASE_DIR = Path(__file__).parent
+
+# =====================
+# CONEXÃO
+# =====================
+
+@st.cache_resource
+def get_pool():
+    config = st.secrets["database"]
+
+    return PoolConexoes(
+        minimo=config.get("pool_min", 1),
+        maximo=config.get("pool_max", 10),
+        timeout=config.get("pool_timeout", 30),
+        host=config["host"],
+        port=config["port"],
+        database=config["dbname"],
+        user=config["user"],
+        password=config["password"],
+        sslmode=config["sslmode"],
+        # Sem internet a conexão falha logo e o app entra no modo offline
+        connect_timeout=config.get("connect_timeout", 5),
+        cursor_factory=CursorPostgresMedido
+    )
+
+def transacao():
+    # Commit ao sair do bloco, rollback em caso de erro
+    return get_pool().transacao()
+
+# =====================
+# REPOSITÓRIO
+# =====================
+# Backend de dados: "postgres" (padrão, Supabase) ou "sqlite" (modarte.db).
+# Variáveis de ambiente têm prioridade sobre o secrets.toml:
+#   MODARTE_BACKEND=sqlite MODARTE_SQLITE=caminho/modarte.db streamlit run app.py
+
+def _config_armazenamento():
+    try:
+        return dict(st.secrets["storage"])
+    except (FileNotFoundError, KeyError):
+        return {}
+
+def _backend():
+    return os.environ.get("MODARTE_BACKEND", _config_armazenamento().get("backend", "postgres"))
+
+@st.cache_resource
+def get_repositorio():
+    config = _config_armazenamento()
+    backend = _backend()
+
+    if backend == "sqlite":
+        caminho = os.environ.get("MODARTE_SQLITE", config.get("sqlite", BASE_DIR / "modarte.db"))
+        return RepositorioSQLite(caminho, fabrica_conexao=ConexaoSQLiteMedida)
+
+    if backend == "postgres":
+        return RepositorioPostgres(get_pool())
+
+    raise ValueError(f"Backend de dados desconhecido: {backend}")
+
+# =====================
+# VERSÃO DOS DADOS
+# =====================
+# Contador compartilhado por todas as sessões do servidor. Cada escrita
+# incrementa a versão e os snapshots em cache passam a ser recalculados.
+# Exclusões também incrementam "remocoes": caches atualizados de forma
+# incremental (só o que chegou depois) precisam recarregar tudo nesse caso.
+
+@st.cache_resource
+def _estado_versao():
+    return {"versao": 0, "remocoes": 0, "lock": threading.Lock()}
+
+def versao_dados():
+    return _estado_versao()["versao"]
+
+def versao_remocoes():
+    return _estado_versao()["remocoes"]
+
+def invalidar_dados(remocao=False):
+    estado = _estado_versao()
+    with estado["lock"]:
+        estado["versao"] += 1
+        if remocao:
+            estado["remocoes"] += 1
+
+# =====================
+# VENDAS LOCAIS
+# =====================
+# Com o Postgres, o histórico de vendas é lido de uma cópia local em Arrow
+# (vendas_locais.py) que, a cada escrita, traz do banco só a diferença.
+# MODARTE_VENDAS_LOCAIS (ou storage.vendas_locais) muda a pasta; vazio
+# desliga e as leituras voltam a ir direto ao banco.
+
+@st.cache_resource
+def get_vendas_locais():
+    if not isinstance(get_repositorio(), RepositorioPostgres):
+        return None
+
+    config = _config_armazenamento()
+    pasta = os.environ.get("MODARTE_VENDAS_LOCAIS", config.get("vendas_locais", BASE_DIR / ".vendas_locais"))
+
+    return SnapshotVendas(pasta) if pasta else None
+
+# Uma sincronização por versão dos dados (e a cada 10 min, para escritas
+# feitas fora deste servidor)
+@st.cache_data(ttl=600, max_entries=1, show_spinner=False)
+def _sincronizar_vendas_locais(versao):
+    get_vendas_locais().sincronizar(get_repositorio())
+
+def vendas_locais():
+    # Snapshot local já sincronizado com a versão atual, ou None
+    local = get_vendas_locais()
+    if local is not None:
+        _sincronizar_vendas_locais(versao_dados())
+    return local
+
+# =====================
+# MODO OFFLINE
+# =====================
+# Com o Postgres, se o banco não responde (internet fora), o caixa passa a
+# vender pelo modarte_offline.db (vendas_offline.py): catálogo e estoque vêm
+# do espelho local e as vendas ficam guardadas até a conexão voltar. A troca
+# de modo incrementa a versão dos dados, então nenhum cache mistura os dois.
+# MODARTE_OFFLINE (ou storage.offline) muda o arquivo; vazio desliga.
+#
+# O espelho do catálogo é gravado numa thread, fora do rerun, e só quando os
+# produtos mudaram desde a última cópia. Se duas cópias se cruzam, só a
+# mais nova é gravada.
+
+VERIFICAR_CONEXAO_S = 15
+
+@st.cache_resource
+def get_repositorio_offline():
+    if _backend() != "postgres":
+        return None
+
+    config = _config_armazenamento()
+    caminho = os.environ.get("MODARTE_OFFLINE", config.get("offline", BASE_DIR / "modarte_offline.db"))
+
+    return RepositorioOffline(caminho, fabrica_conexao=ConexaoSQLiteMedida) if caminho else None
+
+@st.cache_resource
+def _estado_espelho():
+    return {"assinatura": None, "lock": threading.Lock(), "gravacao": threading.Lock()}
+
+def _gravar_espelho(offline, df, assinatura):
+    estado = _estado_espelho()
+    with estado["gravacao"]:
+        if estado["assinatura"] != assinatura:
+            return
+
+        try:
+            offline.espelhar_produtos(df)
+        except sqlite3.Error:
+            # Tenta de novo na próxima recarga do catálogo
+            with estado["lock"]:
+                if estado["assinatura"] == assinatura:
+                    estado["assinatura"] = None
+
+def espelhar_catalogo(df):
+    offline = get_repositorio_offline()
+    if offline is None:
+        return
+
+    assinatura = int(pd.util.hash_pandas_object(df, index=False).sum())
+
+    estado = _estado_espelho()
+    with estado["lock"]:
+        if estado["assinatura"] == assinatura:
+            return
+        estado["assinatura"] = assinatura
+
+    threading.Thread(
+        target=_gravar_espelho,
+        args=(offline, df.copy(), assinatura),
+        name="espelho-catalogo",
+        daemon=True
+    ).start()
+
+@st.cache_data(ttl=VERIFICAR_CONEXAO_S, show_spinner=False)
+def _banco_responde():
+    try:
+        with get_repositorio().transacao() as conn:
+            conn.cursor().execute("SELECT 1")
+        return True
+    except (*ERROS_CONEXAO, PoolError):
+        return False
+
+def modo_offline():
+    if get_repositorio_offline() is None:
+        return False
+
+    offline = not _banco_responde()
+
+    estado = _estado_versao()
+    if estado.get("offline", False) != offline:
+        with estado["lock"]:
+            estado["offline"] = offline
+        invalidar_dados()
+
+    return offline
+
+def repositorio_ativo():
+    # Leituras do catálogo: o banco ou, sem conexão, o espelho local
+    return get_repositorio_offline() if modo_offline() else get_repositorio()
+
+@st.cache_resource
+def _lock_sincronizacao():
+    return threading.Lock()
+
+def sincronizar_vendas_offline():
+    # Sobe as vendas guardadas offline. Devolve (gravados, repetidos,
+    # conflitos) ou None se outra sessão já está sincronizando.
+    lock = _lock_sincronizacao()
+    if not lock.acquire(blocking=False):
+        return None
+
+    try:
+        resultado = sincronizar(get_repositorio(), get_repositorio_offline())
+    except (*ERROS_CONEXAO, PoolError):
+        # Caiu de novo no meio: o que já subiu está confirmado, o resto espera
+        _banco_responde.clear()
+        return None
+    finally:
+        lock.release()
+
+    invalidar_dados()
+    return resultado
+
+def vendas_offline_pendentes():
+    # (carrinhos a sincronizar, carrinhos em conflito)
+    offline = get_repositorio_offline()
+    return (0, 0) if offline is None else offline.contar_pendentes()
+
+def conflitos_offline():
+    return get_repositorio_offline().vendas_em_conflito()
+
+def resolver_conflitos_offline(descartar=False):
+    # Descartar devolve as peças ao estoque local; senão tentam subir de novo
+    offline = get_repositorio_offline()
+    if descartar:
+        offline.descartar_conflitos()
+    else:
+        offline.reenviar_conflitos()
+    invalidar_dados()
+
+# =====================
+# SNAPSHOT DE PRODUTOS
+# =====================
+
+# Os tipos já chegam do repositório (repositorio.TIPOS_PRODUTO). O id vira
+# o índice: achar um produto é um lookup no índice, sem varrer a coluna.
+
+def _calcular_produtos(df):
+    df["vendidos"] = (df["estoque_inicial"] - df["estoque_atual"]).clip(lower=0)
+    df["renda_atual"] = df["vendidos"] * df["preco"]
+    df["lucro_atual"] = df["vendidos"] * df["lucro"]
+
+    return df.set_index("id")
+
+# O ttl cobre escritas feitas fora deste servidor (outra instância, SQL manual).
+@st.cache_data(ttl=600, max_entries=4, show_spinner=False)
+def _snapshot_produtos(versao):
+    repo = repositorio_ativo()
+    df = repo.listar_produtos()
+
+    # Com conexão, o catálogo recarregado atualiza o espelho offline
+    if repo is not get_repositorio_offline():
+        espelhar_catalogo(df)
+
+    return _calcular_produtos(df)
+
+def carregar_produtos():
+    return _snapshot_produtos(versao_dados())
+
+def filtrar_produto(df, produto_id):
+    # Só as linhas do produto (ou tudo, se None), por índice
+    if produto_id is None:
+        return df
+    return df.loc[[produto_id]] if produto_id in df.index else df.iloc[:0]
+
+def memoria_produtos():
+    # Bytes do snapshot que cada sessão recebe do cache a cada rerun
+    return int(carregar_produtos().memory_usage(deep=True).sum())
+
+# =====================
+# BUSCA E CONSULTA POR ID
+# =====================
+# Os seletores de produto não recebem o catálogo inteiro: a busca por nome
+# ou código roda no banco (com índice) e devolve no máximo LIMITE_BUSCA ids.
+# Depois disso tudo é consultado pela chave primária.
+
+LIMITE_BUSCA = 50
+
+@st.cache_data(ttl=600, max_entries=256, show_spinner=False)
+def _buscar_produtos(versao, termo, limite):
+    return repositorio_ativo().buscar_produtos(termo, limite)
+
+def buscar_produtos(termo="", limite=LIMITE_BUSCA):
+    return _buscar_produtos(versao_dados(), termo.strip(), limite)
+
+@st.cache_data(ttl=600, max_entries=256, show_spinner=False)
+def _produto(versao, produto_id):
+    df = _calcular_produtos(repositorio_ativo().produto_por_id(produto_id))
+    return None if df.empty else df.iloc[0]
+
+def produto_por_id(produto_id):
+    # Linha do produto (Series) ou None se ele não existe mais
+    return _produto(versao_dados(), produto_id)
+
+# =====================
+# HISTÓRICO DE VENDAS
+# =====================
+# Filtros de produto e período vão para o SQL (ou para a busca binária no
+# snapshot local) e a paginação é por chave (data_venda, id): cada página
+# custa o mesmo, não importa o tamanho do histórico.
+
+TAMANHO_PAGINA_VENDAS = 50
+
+def _intervalo(inicio, fim):
+    # Datas do filtro viram [inicio 00:00, fim + 1 dia 00:00)
+    return (
+        datetime.combine(inicio, time.min),
+        datetime.combine(fim, time.min) + timedelta(days=1)
+    )
+
+@st.cache_data(ttl=600, max_entries=64, show_spinner=False)
+def _pagina_vendas(versao, produto_id, inicio, fim, apos, limite):
+    desde, ate = _intervalo(inicio, fim)
+
+    # Uma linha a mais só para saber se existe próxima página
+    local = vendas_locais()
+    if local is None:
+        df = get_repositorio().pagina_vendas(produto_id, desde, ate, apos, limite + 1)
+    else:
+        df = local.pagina(produto_id, desde, ate, apos, limite + 1)
+        produto = produto_por_id(produto_id)
+        df.insert(2, "produto", "" if produto is None else produto["produto"])
+
+    df["data_venda"] = pd.to_datetime(df["data_venda"])
+    tem_mais = len(df) > limite
+
+    return df.head(limite), tem_mais
+
+def historico_vendas(produto_id, inicio, fim, apos=None, limite=TAMANHO_PAGINA_VENDAS):
+    # apos = (data_venda, id) da última venda da página anterior
+    return _pagina_vendas(versao_dados(), produto_id, inicio, fim, apos, limite)
+
+def chave_pagina(df):
+    # Chave para buscar a página seguinte a partir da última linha
+    ultima = df.iloc[-1]
+    return (ultima["data_venda"].to_pydatetime(), int(ultima["id"]))
+
+# =====================
+# RESUMO DE VENDAS (GRÁFICO)
+# =====================
+# No Postgres o gráfico lê a tabela vendas_resumo_diario (produto × dia),
+# mantida por trigger no banco. Semana e mês são somas das linhas diárias: um
+# ano de um produto são no máximo 366 linhas. Com as vendas locais, a mesma
+# soma é feita sobre a fatia do produto no snapshot.
+
+@st.cache_data(ttl=600, max_entries=64, show_spinner=False)
+def _serie_vendas(versao, produto_id, inicio, fim, granularidade):
+    local = vendas_locais()
+    if local is None:
+        df = get_repositorio().serie_vendas(produto_id, inicio, fim, granularidade)
+    else:
+        df = local.serie(produto_id, *_intervalo(inicio, fim), granularidade)
+    df["periodo"] = pd.to_datetime(df["periodo"]).dt.date
+
+    return df.set_index("periodo")["quantidade"]
+
+def serie_vendas(produto_id, inicio, fim, granularidade="Dia"):
+    return _serie_vendas(versao_dados(), produto_id, inicio, fim, granularidade)
+
+# =====================
+# EXPORTAÇÃO DE VENDAS
+# =====================
+# Sempre do banco, sem cache e sem as vendas locais: o livro de vendas sai
+# com tudo o que está gravado, em lotes (exportacao.py).
+
+def lotes_vendas(inicio, fim, produto_id=None):
+    return get_repositorio().lotes_vendas(*_intervalo(inicio, fim), produto_id)
+
+# =====================
+# ESCRITAS
+# =====================
+# Toda escrita do app passa pela fila (fila_escritas.py): uma thread grava
+# pelo repositório e incrementa a versão dos dados a cada lote. As vendas
+# podem cair no caixa offline (enviar(..., offline=True) ou queda no meio).
+
+@st.cache_resource
+def get_fila_escritas():
+    return FilaEscritas(get_repositorio, ao_gravar=invalidar_dados, reserva=get_repositorio_offline())
@@ -0,0 +1,141 @@
+import argparse
+import csv
+import io
+import os
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+# =====================
+# EXPORTAÇÃO DO LIVRO DE VENDAS (CSV / EXCEL)
+# =====================
+# As vendas chegam do repositório em lotes (lotes_vendas, cursor nomeado no
+# Postgres) e cada lote é escrito no arquivo antes do próximo ser buscado:
+# nenhum DataFrame com o período inteiro é montado. O Excel usa o modo
+# write-only do openpyxl, que grava as linhas num temporário em vez de
+# guardar as células na memória.
+#
+# Meses arquivados no schema arquivo (particoes_vendas.py) entram quando
+# caem no período; os que já foram exportados para Parquet, não.
+#
+# O CSV sai no formato que o Excel em português abre direto: separador ";",
+# vírgula decimal e UTF-8 com BOM.
+#
+# Para exportar sem o app (ex.: o ano inteiro para o contador):
+#   python exportacao.py --dsn postgresql://... --inicio 2025-01-01 --fim 2025-12-31 --saida vendas_2025.xlsx
+
+COLUNAS_EXPORTACAO = [
+    "Data", "Venda", "Código", "Produto", "Quantidade",
+    "Preço unitário", "Lucro unitário", "Total", "Lucro total"
+]
+
+LARGURAS_XLSX = [20, 10, 14, 40, 12, 15, 15, 15, 15]
+
+FORMATOS = {
+    "CSV": ("csv", "text/csv"),
+    "Excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+
+def _celula_csv(valor):
+    if valor is None:
+        return ""
+    if isinstance(valor, datetime):
+        return valor.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(valor, (float, Decimal)):
+        return f"{valor:.2f}".replace(".", ",")
+    return valor
+
+
+def escrever_csv(lotes, destino):
+    # destino: arquivo binário aberto para escrita
+    texto = io.TextIOWrapper(destino, encoding="utf-8-sig", newline="")
+    escritor = csv.writer(texto, delimiter=";")
+    escritor.writerow(COLUNAS_EXPORTACAO)
+
+    linhas = 0
+    for lote in lotes:
+        escritor.writerows([_celula_csv(valor) for valor in linha] for linha in lote)
+        linhas += len(lote)
+
+    # Sem fechar o arquivo de quem chamou
+    texto.flush()
+    texto.detach()
+    return linhas
+
+
+def escrever_xlsx(lotes, destino):
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+    from openpyxl.utils import get_column_letter
+
+    livro = Workbook(write_only=True)
+    planilha = livro.create_sheet("Vendas")
+
+    for indice, largura in enumerate(LARGURAS_XLSX, start=1):
+        planilha.column_dimensions[get_column_letter(indice)].width = largura
+
+    cabecalho = []
+    for nome in COLUNAS_EXPORTACAO:
+        celula = WriteOnlyCell(planilha, value=nome)
+        celula.font = Font(bold=True)
+        cabecalho.append(celula)
+    planilha.append(cabecalho)
+
+    linhas = 0
+    for lote in lotes:
+        for linha in lote:
+            planilha.append(linha)
+        linhas += len(lote)
+
+    livro.save(destino)
+    return linhas
+
+
+ESCRITORES = {"csv": escrever_csv, "xlsx": escrever_xlsx}
+
+
+def exportar_vendas(lotes, extensao, destino):
+    # Devolve o número de vendas escritas
+    return ESCRITORES[extensao](lotes, destino)
+
+
+def main():
+    from conexao import PoolConexoes
+    from repositorio import RepositorioPostgres
+
+    parser = argparse.ArgumentParser(description="Exporta o livro de vendas em CSV ou Excel")
+    parser.add_argument("--dsn", default=os.environ.get("MODARTE_DSN"))
+    parser.add_argument("--inicio", type=date.fromisoformat, required=True)
+    parser.add_argument("--fim", type=date.fromisoformat, required=True)
+    parser.add_argument("--produto", type=int, help="id do produto (padrão: todos)")
+    parser.add_argument("--saida", required=True, help="arquivo .csv ou .xlsx")
+    args = parser.parse_args()
+
+    if not args.dsn:
+        parser.error("informe --dsn ou a variável MODARTE_DSN")
+
+    extensao = args.saida.rsplit(".", 1)[-1].lower()
+    if extensao not in ESCRITORES:
+        parser.error("a saída precisa terminar em .csv ou .xlsx")
+
+    pool = PoolConexoes(minimo=1, maximo=1, dsn=args.dsn)
+
+    try:
+        repo = RepositorioPostgres(pool)
+        lotes = repo.lotes_vendas(
+            datetime.combine(args.inicio, time.min),
+            datetime.combine(args.fim, time.min) + timedelta(days=1),
+            args.produto
+        )
+
+        with open(args.saida, "wb") as destino:
+            linhas = exportar_vendas(lotes, extensao, destino)
+    finally:
+        pool.fechar()
+
+    print(f"✅ {linhas} vendas exportadas para {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import psycopg2
+
+# =====================
+# FILA DE ESCRITAS EM SEGUNDO PLANO
+# =====================
+# As escritas do app (vendas, produtos, exclusões) entram numa fila limitada
+# e uma thread do servidor grava no banco. O rerun da página não espera a
+# ida e volta ao Supabase; a sessão acompanha o resultado pela chave.
+#
+# Cada comando leva uma chave de idempotência gerada pela sessão:
+# - a mesma chave enviada de novo (clique duplo) é ignorada aqui;
+# - vendas e produtos novos gravam a chave na mesma transação
+#   (repositorio.registrar_chave), então uma nova tentativa depois de uma
+#   queda de conexão também não duplica nada;
+# - atualizar e excluir já são idempotentes.
+#
+# A thread pega até LOTE_MAXIMO comandos de uma vez, grava um por um (cada
+# um na sua transação, para um erro de estoque não desfazer os outros) e
+# invalida os caches uma vez por lote.
+#
+# Com um repositório reserva (o caixa offline, vendas_offline.py), as vendas
+# enviadas com offline=True vão direto para ele, e uma venda que esgota as
+# tentativas no banco por queda de conexão também vai para lá em vez de se
+# perder.
+
+TAMANHO_FILA = 100
+LOTE_MAXIMO = 20
+ESPERA_FILA_S = 5
+
+TENTATIVAS = 3
+ESPERA_TENTATIVA_S = 0.5
+
+RESULTADOS_GUARDADOS = 1000
+
+DIAS_CHAVES = 7
+MANUTENCAO_S = 3600
+
+# Queda de conexão, banco ocupado: vale tentar de novo
+ERROS_TRANSITORIOS = (psycopg2.OperationalError, psycopg2.InterfaceError, sqlite3.OperationalError)
+
+OPERACOES = {"registrar_carrinho", "inserir_produto", "atualizar_produto", "excluir_produto", "excluir_venda"}
+
+# Recebem a chave para gravá-la junto (as demais são idempotentes)
+COM_CHAVE = {"registrar_carrinho", "inserir_produto"}
+
+REMOCOES = {"excluir_produto", "excluir_venda"}
+
+# Podem ser gravadas no repositório reserva
+OFFLINE = {"registrar_carrinho"}
+
+logger = logging.getLogger("modarte.escritas")
+
+
+class FilaCheia(Exception):
+    pass
+
+
+class FilaEscritas:
+    def __init__(self, obter_repo, ao_gravar, tamanho=TAMANHO_FILA, reserva=None):
+        # obter_repo(): o repositório, pedido a cada escrita (com o banco fora
+        # do ar ele nem chega a ser criado); ao_gravar(remocao=bool): chamado
+        # depois de cada lote gravado
+        self.obter_repo = obter_repo
+        self.ao_gravar = ao_gravar
+        self.reserva = reserva
+        self.fila = queue.Queue(maxsize=tamanho)
+        self.lock = threading.Lock()
+        self.pendentes = set()
+        self.resultados = OrderedDict()
+        self.ultima_manutencao = 0.0
+
+        threading.Thread(target=self._trabalhar, name="fila-escritas", daemon=True).start()
+
+    def enviar(self, chave, operacao, *args, offline=False):
+        # False se a chave já foi enviada (pendente ou concluída)
+        if operacao not in OPERACOES:
+            raise ValueError(f"Operação desconhecida: {operacao}")
+        if offline and (self.reserva is None or operacao not in OFFLINE):
+            raise ValueError(f"Operação indisponível offline: {operacao}")
+
+        with self.lock:
+            if chave in self.pendentes or chave in self.resultados:
+                return False
+            self.pendentes.add(chave)
+
+        try:
+            self.fila.put((chave, operacao, args, offline), timeout=ESPERA_FILA_S)
+        except queue.Full:
+            with self.lock:
+                self.pendentes.discard(chave)
+            raise FilaCheia("Muitas gravações na fila. Tente de novo em instantes.")
+
+        return True
+
+    def resultado(self, chave):
+        # None enquanto pendente; depois (True, valor) ou (False, exceção)
+        with self.lock:
+            return self.resultados.get(chave)
+
+    def _aplicar(self, chave, operacao, args, offline):
+        if offline:
+            return self._tentar(lambda: self.reserva, chave, operacao, args)
+
+        try:
+            return self._tentar(self.obter_repo, chave, operacao, args)
+        except ERROS_TRANSITORIOS:
+            if self.reserva is None or operacao not in OFFLINE:
+                raise
+            logger.warning("Banco fora do ar; %s gravada no repositório reserva", operacao)
+            return self._tentar(lambda: self.reserva, chave, operacao, args)
+
+    def _tentar(self, obter_repo, chave, operacao, args):
+        kwargs = {"chave": chave} if operacao in COM_CHAVE else {}
+
+        for tentativa in range(TENTATIVAS):
+            try:
+                return getattr(obter_repo(), operacao)(*args, **kwargs)
+            except ERROS_TRANSITORIOS:
+                if tentativa == TENTATIVAS - 1:
+                    raise
+                logger.warning("Falha transitória em %s; tentando de novo", operacao, exc_info=True)
+                time.sleep(ESPERA_TENTATIVA_S * 2 ** tentativa)
+
+    def _manutencao(self):
+        # Chaves antigas e, no Postgres, as partições de vendas
+        if time.monotonic() - self.ultima_manutencao < MANUTENCAO_S:
+            return
+        self.ultima_manutencao = time.monotonic()
+
+        if self.reserva is not None:
+            self.reserva.manutencao(DIAS_CHAVES)
+        self.obter_repo().manutencao(DIAS_CHAVES)
+
+    def _trabalhar(self):
+        while True:
+            lote = [self.fila.get()]
+            while len(lote) < LOTE_MAXIMO:
+                try:
+                    lote.append(self.fila.get_nowait())
+                except queue.Empty:
+                    break
+
+            resultados = {}
+            for chave, operacao, args, offline in lote:
+                try:
+                    resultados[chave] = (True, self._aplicar(chave, operacao, args, offline))
+                except Exception as erro:
+                    logger.warning("Escrita %s falhou: %s", operacao, erro)
+                    resultados[chave] = (False, erro)
+
+            try:
+                # Antes de publicar: quem vê o resultado já lê os dados novos
+                self.ao_gravar(remocao=any(comando[1] in REMOCOES for comando in lote))
+                self._manutencao()
+            except Exception:
+                logger.exception("Falha depois de gravar o lote")
+
+            with self.lock:
+                for chave, resultado in resultados.items():
+                    self.pendentes.discard(chave)
+                    self.resultados[chave] = resultado
+
+                while len(self.resultados) > RESULTADOS_GUARDADOS:
+                    self.resultados.popitem(last=False)
@@ -0,0 +1,159 @@
+import argparse
+
+import openpyxl
+import pandas as pd
+
+from dados import get_repositorio, invalidar_dados
+from validacao import validar_produtos
+
+# =====================
+# IMPORTAÇÃO DO CATÁLOGO (XLSX)
+# =====================
+# A planilha é lida em modo streaming (read_only) e processada em lotes:
+# cada lote é validado de uma vez e gravado pelo repositório, que atualiza os
+# produtos cujo código já existe e insere os demais.
+#
+# A coluna FOTO DO PRODUTO da planilha da loja é uma fórmula de imagem, que
+# fora do Excel sempre chega como #VALUE!. Por isso a foto é opcional aqui:
+# sem foto, um produto atualizado mantém a que já tinha e um produto novo
+# entra sem foto (o app mostra o logo) até ser editado no app.
+#
+# Uso:
+#   python importar_planilha.py PLANILHA_MODARTE.xlsx [--lote 1000]
+
+# Cabeçalho da planilha → coluna de produtos
+COLUNAS_PLANILHA = {
+    "PRODUTO": "produto",
+    "FOTO DO PRODUTO": "foto",
+    "ESTOQUE INICIAL": "estoque_inicial",
+    "ESTOQUE ATUAL": "estoque_atual",
+    "PREÇO FINAL": "preco",
+    "LUCRO LIQUIDO": "lucro",
+    "CODIGO NF": "codigo",
+}
+
+COLUNAS = list(COLUNAS_PLANILHA.values())
+
+# Fórmulas quebradas chegam como texto de erro do Excel
+ERROS_EXCEL = {"#VALUE!", "#REF!", "#N/A", "#DIV/0!", "#NAME?", "#NULL!", "#NUM!"}
+
+TAMANHO_LOTE = 1000
+
+CAMPOS_OBRIGATORIOS = ["produto", "codigo"]
+
+def _normalizar(valor):
+    if isinstance(valor, str):
+        valor = valor.strip()
+        if valor in ERROS_EXCEL:
+            return None
+    return valor
+
+
+def _normalizar_codigo(valor):
+    # Códigos digitados como número (ex.: 1.0) viram "1"
+    if pd.isna(valor):
+        return None
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    return str(valor)
+
+
+def ler_planilha(arquivo, tamanho_lote=TAMANHO_LOTE):
+    # Gera DataFrames de até tamanho_lote linhas, com a linha do Excel como índice
+    wb = openpyxl.load_workbook(arquivo, read_only=True, data_only=True)
+
+    try:
+        linhas = wb.worksheets[0].iter_rows(values_only=True)
+        cabecalho = [str(c).strip() if c is not None else "" for c in next(linhas)]
+
+        faltando = set(COLUNAS_PLANILHA) - set(cabecalho)
+        if faltando:
+            raise ValueError(f"Colunas ausentes na planilha: {', '.join(sorted(faltando))}")
+
+        posicoes = [cabecalho.index(nome) for nome in COLUNAS_PLANILHA]
+        lote, indices = [], []
+
+        for numero, linha in enumerate(linhas, start=2):
+            valores = [_normalizar(linha[i]) if i < len(linha) else None for i in posicoes]
+
+            # Linhas totalmente vazias no fim da planilha
+            if all(v is None or v == "" for v in valores):
+                continue
+
+            lote.append(valores)
+            indices.append(numero)
+
+            if len(lote) == tamanho_lote:
+                yield pd.DataFrame(lote, columns=COLUNAS, index=indices)
+                lote, indices = [], []
+
+        if lote:
+            yield pd.DataFrame(lote, columns=COLUNAS, index=indices)
+    finally:
+        wb.close()
+
+
+def importar_planilha(arquivo, tamanho_lote=TAMANHO_LOTE):
+    resumo = {"lidas": 0, "atualizados": 0, "inseridos": 0, "com_erro": 0}
+    relatorios = []
+    vistos = set()
+
+    for df in ler_planilha(arquivo, tamanho_lote):
+        resumo["lidas"] += len(df)
+        df["codigo"] = df["codigo"].map(_normalizar_codigo)
+
+        erros = validar_produtos(df, CAMPOS_OBRIGATORIOS)
+
+        # O mesmo código duas vezes na planilha: vale a primeira ocorrência
+        repetido = df["codigo"].isin(vistos) | df["codigo"].duplicated()
+        erros[repetido & (erros == "")] = "Código repetido na planilha."
+
+        validos = df[erros == ""]
+        vistos.update(validos["codigo"])
+
+        if not validos.empty:
+            atualizados, inseridos = get_repositorio().importar_produtos(validos)
+            resumo["atualizados"] += atualizados
+            resumo["inseridos"] += inseridos
+
+        com_erro = erros != ""
+        if com_erro.any():
+            relatorios.append(
+                df.loc[com_erro, ["produto", "codigo"]]
+                .assign(erro=erros[com_erro])
+                .rename_axis("linha")
+                .reset_index()
+            )
+
+    resumo["com_erro"] = sum(len(r) for r in relatorios)
+
+    if resumo["atualizados"] or resumo["inseridos"]:
+        invalidar_dados()
+
+    relatorio = (
+        pd.concat(relatorios, ignore_index=True) if relatorios
+        else pd.DataFrame(columns=["linha", "produto", "codigo", "erro"])
+    )
+
+    return resumo, relatorio
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa o catálogo de produtos de uma planilha XLSX")
+    parser.add_argument("arquivo")
+    parser.add_argument("--lote", type=int, default=TAMANHO_LOTE)
+    args = parser.parse_args()
+
+    resumo, relatorio = importar_planilha(args.arquivo, args.lote)
+
+    print(
+        f"✅ {resumo['lidas']} linhas lidas: {resumo['inseridos']} inseridas, "
+        f"{resumo['atualizados']} atualizadas, {resumo['com_erro']} com erro"
+    )
+
+    if not relatorio.empty:
+        print(relatorio.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+import streamlit as st
+from psycopg2.extensions import cursor as CursorPostgres
+
+# =====================
+# INSTRUMENTAÇÃO (TEMPOS E SQL POR RERUN)
+# =====================
+# Cada rerun abre uma medição; trechos do app são cronometrados com
+# `with trecho("nome")` e os cursores contam comandos SQL e linhas lidas.
+# No fim do rerun sai uma linha JSON no log "modarte.desempenho" e, se
+# ligado na barra lateral, o painel de desempenho.
+#
+# O custo é um perf_counter e um append por trecho: pode ficar ligado em
+# produção. Fragments que rodam sozinhos geram o próprio registro no log.
+
+logger = logging.getLogger("modarte.desempenho")
+
+if not logger.handlers:
+    _saida = logging.StreamHandler()
+    _saida.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_saida)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+# Cada sessão roda o script na própria thread
+_local = threading.local()
+
+
+class Medicao:
+    def __init__(self, pagina):
+        self.pagina = pagina
+        self.inicio = time.perf_counter()
+        self.consultas = 0
+        self.linhas = 0
+        self.trechos = []
+        self.profundidade = 0
+        self.total_ms = None
+
+    def registro(self, evento):
+        return {
+            "evento": evento,
+            "pagina": self.pagina,
+            "total_ms": self.total_ms,
+            "consultas": self.consultas,
+            "linhas": self.linhas,
+            "trechos": self.trechos
+        }
+
+
+def _atual():
+    return getattr(_local, "medicao", None)
+
+
+def iniciar_medicao(pagina):
+    _local.medicao = Medicao(pagina)
+
+
+def finalizar_medicao(evento="rerun"):
+    medicao = _atual()
+    if medicao is None:
+        return None
+
+    _local.medicao = None
+    medicao.total_ms = round((time.perf_counter() - medicao.inicio) * 1000, 1)
+    logger.info(json.dumps(medicao.registro(evento), ensure_ascii=False))
+    return medicao
+
+
+@contextmanager
+def trecho(nome):
+    medicao = _atual()
+
+    # Fora de um rerun medido (ex.: fragment rodando sozinho) o trecho vira
+    # uma medição própria
+    if medicao is None:
+        iniciar_medicao(nome)
+        try:
+            with trecho(nome):
+                yield
+        finally:
+            finalizar_medicao("fragmento")
+        return
+
+    consultas, linhas = medicao.consultas, medicao.linhas
+    registro = {"nome": nome, "nivel": medicao.profundidade}
+    medicao.trechos.append(registro)
+    medicao.profundidade += 1
+    inicio = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        medicao.profundidade -= 1
+        registro["ms"] = round((time.perf_counter() - inicio) * 1000, 1)
+        registro["consultas"] = medicao.consultas - consultas
+        registro["linhas"] = medicao.linhas - linhas
+
+
+def registrar_sql(consultas=0, linhas=0):
+    medicao = _atual()
+    if medicao is not None:
+        medicao.consultas += consultas
+        medicao.linhas += linhas
+
+
+# =====================
+# CURSORES CONTADOS
+# =====================
+
+class CursorPostgresMedido(CursorPostgres):
+    # Usado como cursor_factory das conexões do pool
+    def execute(self, query, vars=None):
+        registrar_sql(consultas=1)
+        return super().execute(query, vars)
+
+    def executemany(self, query, vars_list):
+        registrar_sql(consultas=1)
+        return super().executemany(query, vars_list)
+
+    def fetchone(self):
+        linha = super().fetchone()
+        registrar_sql(linhas=linha is not None)
+        return linha
+
+    def fetchmany(self, size=None):
+        linhas = super().fetchmany(size) if size is not None else super().fetchmany()
+        registrar_sql(linhas=len(linhas))
+        return linhas
+
+    def fetchall(self):
+        linhas = super().fetchall()
+        registrar_sql(linhas=len(linhas))
+        return linhas
+
+
+class CursorSQLiteMedido(sqlite3.Cursor):
+    def execute(self, sql, parametros=()):
+        registrar_sql(consultas=1)
+        return super().execute(sql, parametros)
+
+    def executemany(self, sql, parametros):
+        registrar_sql(consultas=1)
+        return super().executemany(sql, parametros)
+
+    def fetchone(self):
+        linha = super().fetchone()
+        registrar_sql(linhas=linha is not None)
+        return linha
+
+    def fetchmany(self, size=1):
+        linhas = super().fetchmany(size)
+        registrar_sql(linhas=len(linhas))
+        return linhas
+
+    def fetchall(self):
+        linhas = super().fetchall()
+        registrar_sql(linhas=len(linhas))
+        return linhas
+
+    def __next__(self):
+        linha = super().__next__()
+        registrar_sql(linhas=1)
+        return linha
+
+
+class ConexaoSQLiteMedida(sqlite3.Connection):
+    # Usada como factory do sqlite3.connect; conn.execute também passa por aqui
+    def cursor(self, factory=CursorSQLiteMedido):
+        return super().cursor(factory)
+
+
+# =====================
+# PAINEL DE DESEMPENHO
+# =====================
+
+def painel_desempenho(medicao, memoria=None):
+    # memoria: {"nome": bytes} de estruturas que cada sessão carrega
+    if medicao is None:
+        return
+
+    with st.sidebar.expander("⏱️ Desempenho deste rerun", expanded=True):
+        st.caption(
+            f"{medicao.total_ms:,.0f} ms · {medicao.consultas} consultas SQL · "
+            f"{medicao.linhas} linhas lidas"
+        )
+
+        for nome, tamanho in (memoria or {}).items():
+            st.caption(f"{nome}: {tamanho / 1024:,.0f} KiB em memória")
+
+        if medicao.trechos:
+            df = pd.DataFrame(medicao.trechos)
+            df["nome"] = ["  " * nivel + nome for nivel, nome in zip(df["nivel"], df["nome"])]
+            st.dataframe(
+                df[["nome", "ms", "consultas", "linhas"]],
+                hide_index=True,
+                use_container_width=True
+            )
@@ -0,0 +1,54 @@
+import math
+
+# =====================
+# LISTAGEM DE PRODUTOS (GRADE PAGINADA)
+# =====================
+# Só a página visível é montada. Cada card vira um único bloco de markdown
+# já formatado, em vez de um widget por campo.
+
+ORDENACOES = {
+    "Produto (A-Z)": ("produto", True),
+    "Estoque atual (menor primeiro)": ("estoque_atual", True),
+    "Mais vendidos": ("vendidos", False),
+    "Maior renda": ("renda_atual", False),
+    "Maior lucro": ("lucro_atual", False),
+}
+
+TAMANHOS_PAGINA = [12, 24, 48]
+
+COLUNAS_GRADE = 3
+
+FORMATO_CARD = (
+    "#### {produto}\n\n"
+    "📦 **Estoque Inicial:** {estoque_inicial:.0f}  \n"
+    "📦 **Estoque Atual:** {estoque_atual:.0f}  \n"
+    "🛒 **Vendidos:** {vendidos:.0f}  \n"
+    "💰 **Preço:** R$ {preco:,.2f}  \n"
+    "📈 **Lucro unidade:** R$ {lucro:,.2f}  \n"
+    "💵 **Renda Atual:** R$ {renda_atual:,.2f}  \n"
+    "🏆 **Lucro Atual:** R$ {lucro_atual:,.2f}"
+)
+
+def total_paginas(df, tamanho):
+    return max(math.ceil(len(df) / tamanho), 1)
+
+def pagina_produtos(df, ordem, tamanho, pagina):
+    coluna, crescente = ORDENACOES[ordem]
+    inicio = (pagina - 1) * tamanho
+
+    # nsmallest/nlargest evitam ordenar o catálogo inteiro para uma página
+    if coluna != "produto":
+        quantidade = inicio + tamanho
+        selecao = (
+            df.nsmallest(quantidade, coluna) if crescente
+            else df.nlargest(quantidade, coluna)
+        )
+        return selecao.iloc[inicio:]
+
+    return df.sort_values(coluna, ascending=crescente).iloc[inicio:inicio + tamanho]
+
+def formatar_cards(pagina):
+    return [
+        FORMATO_CARD.format(**registro)
+        for registro in pagina.to_dict("records")
+    ]
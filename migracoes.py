@@ -0,0 +1,113 @@
+import argparse
+import os
+import re
+from pathlib import Path
+
+# =====================
+# MIGRAÇÕES DO ESQUEMA (POSTGRES)
+# =====================
+# Cada arquivo sql/migracoes/NNN_nome.sql é uma migração, aplicada uma única
+# vez e em ordem. As versões aplicadas ficam em public.esquema_versao. Os
+# arquivos também são idempotentes (IF NOT EXISTS), então bancos criados
+# antes deste controle passam por elas sem erro.
+#
+# O app aplica as pendentes ao conectar (RepositorioPostgres). Para rodar à
+# mão:
+#   python migracoes.py --dsn postgresql://...          # aplica as pendentes
+#   python migracoes.py --dsn postgresql://... --status # só mostra
+
+PASTA_MIGRACOES = Path(__file__).parent / "sql" / "migracoes"
+
+PADRAO_ARQUIVO = re.compile(r"^(\d+)_(.+)\.sql$")
+
+# Chave do pg_advisory_xact_lock: duas instâncias subindo juntas não
+# aplicam a mesma migração ao mesmo tempo
+TRAVA_MIGRACOES = 7_404_001
+
+
+def listar_migracoes(pasta=PASTA_MIGRACOES):
+    migracoes = []
+    for arquivo in pasta.glob("*.sql"):
+        encontrado = PADRAO_ARQUIVO.match(arquivo.name)
+        if encontrado:
+            migracoes.append((int(encontrado.group(1)), encontrado.group(2), arquivo))
+    return sorted(migracoes)
+
+
+def _preparar(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS public.esquema_versao (
+            versao integer PRIMARY KEY,
+            nome text NOT NULL,
+            aplicada_em timestamptz NOT NULL DEFAULT now()
+        )
+    """)
+
+
+def versoes_aplicadas(transacao):
+    with transacao() as conn:
+        cursor = conn.cursor()
+        _preparar(cursor)
+        cursor.execute("SELECT versao FROM public.esquema_versao")
+        return {versao for (versao,) in cursor.fetchall()}
+
+
+def aplicar_migracoes(transacao, pasta=PASTA_MIGRACOES):
+    # transacao: fábrica de context manager com commit/rollback
+    # (ex.: PoolConexoes.transacao). Devolve as versões aplicadas agora.
+    aplicadas = versoes_aplicadas(transacao)
+    novas = []
+
+    for versao, nome, arquivo in listar_migracoes(pasta):
+        if versao in aplicadas:
+            continue
+
+        # Cada migração na própria transação, junto com o registro da versão
+        with transacao() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", (TRAVA_MIGRACOES,))
+
+            # Outra instância pode ter aplicado enquanto esperávamos a trava
+            cursor.execute("SELECT 1 FROM public.esquema_versao WHERE versao = %s", (versao,))
+            if cursor.fetchone() is not None:
+                continue
+
+            cursor.execute(arquivo.read_text(encoding="utf-8"))
+            cursor.execute(
+                "INSERT INTO public.esquema_versao (versao, nome) VALUES (%s, %s)",
+                (versao, nome)
+            )
+
+        novas.append(versao)
+
+    return novas
+
+
+def main():
+    from conexao import PoolConexoes
+
+    parser = argparse.ArgumentParser(description="Migrações do esquema do banco")
+    parser.add_argument("--dsn", default=os.environ.get("MODARTE_DSN"))
+    parser.add_argument("--status", action="store_true", help="só lista as migrações")
+    args = parser.parse_args()
+
+    if not args.dsn:
+        parser.error("informe --dsn ou a variável MODARTE_DSN")
+
+    pool = PoolConexoes(minimo=1, maximo=1, dsn=args.dsn)
+
+    try:
+        if not args.status:
+            for versao in aplicar_migracoes(pool.transacao):
+                print(f"✅ Migração {versao:03d} aplicada")
+
+        aplicadas = versoes_aplicadas(pool.transacao)
+        for versao, nome, _ in listar_migracoes():
+            marca = "✔" if versao in aplicadas else "…"
+            print(f"{marca} {versao:03d} {nome}")
+    finally:
+        pool.fechar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+from PIL import Image, ImageOps, features
+
+# =====================
+# MINIATURAS DAS FOTOS
+# =====================
+# Fotos de celular têm vários MB; a listagem mostra uma miniatura gerada no
+# primeiro acesso e guardada em disco. A chave inclui caminho, mtime e
+# tamanho da foto original, então trocar a foto gera uma miniatura nova.
+# Quando a pasta passa do limite, as menos usadas são apagadas.
+
+BASE_DIR = Path(__file__).parent
+
+PASTA_MINIATURAS = BASE_DIR / ".miniaturas"
+FOTO_PADRAO = BASE_DIR / "Logo_Modarte.jpg"
+
+TAMANHO_MINIATURA = (400, 400)
+LIMITE_CACHE_BYTES = 200 * 1024 * 1024
+
+if features.check("webp"):
+    FORMATO, EXTENSAO, OPCOES = "WEBP", ".webp", {"quality": 80, "method": 4}
+else:
+    FORMATO, EXTENSAO, OPCOES = "JPEG", ".jpg", {"quality": 82, "optimize": True}
+
+
+def _chave(origem, info):
+    texto = f"{origem.resolve()}|{info.st_mtime_ns}|{info.st_size}|{TAMANHO_MINIATURA}"
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()
+
+
+def _gerar(origem, destino):
+    with Image.open(origem) as imagem:
+        # Fotos de celular vêm deitadas com a rotação só no EXIF
+        imagem = ImageOps.exif_transpose(imagem)
+        imagem.thumbnail(TAMANHO_MINIATURA)
+
+        if imagem.mode not in ("RGB", "RGBA") or FORMATO == "JPEG":
+            imagem = imagem.convert("RGB")
+
+        # Grava em arquivo temporário e renomeia: duas sessões gerando a
+        # mesma miniatura nunca veem um arquivo pela metade
+        fd, temporario = tempfile.mkstemp(dir=PASTA_MINIATURAS, prefix=".tmp-", suffix=EXTENSAO)
+        try:
+            with os.fdopen(fd, "wb") as arquivo:
+                imagem.save(arquivo, FORMATO, **OPCOES)
+            os.replace(temporario, destino)
+        except BaseException:
+            os.unlink(temporario)
+            raise
+
+
+def podar_cache(limite=LIMITE_CACHE_BYTES):
+    # Apaga as miniaturas usadas há mais tempo até ficar abaixo do limite
+    arquivos = []
+    for entrada in os.scandir(PASTA_MINIATURAS):
+        # Temporários (.tmp-*) ainda estão sendo gravados por outra sessão
+        if entrada.name.startswith(".") or not entrada.name.endswith(EXTENSAO):
+            continue
+        try:
+            info = entrada.stat()
+        except FileNotFoundError:
+            # Outra sessão já apagou
+            continue
+        arquivos.append((info.st_mtime, info.st_size, entrada.path))
+
+    total = sum(tamanho for _, tamanho, _ in arquivos)
+
+    for _, tamanho, caminho in sorted(arquivos):
+        if total <= limite:
+            break
+        try:
+            os.unlink(caminho)
+        except FileNotFoundError:
+            pass
+        total -= tamanho
+
+
+def miniatura(origem):
+    origem = Path(origem)
+    info = origem.stat()
+
+    PASTA_MINIATURAS.mkdir(exist_ok=True)
+    destino = PASTA_MINIATURAS / (_chave(origem, info) + EXTENSAO)
+
+    if destino.exists():
+        # mtime marca o último uso, para a poda por menos usadas
+        os.utime(destino)
+        return destino
+
+    _gerar(origem, destino)
+    podar_cache()
+    return destino
+
+
+def miniatura_produto(foto):
+    # Caminho da miniatura da foto do produto, ou do logo quando a foto
+    # não existe ou não é uma imagem válida
+    if foto:
+        try:
+            return miniatura(BASE_DIR / str(foto))
+        except (OSError, Image.UnidentifiedImageError):
+            pass
+
+    return miniatura(FOTO_PADRAO)
@@ -0,0 +1,154 @@
+import argparse
+import os
+from pathlib import Path
+
+# =====================
+# PARTIÇÕES DE VENDAS (POSTGRES)
+# =====================
+# vendas_modarte é particionada por mês (sql/migracoes/008_vendas_particionadas.sql).
+# manter_particoes() deixa criados os meses seguintes e arquiva os meses
+# antigos:
+# - MESES_A_FRENTE partições além do mês atual, para as vendas nunca caírem
+#   na partição padrão;
+# - meses que terminaram há mais de MESES_QUENTES são desanexados para o
+#   schema arquivo. Saem das telas e da sincronização das vendas locais,
+#   mas continuam no resumo diário (gráficos, reposição).
+#
+# O app roda ao conectar (RepositorioPostgres) e a cada hora junto com a
+# limpeza das chaves (fila_escritas.py). Para rodar à mão:
+#   python particoes_vendas.py --dsn postgresql://...                  # cria e arquiva
+#   python particoes_vendas.py --dsn postgresql://... --status         # só mostra
+#   python particoes_vendas.py --dsn postgresql://... --exportar PASTA # arquivo → Parquet
+#
+# --exportar grava cada tabela do schema arquivo num Parquet compactado
+# (zstd) e, conferida a contagem de linhas, apaga a tabela do banco.
+
+MESES_A_FRENTE = 3
+MESES_QUENTES = 24
+
+SQL_PARTICOES = """
+    SELECT
+        n.nspname,
+        c.relname,
+        COALESCE(pg_get_expr(c.relpartbound, c.oid), '') AS limites,
+        c.reltuples::bigint AS linhas,
+        pg_total_relation_size(c.oid) AS tamanho
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE c.relkind = 'r'
+      AND (
+          c.oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = 'public.vendas_modarte'::regclass)
+          OR n.nspname = 'arquivo' AND c.relname LIKE 'vendas_modarte_p%%'
+      )
+    ORDER BY n.nspname DESC, c.relname
+"""
+
+
+def manter_particoes(transacao, meses_a_frente=MESES_A_FRENTE, meses_quentes=MESES_QUENTES):
+    # transacao: fábrica de context manager com commit/rollback
+    # (ex.: PoolConexoes.transacao). Devolve (criadas, arquivadas).
+    with transacao() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute(
+            "SELECT public.criar_particoes_vendas(current_date, (current_date + %s * interval '1 month')::date)",
+            (meses_a_frente,)
+        )
+        criadas = [nome for (nome,) in cursor.fetchall()]
+
+        cursor.execute(
+            "SELECT public.arquivar_vendas((date_trunc('month', current_date) - %s * interval '1 month')::date)",
+            (meses_quentes,)
+        )
+        arquivadas = [nome for (nome,) in cursor.fetchall()]
+
+    return criadas, arquivadas
+
+
+def listar_particoes(transacao):
+    # [(schema, tabela, limites, linhas estimadas, bytes)]
+    with transacao() as conn:
+        cursor = conn.cursor()
+        cursor.execute(SQL_PARTICOES)
+        return cursor.fetchall()
+
+
+def exportar_arquivo(transacao, pasta):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    pasta = Path(pasta)
+    pasta.mkdir(parents=True, exist_ok=True)
+    exportadas = []
+
+    for schema, tabela, _, _, _ in listar_particoes(transacao):
+        if schema != "arquivo":
+            continue
+
+        destino = pasta / f"{tabela}.parquet"
+
+        # Lê, grava e apaga na mesma transação: se a conferência falhar, a
+        # tabela continua no banco
+        with transacao() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT id, produto_id, quantidade, data_venda, preco_unit::float8, lucro_unit::float8, atualizada_em
+                FROM arquivo.{tabela}
+                ORDER BY id
+            """)
+            colunas = [coluna.name for coluna in cursor.description]
+            linhas = cursor.fetchall()
+
+            pq.write_table(
+                pa.Table.from_pylist([dict(zip(colunas, linha)) for linha in linhas]),
+                destino,
+                compression="zstd"
+            )
+
+            if pq.read_metadata(destino).num_rows != len(linhas):
+                raise RuntimeError(f"{destino}: número de linhas não confere")
+
+            cursor.execute(f"DROP TABLE arquivo.{tabela}")
+
+        exportadas.append((tabela, len(linhas), destino))
+
+    return exportadas
+
+
+def main():
+    from conexao import PoolConexoes
+
+    parser = argparse.ArgumentParser(description="Partições mensais das vendas")
+    parser.add_argument("--dsn", default=os.environ.get("MODARTE_DSN"))
+    parser.add_argument("--status", action="store_true", help="só lista as partições")
+    parser.add_argument("--meses-a-frente", type=int, default=MESES_A_FRENTE)
+    parser.add_argument("--meses-quentes", type=int, default=MESES_QUENTES)
+    parser.add_argument("--exportar", metavar="PASTA", help="exporta o schema arquivo para Parquet e apaga do banco")
+    args = parser.parse_args()
+
+    if not args.dsn:
+        parser.error("informe --dsn ou a variável MODARTE_DSN")
+
+    pool = PoolConexoes(minimo=1, maximo=1, dsn=args.dsn)
+
+    try:
+        if not args.status:
+            criadas, arquivadas = manter_particoes(pool.transacao, args.meses_a_frente, args.meses_quentes)
+            for nome in criadas:
+                print(f"✅ Partição {nome} criada")
+            for nome in arquivadas:
+                print(f"📦 Partição {nome} arquivada")
+
+        if args.exportar:
+            for tabela, linhas, destino in exportar_arquivo(pool.transacao, args.exportar):
+                print(f"💾 {tabela}: {linhas} vendas em {destino}")
+
+        for schema, tabela, limites, linhas, tamanho in listar_particoes(pool.transacao):
+            marca = "📦" if schema == "arquivo" else "✔"
+            print(f"{marca} {schema}.{tabela} {limites} ~{max(linhas, 0)} vendas, {tamanho / 1024:,.0f} KB")
+    finally:
+        pool.fechar()
+
+
+if __name__ == "__main__":
+    main()
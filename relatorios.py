@@ -0,0 +1,122 @@
+import io
+import tempfile
+from datetime import datetime
+
+import streamlit as st
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import cm
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from dados import carregar_produtos, lotes_vendas, versao_dados
+from exportacao import FORMATOS, exportar_vendas
+
+# =====================
+# RELATÓRIO EM PDF
+# =====================
+# O PDF é montado direto em memória (sem arquivo temporário) e guardado em
+# cache pela versão dos dados e pelo minuto impresso no cabeçalho: exportar
+# de novo sem nenhuma escrita no meio devolve os mesmos bytes na hora, e a
+# data do PDF nunca fica velha.
+
+# Tabelas grandes são quebradas em blocos: o reportlab divide cada bloco
+# entre páginas de forma barata, em vez de recalcular uma tabela gigante.
+LINHAS_POR_BLOCO = 500
+
+TAMANHO_NOME = 45
+
+CABECALHO = ["Produto", "Estoque", "Vendidos", "Renda (R$)", "Lucro (R$)"]
+
+ESTILO_TABELA = TableStyle([
+    ("FONT", (0, 0), (-1, 0), "Helvetica-Bold", 9),
+    ("FONT", (0, 1), (-1, -1), "Helvetica", 8),
+    ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#333333")),
+    ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+    ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#F2F2F2")]),
+    ("ALIGN", (1, 0), (-1, -1), "RIGHT"),
+    ("LINEBELOW", (0, 0), (-1, 0), 0.5, colors.black),
+    ("TOPPADDING", (0, 0), (-1, -1), 2),
+    ("BOTTOMPADDING", (0, 0), (-1, -1), 2),
+])
+
+
+def _linhas_tabela(df):
+    nomes = df["produto"].fillna("").astype(str)
+    nomes = nomes.where(nomes.str.len() <= TAMANHO_NOME, nomes.str.slice(0, TAMANHO_NOME - 3) + "...")
+
+    return list(zip(
+        nomes,
+        df["estoque_atual"].map("{:,.0f}".format),
+        df["vendidos"].map("{:,.0f}".format),
+        df["renda_atual"].map("{:,.2f}".format),
+        df["lucro_atual"].map("{:,.2f}".format),
+    ))
+
+
+def gerar_pdf(df, titulo="Relatório de Vendas - MODARTE", gerado_em=None):
+    gerado_em = gerado_em or datetime.now().strftime("%d/%m/%Y %H:%M")
+    buffer = io.BytesIO()
+    estilos = getSampleStyleSheet()
+
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=A4,
+        leftMargin=2 * cm,
+        rightMargin=2 * cm,
+        topMargin=2 * cm,
+        bottomMargin=2 * cm,
+        title=titulo
+    )
+
+    conteudo = [
+        Paragraph(titulo, estilos["Title"]),
+        Paragraph(f"Data: {gerado_em}", estilos["Normal"]),
+        Spacer(1, 0.4 * cm),
+        Paragraph(f"<b>Renda Total:</b> R$ {df['renda_atual'].sum():,.2f}", estilos["Normal"]),
+        Paragraph(f"<b>Lucro Total:</b> R$ {df['lucro_atual'].sum():,.2f}", estilos["Normal"]),
+        Paragraph(f"<b>Produtos Vendidos:</b> {df['vendidos'].sum():,.0f}", estilos["Normal"]),
+        Spacer(1, 0.6 * cm),
+    ]
+
+    linhas = _linhas_tabela(df)
+    larguras = [8 * cm, 2 * cm, 2 * cm, 2.5 * cm, 2.5 * cm]
+
+    for inicio in range(0, max(len(linhas), 1), LINHAS_POR_BLOCO):
+        bloco = [CABECALHO] + linhas[inicio:inicio + LINHAS_POR_BLOCO]
+        tabela = Table(bloco, colWidths=larguras, repeatRows=1)
+        tabela.setStyle(ESTILO_TABELA)
+        conteudo.append(tabela)
+
+    doc.build(conteudo)
+    return buffer.getvalue()
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _relatorio_produtos(versao, produto, gerado_em):
+    df = carregar_produtos()
+
+    if produto is not None:
+        df = df[df["produto"] == produto]
+
+    return gerar_pdf(df.sort_values("produto"), gerado_em=gerado_em)
+
+
+def relatorio_produtos(produto=None):
+    return _relatorio_produtos(versao_dados(), produto, datetime.now().strftime("%d/%m/%Y %H:%M"))
+
+
+# =====================
+# LIVRO DE VENDAS (CSV / EXCEL)
+# =====================
+# Gerado só no clique do download (st.download_button com função). As
+# linhas vão lote a lote do banco para um temporário em disco; só o arquivo
+# pronto volta para a memória, para ser enviado.
+
+def relatorio_vendas(inicio, fim, produto_id=None, formato="CSV"):
+    extensao, _ = FORMATOS[formato]
+
+    with tempfile.TemporaryFile() as arquivo:
+        exportar_vendas(lotes_vendas(inicio, fim, produto_id), extensao, arquivo)
+        arquivo.seek(0)
+        return arquivo.read()
@@ -0,0 +1,137 @@
+import threading
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from dados import carregar_produtos, get_repositorio, versao_dados, versao_remocoes
+
+# =====================
+# PREVISÃO DE REPOSIÇÃO
+# =====================
+# Para todos os produtos de uma vez: velocidade de venda (un/dia), dias de
+# estoque restantes e ponto de reposição. As vendas da janela ficam numa
+# matriz produto × dia em memória; cada escrita só busca as vendas com id
+# acima da última lida e soma na matriz. Recarga completa quando o dia
+# vira, quando há exclusões ou a cada RECARGA_COMPLETA_S (escritas feitas
+# fora deste servidor).
+
+JANELA_DIAS = 28
+JANELA_CURTA_DIAS = 7
+
+# Dias entre pedir a peça e ela chegar na loja
+PRAZO_REPOSICAO_DIAS = 7
+
+# Estoque de segurança para ~95% dos dias (distribuição normal)
+NIVEL_SERVICO_Z = 1.65
+
+# Piso do ponto de reposição: a regra antiga continua valendo para produtos
+# sem vendas recentes
+ESTOQUE_MINIMO = 5
+
+RECARGA_COMPLETA_S = 600
+
+
+class VendasJanela:
+    def __init__(self, dias=JANELA_DIAS):
+        self.dias = dias
+        self.lock = threading.Lock()
+        self.inicio = None
+        self.ultimo_id = 0
+        self.remocoes = None
+        self.carregado_em = 0.0
+        self.ids = np.empty(0, dtype=np.int64)
+        self.matriz = np.zeros((0, dias), dtype=np.int64)
+
+    def _somar(self, df):
+        colunas = (pd.to_datetime(df["dia"]) - pd.Timestamp(self.inicio)).dt.days.to_numpy()
+
+        # Vendas com data futura entram na recarga do dia em que chegarem
+        na_janela = (colunas >= 0) & (colunas < self.dias)
+        df, colunas = df[na_janela], colunas[na_janela]
+
+        # Produtos que ainda não estavam na matriz ganham linhas zeradas
+        novos = np.setdiff1d(df["produto_id"].to_numpy(), self.ids)
+        if len(novos):
+            ids = np.union1d(self.ids, novos)
+            matriz = np.zeros((len(ids), self.dias), dtype=np.int64)
+            matriz[np.searchsorted(ids, self.ids)] = self.matriz
+            self.ids, self.matriz = ids, matriz
+
+        linhas = np.searchsorted(self.ids, df["produto_id"].to_numpy())
+        np.add.at(self.matriz, (linhas, colunas), df["quantidade"].to_numpy(dtype=np.int64))
+
+    def _recarregar(self, repo, hoje, remocoes):
+        self.inicio = hoje - timedelta(days=self.dias - 1)
+        df, self.ultimo_id = repo.vendas_diarias(self.inicio)
+
+        self.ids = np.empty(0, dtype=np.int64)
+        self.matriz = np.zeros((0, self.dias), dtype=np.int64)
+        self._somar(df)
+
+        self.remocoes = remocoes
+        self.carregado_em = time.monotonic()
+
+    def atualizar(self, repo, hoje, remocoes):
+        with self.lock:
+            if (
+                self.inicio != hoje - timedelta(days=self.dias - 1)
+                or self.remocoes != remocoes
+                or time.monotonic() - self.carregado_em > RECARGA_COMPLETA_S
+            ):
+                self._recarregar(repo, hoje, remocoes)
+            else:
+                novas = repo.vendas_novas(self.ultimo_id, self.inicio)
+
+                if not novas.empty:
+                    self._somar(novas)
+                    self.ultimo_id = int(novas["id"].max())
+
+            return self.ids.copy(), self.matriz.copy()
+
+
+def calcular_reposicao(
+    produtos,
+    ids,
+    matriz,
+    prazo=PRAZO_REPOSICAO_DIAS,
+    z=NIVEL_SERVICO_Z,
+    minimo=ESTOQUE_MINIMO
+):
+    # produtos: catálogo indexado por id (produto, estoque_atual); ids/matriz:
+    # vendas diárias da janela, uma linha por produto com vendas
+    vendas = pd.DataFrame(matriz, index=ids).reindex(produtos.index, fill_value=0).to_numpy(dtype=float)
+
+    # A maior entre a janela longa e a última semana: item que acelerou não
+    # espera quatro semanas para disparar o alerta
+    velocidade = np.maximum(vendas.mean(axis=1), vendas[:, -JANELA_CURTA_DIAS:].mean(axis=1))
+    seguranca = z * vendas.std(axis=1) * np.sqrt(prazo)
+    ponto = np.maximum(np.ceil(velocidade * prazo + seguranca), minimo)
+
+    estoque = produtos["estoque_atual"].to_numpy(dtype=float)
+
+    dias_restantes = np.divide(estoque, velocidade, out=np.full_like(estoque, np.inf), where=velocidade > 0)
+
+    return pd.DataFrame({
+        "produto": produtos["produto"],
+        "estoque_atual": produtos["estoque_atual"],
+        "velocidade_dia": velocidade.round(2),
+        "dias_estoque": dias_restantes.round(1),
+        "ponto_reposicao": ponto.astype(int),
+        "repor": estoque <= ponto
+    }, index=produtos.index)
+
+
+@st.cache_resource
+def _vendas_janela():
+    return VendasJanela()
+
+@st.cache_data(ttl=RECARGA_COMPLETA_S, max_entries=4, show_spinner=False)
+def _reposicao(versao):
+    ids, matriz = _vendas_janela().atualizar(get_repositorio(), date.today(), versao_remocoes())
+    return calcular_reposicao(carregar_produtos(), ids, matriz)
+
+def reposicao_produtos():
+    return _reposicao(versao_dados())
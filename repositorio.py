@@ -0,0 +1,1081 @@
+import importlib.util
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+from psycopg2 import errors as erros_pg
+from psycopg2.extras import execute_values
+
+from migracoes import aplicar_migracoes
+from particoes_vendas import manter_particoes
+
+# =====================
+# REPOSITÓRIOS
+# =====================
+# Todo acesso a dados do app (produtos, vendas e lista de emails
+# autorizados) passa por um repositório. Há duas implementações com a mesma
+# interface: Postgres (Supabase) e SQLite (modarte.db, para rodar offline,
+# nos testes e nos benchmarks). A escolha é feita em dados.get_repositorio().
+
+COLUNAS_PRODUTO = ["produto", "foto", "estoque_inicial", "estoque_atual", "preco", "lucro", "codigo"]
+
+# =====================
+# TIPOS DAS LEITURAS
+# =====================
+# Colunas e tipos declarados uma vez. Nulos (e lixo no SQLite) viram 0 ou ""
+# no próprio SELECT, então o read_sql já entrega os tipos compactos: estoque
+# em int32, nome do produto como category (ordenar e comparar usam os
+# códigos inteiros) e texto em Arrow quando o pyarrow está instalado.
+
+TIPO_TEXTO = "string[pyarrow]" if importlib.util.find_spec("pyarrow") else "string"
+
+CAMPOS_PRODUTO = """
+    id,
+    COALESCE(produto, '') AS produto,
+    COALESCE(codigo, '') AS codigo,
+    COALESCE(foto, '') AS foto,
+    CAST(COALESCE(estoque_inicial, 0) AS integer) AS estoque_inicial,
+    CAST(COALESCE(estoque_atual, 0) AS integer) AS estoque_atual,
+    CAST(COALESCE(preco, 0) AS double precision) AS preco,
+    CAST(COALESCE(lucro, 0) AS double precision) AS lucro
+"""
+
+TIPOS_PRODUTO = {
+    "id": "int32",
+    "produto": "category",
+    "codigo": TIPO_TEXTO,
+    "foto": TIPO_TEXTO,
+    "estoque_inicial": "int32",
+    "estoque_atual": "int32",
+    "preco": "float64",
+    "lucro": "float64"
+}
+
+# Página do histórico de vendas (mesmas colunas nos dois backends)
+TIPOS_VENDA = {
+    "id": "int64",
+    "produto_id": "int32",
+    "quantidade": "int32",
+    "preco_unit": "float64",
+    "lucro_unit": "float64"
+}
+
+# Rótulo do gráfico → unidade do date_trunc no Postgres
+GRANULARIDADES = {
+    "Dia": "day",
+    "Semana": "week",
+    "Mês": "month"
+}
+
+
+class EstoqueInsuficiente(Exception):
+    pass
+
+
+class CodigoDuplicado(Exception):
+    pass
+
+
+def padrao_busca(termo, trecho):
+    # Termo digitado → padrão LIKE (minúsculo, curingas do usuário escapados)
+    termo = termo.strip().lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{termo}%" if trecho else f"{termo}%"
+
+
+# =====================
+# POSTGRES
+# =====================
+
+# Baixa de estoque condicional + inserção da venda em um único comando (um
+# round trip). O UPDATE trava a linha do produto e reavalia a condição, então
+# dois caixas nunca vendem a mesma última unidade.
+SQL_REGISTRAR_VENDA = """
+    WITH baixa AS (
+        UPDATE public.produtos
+        SET estoque_atual = estoque_atual - %(quantidade)s
+        WHERE id = %(produto_id)s
+          AND estoque_atual >= %(quantidade)s
+        RETURNING id, estoque_atual
+    ), venda AS (
+        INSERT INTO public.vendas_modarte
+        (produto_id, quantidade, data_venda, preco_unit, lucro_unit)
+        SELECT id, %(quantidade)s, %(data_venda)s, %(preco)s, %(lucro)s
+        FROM baixa
+        RETURNING id
+    )
+    SELECT venda.id, baixa.estoque_atual
+    FROM baixa, venda
+"""
+
+# Carrinho inteiro em um comando: os itens entram como um único VALUES, a
+# baixa de estoque é um UPDATE por conjunto (somando itens repetidos do mesmo
+# produto) e as vendas são inseridas em lote. Se algum produto não tiver
+# estoque, a transação inteira é desfeita.
+SQL_REGISTRAR_CARRINHO = """
+    WITH itens (produto_id, quantidade, preco_unit, lucro_unit, data_venda) AS (
+        VALUES %s
+    ), total AS (
+        SELECT produto_id, SUM(quantidade) AS quantidade
+        FROM itens
+        GROUP BY produto_id
+    ), baixa AS (
+        UPDATE public.produtos p
+        SET estoque_atual = p.estoque_atual - t.quantidade
+        FROM total t
+        WHERE p.id = t.produto_id
+          AND p.estoque_atual >= t.quantidade
+        RETURNING p.id
+    ), venda AS (
+        INSERT INTO public.vendas_modarte
+        (produto_id, quantidade, data_venda, preco_unit, lucro_unit)
+        SELECT i.produto_id, i.quantidade, i.data_venda, i.preco_unit, i.lucro_unit
+        FROM itens i
+        JOIN baixa b ON b.id = i.produto_id
+        RETURNING id
+    )
+    SELECT
+        (SELECT COUNT(*) FROM total),
+        (SELECT COUNT(*) FROM baixa),
+        (SELECT COUNT(*) FROM venda)
+"""
+
+# Atualiza os produtos cujo código já existe e insere os demais, em lote.
+# Foto nula (a planilha não traz) mantém a atual ou entra vazia.
+SQL_UPSERT_PRODUTOS = """
+    WITH dados (produto, foto, estoque_inicial, estoque_atual, preco, lucro, codigo) AS (
+        VALUES %s
+    ), atualizados AS (
+        UPDATE public.produtos p
+        SET produto = d.produto,
+            foto = COALESCE(d.foto, p.foto),
+            estoque_inicial = d.estoque_inicial,
+            estoque_atual = d.estoque_atual,
+            preco = d.preco,
+            lucro = d.lucro
+        FROM dados d
+        WHERE p.codigo = d.codigo
+        RETURNING p.codigo
+    ), inseridos AS (
+        INSERT INTO public.produtos
+        (produto, foto, estoque_inicial, estoque_atual, preco, lucro, codigo)
+        SELECT d.produto, COALESCE(d.foto, ''), d.estoque_inicial, d.estoque_atual, d.preco, d.lucro, d.codigo
+        FROM dados d
+        WHERE d.codigo NOT IN (SELECT codigo FROM atualizados)
+        RETURNING id
+    )
+    SELECT
+        (SELECT COUNT(DISTINCT codigo) FROM atualizados),
+        (SELECT COUNT(*) FROM inseridos)
+"""
+
+
+# Consultas de leitura do painel. Ficam aqui (e não dentro dos métodos) para
+# o benchmarks/planos_consultas.py conferir com EXPLAIN que usam os índices
+# de sql/migracoes/. vendas_modarte é particionada por mês: as consultas
+# com limite em data_venda só leem as partições do período.
+SQL_BUSCAR_PRODUTOS = """
+    SELECT id, produto, COALESCE(codigo, '') AS codigo
+    FROM public.produtos
+    WHERE lower(produto) LIKE %(padrao)s
+       OR lower(codigo) LIKE %(padrao)s
+    ORDER BY produto
+    LIMIT %(limite)s
+"""
+
+SQL_LISTAR_PRODUTOS = f"SELECT {CAMPOS_PRODUTO} FROM public.produtos"
+
+SQL_PRODUTO_POR_ID = f"SELECT {CAMPOS_PRODUTO} FROM public.produtos WHERE id = %(produto_id)s"
+
+SQL_PAGINA_VENDAS = """
+    SELECT
+        v.id,
+        v.produto_id,
+        p.produto,
+        v.data_venda,
+        COALESCE(v.quantidade, 0) AS quantidade,
+        v.preco_unit,
+        v.lucro_unit
+    FROM public.vendas_modarte v
+    JOIN public.produtos p ON p.id = v.produto_id
+    WHERE v.produto_id = %(produto_id)s
+      AND v.data_venda >= %(desde)s
+      AND v.data_venda < %(ate)s
+      {filtro_apos}
+    ORDER BY v.data_venda DESC, v.id DESC
+    LIMIT %(limite)s
+"""
+
+FILTRO_APOS = "AND (v.data_venda, v.id) < (%(apos_data)s, %(apos_id)s)"
+
+# Lê o resumo diário mantido por trigger (sql/migracoes/002_resumo_vendas.sql)
+SQL_SERIE_VENDAS = """
+    SELECT
+        date_trunc(%(unidade)s, r.dia)::date AS periodo,
+        SUM(r.quantidade) AS quantidade
+    FROM public.vendas_resumo_diario r
+    WHERE r.produto_id = %(produto_id)s
+      AND r.dia BETWEEN %(inicio)s AND %(fim)s
+    GROUP BY 1
+    ORDER BY 1
+"""
+
+# Vendas por produto × dia desde uma data, junto com o maior id de venda no
+# mesmo instante (um comando só, um snapshot só): é a marca a partir da qual
+# SQL_VENDAS_NOVAS busca o que chegou depois
+SQL_VENDAS_DIARIAS = """
+    SELECT r.produto_id, r.dia, r.quantidade, m.ultimo_id
+    FROM (SELECT COALESCE(MAX(id), 0) AS ultimo_id FROM public.vendas_modarte) m
+    LEFT JOIN public.vendas_resumo_diario r ON r.dia >= %(desde)s
+"""
+
+SQL_VENDAS_NOVAS = """
+    SELECT id, produto_id, data_venda::date AS dia, quantidade
+    FROM public.vendas_modarte
+    WHERE id > %(apos_id)s
+      AND data_venda >= %(desde)s
+    ORDER BY id
+"""
+
+# Livro de vendas para exportação (exportacao.py), em ordem cronológica.
+# Lido por um cursor nomeado: o resultado fica no servidor e chega em lotes
+# de LOTE_EXPORTACAO linhas, então um ano de vendas nunca está inteiro na
+# memória do app.
+SQL_EXPORTAR_VENDAS = """
+    SELECT
+        v.data_venda,
+        v.id,
+        p.codigo,
+        p.produto,
+        COALESCE(v.quantidade, 0) AS quantidade,
+        v.preco_unit,
+        v.lucro_unit,
+        COALESCE(v.quantidade, 0) * v.preco_unit AS total,
+        COALESCE(v.quantidade, 0) * v.lucro_unit AS lucro_total
+    FROM {vendas} v
+    JOIN public.produtos p ON p.id = v.produto_id
+    WHERE v.data_venda >= %(desde)s
+      AND v.data_venda < %(ate)s
+      {filtro_produto}
+    ORDER BY v.data_venda, v.id
+"""
+
+FILTRO_PRODUTO = "AND v.produto_id = %(produto_id)s"
+
+LOTE_EXPORTACAO = 2000
+
+# Meses arquivados (particoes_vendas.py) que caem no período: entram na
+# exportação com UNION ALL. Os que já foram para Parquet (--exportar) não
+# estão mais no banco.
+SQL_VENDAS_ARQUIVADAS = """
+    SELECT c.relname
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname = 'arquivo'
+      AND c.relkind = 'r'
+      AND c.relname ~ '^vendas_modarte_p[0-9]{4}_[0-9]{2}$'
+      AND to_date(right(c.relname, 7), 'YYYY_MM') < %(ate)s
+      AND to_date(right(c.relname, 7), 'YYYY_MM') + interval '1 month' > %(desde)s
+    ORDER BY c.relname
+"""
+
+COLUNAS_VENDAS_ARQUIVO = "id, produto_id, quantidade, data_venda, preco_unit, lucro_unit"
+
+
+def _vendas_com_arquivo(tabelas):
+    if not tabelas:
+        return "public.vendas_modarte"
+
+    consultas = [f"SELECT {COLUNAS_VENDAS_ARQUIVO} FROM public.vendas_modarte"]
+    consultas += [f"SELECT {COLUNAS_VENDAS_ARQUIVO} FROM arquivo.{tabela}" for tabela in tabelas]
+    return "(" + " UNION ALL ".join(consultas) + ")"
+
+
+# Sincronização do snapshot local (vendas_locais.py). As marcas d'água vêm
+# do próprio banco: maior id visto e maiores atualizada_em / excluida_em
+# (sql/migracoes/006_sincronizacao_vendas.sql).
+SQL_VENDAS_ALTERADAS = """
+    SELECT
+        id,
+        produto_id,
+        data_venda,
+        COALESCE(quantidade, 0) AS quantidade,
+        preco_unit,
+        lucro_unit,
+        atualizada_em
+    FROM public.vendas_modarte
+    WHERE (id > %(apos_id)s OR atualizada_em > %(modificada_apos)s)
+      AND data_venda IS NOT NULL
+    ORDER BY id
+"""
+
+SQL_VENDAS_EXCLUIDAS = """
+    SELECT venda_id, excluida_em
+    FROM public.vendas_excluidas
+    WHERE %(apos)s::timestamptz IS NULL OR excluida_em > %(apos)s
+"""
+
+
+def separar_marca(df):
+    # (vendas diárias, ultimo_id) a partir do resultado de SQL_VENDAS_DIARIAS
+    ultimo_id = int(df["ultimo_id"].iloc[0])
+    df = df.dropna(subset=["produto_id"]).drop(columns="ultimo_id")
+    return df.astype({"produto_id": "int64", "quantidade": "int64"}), ultimo_id
+
+
+def executar_venda(cursor, produto_id, quantidade, preco, lucro, data_venda):
+    cursor.execute(SQL_REGISTRAR_VENDA, {
+        "produto_id": produto_id,
+        "quantidade": quantidade,
+        "data_venda": data_venda,
+        "preco": preco,
+        "lucro": lucro
+    })
+
+    resultado = cursor.fetchone()
+    if resultado is None:
+        raise EstoqueInsuficiente("Estoque insuficiente para esta venda.")
+
+    # (id da venda, estoque restante)
+    return resultado
+
+
+def executar_carrinho(cursor, itens, data_venda):
+    linhas = [
+        (item["produto_id"], item["quantidade"], item["preco"], item["lucro"], data_venda)
+        for item in itens
+    ]
+
+    produtos, baixados, vendas = execute_values(
+        cursor,
+        SQL_REGISTRAR_CARRINHO,
+        linhas,
+        template="(%s::integer, %s::integer, %s::numeric, %s::numeric, %s::timestamp)",
+        page_size=len(linhas),
+        fetch=True
+    )[0]
+
+    if baixados < produtos:
+        raise EstoqueInsuficiente("Estoque insuficiente para um ou mais itens do carrinho.")
+
+    return vendas
+
+
+# Chave de idempotência de uma escrita (fila_escritas.py), gravada na mesma
+# transação. Devolve False se a chave já existe: a escrita já foi aplicada
+# e não deve se repetir (clique duplo, nova tentativa após queda de conexão).
+def registrar_chave(cursor, chave):
+    if chave is None:
+        return True
+
+    cursor.execute(
+        "INSERT INTO public.escritas_aplicadas (chave) VALUES (%s) ON CONFLICT (chave) DO NOTHING",
+        (chave,)
+    )
+    return cursor.rowcount == 1
+
+
+class RepositorioPostgres:
+    def __init__(self, pool):
+        self.pool = pool
+
+        # Migrações pendentes (sql/migracoes/), uma vez por processo
+        aplicar_migracoes(self.pool.transacao)
+        manter_particoes(self.pool.transacao)
+
+        with self.pool.transacao() as conn:
+            cursor = conn.cursor()
+
+            # Com trigramas a busca acha qualquer trecho; sem, só o início
+            cursor.execute("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')")
+            self.busca_por_trecho = cursor.fetchone()[0]
+
+    def transacao(self):
+        return self.pool.transacao()
+
+    # ----- produtos -----
+
+    def listar_produtos(self):
+        with self.transacao() as conn:
+            return pd.read_sql(SQL_LISTAR_PRODUTOS, conn, dtype=TIPOS_PRODUTO)
+
+    def buscar_produtos(self, termo, limite):
+        padrao = padrao_busca(termo, self.busca_por_trecho)
+
+        with self.transacao() as conn:
+            return pd.read_sql(SQL_BUSCAR_PRODUTOS, conn, params={"padrao": padrao, "limite": limite})
+
+    def produto_por_id(self, produto_id):
+        with self.transacao() as conn:
+            return pd.read_sql(SQL_PRODUTO_POR_ID, conn, params={"produto_id": produto_id}, dtype=TIPOS_PRODUTO)
+
+    @contextmanager
+    def _codigo_unico(self):
+        # produtos.codigo tem índice único (sql/migracoes/004_indices_consultas.sql)
+        try:
+            yield
+        except erros_pg.UniqueViolation as erro:
+            raise CodigoDuplicado("Já existe um produto com este código.") from erro
+
+    def inserir_produto(self, dados, chave=None):
+        with self._codigo_unico(), self.transacao() as conn:
+            cursor = conn.cursor()
+            if not registrar_chave(cursor, chave):
+                return
+
+            cursor.execute("""
+                INSERT INTO public.produtos
+                (produto, foto, estoque_inicial, estoque_atual, preco, lucro, codigo)
+                VALUES (%s,%s,%s,%s,%s,%s,%s)
+            """, tuple(dados[c] for c in COLUNAS_PRODUTO))
+
+    def atualizar_produto(self, produto_id, dados):
+        with self._codigo_unico(), self.transacao() as conn:
+            conn.cursor().execute("""
+                UPDATE public.produtos
+                SET produto=%s, codigo=%s, preco=%s, lucro=%s,
+                    estoque_inicial=%s, estoque_atual=%s
+                WHERE id=%s
+            """, (
+                dados["produto"],
+                dados["codigo"],
+                dados["preco"],
+                dados["lucro"],
+                dados["estoque_inicial"],
+                dados["estoque_atual"],
+                produto_id
+            ))
+
+    def excluir_produto(self, produto_id):
+        with self.transacao() as conn:
+            conn.cursor().execute(
+                "DELETE FROM public.produtos WHERE id=%s",
+                (produto_id,)
+            )
+
+    def importar_produtos(self, df):
+        linhas = list(df[COLUNAS_PRODUTO].itertuples(index=False, name=None))
+
+        with self.transacao() as conn:
+            atualizados, inseridos = execute_values(
+                conn.cursor(),
+                SQL_UPSERT_PRODUTOS,
+                linhas,
+                template="(%s::text, %s::text, %s::integer, %s::integer, %s::numeric, %s::numeric, %s::text)",
+                page_size=len(linhas),
+                fetch=True
+            )[0]
+
+        return atualizados, inseridos
+
+    # ----- vendas -----
+
+    def pagina_vendas(self, produto_id, desde, ate, apos, limite):
+        params = {"produto_id": produto_id, "desde": desde, "ate": ate, "limite": limite}
+
+        filtro_apos = ""
+        if apos is not None:
+            filtro_apos = FILTRO_APOS
+            params["apos_data"], params["apos_id"] = apos
+
+        with self.transacao() as conn:
+            return pd.read_sql(
+                SQL_PAGINA_VENDAS.format(filtro_apos=filtro_apos),
+                conn,
+                params=params,
+                dtype=TIPOS_VENDA
+            )
+
+    def serie_vendas(self, produto_id, inicio, fim, granularidade):
+        with self.transacao() as conn:
+            return pd.read_sql(SQL_SERIE_VENDAS, conn, params={
+                "unidade": GRANULARIDADES[granularidade],
+                "produto_id": produto_id,
+                "inicio": inicio,
+                "fim": fim
+            })
+
+    def vendas_diarias(self, desde):
+        with self.transacao() as conn:
+            return separar_marca(pd.read_sql(SQL_VENDAS_DIARIAS, conn, params={"desde": desde}))
+
+    def vendas_novas(self, apos_id, desde):
+        with self.transacao() as conn:
+            return pd.read_sql(SQL_VENDAS_NOVAS, conn, params={"apos_id": apos_id, "desde": desde})
+
+    def lotes_vendas(self, desde, ate, produto_id=None, tamanho=LOTE_EXPORTACAO):
+        # Gerador de listas de tuplas (colunas de SQL_EXPORTAR_VENDAS). A
+        # conexão fica com o gerador até ele terminar ou ser fechado.
+        params = {"desde": desde, "ate": ate, "produto_id": produto_id}
+        filtro_produto = FILTRO_PRODUTO if produto_id is not None else ""
+
+        with self.transacao() as conn:
+            arquivadas = conn.cursor()
+            arquivadas.execute(SQL_VENDAS_ARQUIVADAS, params)
+            vendas = _vendas_com_arquivo([tabela for (tabela,) in arquivadas.fetchall()])
+
+            with conn.cursor(name="exportar_vendas") as cursor:
+                cursor.itersize = tamanho
+                cursor.execute(
+                    SQL_EXPORTAR_VENDAS.format(vendas=vendas, filtro_produto=filtro_produto),
+                    params
+                )
+
+                while True:
+                    linhas = cursor.fetchmany(tamanho)
+                    if not linhas:
+                        break
+                    yield linhas
+
+    def vendas_alteradas(self, apos_id, modificada_apos):
+        with self.transacao() as conn:
+            return pd.read_sql(SQL_VENDAS_ALTERADAS, conn, params={
+                "apos_id": apos_id,
+                "modificada_apos": modificada_apos
+            }, dtype=TIPOS_VENDA)
+
+    def vendas_excluidas(self, apos):
+        with self.transacao() as conn:
+            return pd.read_sql(SQL_VENDAS_EXCLUIDAS, conn, params={"apos": apos})
+
+    def registrar_venda(self, produto_id, quantidade, preco, lucro, data_venda):
+        with self.transacao() as conn:
+            return executar_venda(conn.cursor(), produto_id, quantidade, preco, lucro, data_venda)
+
+    def registrar_carrinho(self, itens, data_venda, chave=None):
+        # None se a chave já foi aplicada
+        with self.transacao() as conn:
+            cursor = conn.cursor()
+            if not registrar_chave(cursor, chave):
+                return None
+
+            return executar_carrinho(cursor, itens, data_venda)
+
+    def registrar_carrinhos(self, carrinhos):
+        # Vários carrinhos [(chave, data_venda, itens)] numa transação, cada
+        # um no seu savepoint: falta de estoque desfaz só aquele carrinho.
+        # Devolve, na ordem, nº de vendas, None (chave já aplicada) ou o
+        # EstoqueInsuficiente do carrinho.
+        resultados = []
+
+        with self.transacao() as conn:
+            cursor = conn.cursor()
+
+            for chave, data_venda, itens in carrinhos:
+                cursor.execute("SAVEPOINT carrinho")
+                try:
+                    if registrar_chave(cursor, chave):
+                        resultados.append(executar_carrinho(cursor, itens, data_venda))
+                    else:
+                        resultados.append(None)
+                except EstoqueInsuficiente as erro:
+                    cursor.execute("ROLLBACK TO SAVEPOINT carrinho")
+                    resultados.append(erro)
+                else:
+                    cursor.execute("RELEASE SAVEPOINT carrinho")
+
+        return resultados
+
+    def excluir_venda(self, venda_id, produto_id, quantidade, data_venda=None):
+        with self.transacao() as conn:
+            cursor = conn.cursor()
+
+            # Excluir venda. Com a data só a partição do mês é lida; se a
+            # data mudou no banco depois que a tela carregou, busca pelo id.
+            if data_venda is not None:
+                cursor.execute("""
+                    DELETE FROM public.vendas_modarte
+                    WHERE id = %s AND data_venda = %s
+                """, (venda_id, data_venda))
+
+            if data_venda is None or cursor.rowcount == 0:
+                cursor.execute("""
+                    DELETE FROM public.vendas_modarte
+                    WHERE id = %s
+                """, (venda_id,))
+
+            # Devolver estoque, só se a venda ainda existia: excluir duas
+            # vezes não devolve em dobro
+            if cursor.rowcount == 1:
+                cursor.execute("""
+                    UPDATE public.produtos
+                    SET estoque_atual = estoque_atual + %s
+                    WHERE id = %s
+                """, (quantidade, produto_id))
+
+    def limpar_chaves(self, dias):
+        with self.transacao() as conn:
+            conn.cursor().execute(
+                "DELETE FROM public.escritas_aplicadas WHERE aplicada_em < now() - %s * interval '1 day'",
+                (dias,)
+            )
+
+    def manutencao(self, dias_chaves):
+        # Rotina periódica da fila de escritas
+        self.limpar_chaves(dias_chaves)
+        manter_particoes(self.transacao)
+
+    # ----- emails autorizados -----
+
+    def email_autorizado(self, email):
+        with self.transacao() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT 1 FROM public.usuarios_autorizados WHERE email = %s",
+                (email,)
+            )
+            return cursor.fetchone() is not None
+
+    def autorizar_email(self, email):
+        with self.transacao() as conn:
+            conn.cursor().execute(
+                "INSERT INTO public.usuarios_autorizados (email) VALUES (%s) ON CONFLICT (email) DO NOTHING",
+                (email,)
+            )
+
+    def revogar_email(self, email):
+        with self.transacao() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "DELETE FROM public.usuarios_autorizados WHERE email = %s",
+                (email,)
+            )
+            cursor.execute(
+                "INSERT INTO public.usuarios_revogados (email) VALUES (lower(%s)) ON CONFLICT (email) DO NOTHING",
+                (email,)
+            )
+
+    def email_revogado(self, email):
+        with self.transacao() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT 1 FROM public.usuarios_revogados WHERE email = lower(%s)",
+                (email,)
+            )
+            return cursor.fetchone() is not None
+
+    def emails_revogados(self):
+        with self.transacao() as conn:
+            return pd.read_sql(
+                "SELECT email, revogado_em FROM public.usuarios_revogados ORDER BY revogado_em DESC",
+                conn
+            )
+
+    def reativar_email(self, email):
+        with self.transacao() as conn:
+            conn.cursor().execute(
+                "DELETE FROM public.usuarios_revogados WHERE email = lower(%s)",
+                (email,)
+            )
+
+
+# =====================
+# SQLITE
+# =====================
+# Usa o esquema do modarte.db: produtos e vendas (mesmas colunas de
+# vendas_modarte). Sem trigger de resumo: o gráfico agrupa direto as vendas.
+
+PERIODOS_SQLITE = {
+    "Dia": "date(data_venda)",
+    "Semana": "date(data_venda, '-6 days', 'weekday 1')",
+    "Mês": "strftime('%Y-%m-01', data_venda)"
+}
+
+
+def _texto_data(valor):
+    # Datas ficam como texto 'AAAA-MM-DD HH:MM:SS', comparável por ordem
+    return valor.isoformat(sep=" ") if hasattr(valor, "isoformat") else valor
+
+
+def _data_sqlite(valor):
+    try:
+        return datetime.fromisoformat(valor)
+    except (TypeError, ValueError):
+        return valor
+
+
+class RepositorioSQLite:
+    def __init__(self, caminho, fabrica_conexao=sqlite3.Connection):
+        self.caminho = str(caminho)
+        self.fabrica_conexao = fabrica_conexao
+
+        # Índices da busca de produtos (LIKE sem diferenciar maiúsculas)
+        with self.transacao() as conn:
+            conn.execute("CREATE INDEX IF NOT EXISTS produtos_produto_nocase ON produtos (produto COLLATE NOCASE)")
+            conn.execute("CREATE INDEX IF NOT EXISTS produtos_codigo_nocase ON produtos (codigo COLLATE NOCASE)")
+
+            # Código único, como no Postgres (004_indices_consultas.sql). Com
+            # códigos repetidos já gravados o índice não é criado até a limpeza.
+            try:
+                conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS produtos_codigo_unico ON produtos (codigo)")
+            except sqlite3.IntegrityError:
+                pass
+
+    @contextmanager
+    def transacao(self):
+        conn = sqlite3.connect(self.caminho, timeout=30, factory=self.fabrica_conexao)
+
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    # ----- produtos -----
+
+    def listar_produtos(self):
+        with self.transacao() as conn:
+            return pd.read_sql(f"SELECT {CAMPOS_PRODUTO} FROM produtos", conn, dtype=TIPOS_PRODUTO)
+
+    def buscar_produtos(self, termo, limite):
+        # LIKE por prefixo usa os índices NOCASE
+        padrao = padrao_busca(termo, trecho=False)
+
+        with self.transacao() as conn:
+            return pd.read_sql("""
+                SELECT id, produto, COALESCE(codigo, '') AS codigo
+                FROM produtos
+                WHERE produto LIKE :padrao ESCAPE '\\'
+                   OR codigo LIKE :padrao ESCAPE '\\'
+                ORDER BY produto
+                LIMIT :limite
+            """, conn, params={"padrao": padrao, "limite": limite})
+
+    def produto_por_id(self, produto_id):
+        with self.transacao() as conn:
+            return pd.read_sql(
+                f"SELECT {CAMPOS_PRODUTO} FROM produtos WHERE id = ?",
+                conn,
+                params=(produto_id,),
+                dtype=TIPOS_PRODUTO
+            )
+
+    @contextmanager
+    def _codigo_unico(self):
+        try:
+            yield
+        except sqlite3.IntegrityError as erro:
+            if "produtos.codigo" not in str(erro):
+                raise
+            raise CodigoDuplicado("Já existe um produto com este código.") from erro
+
+    def inserir_produto(self, dados, chave=None):
+        with self._codigo_unico(), self.transacao() as conn:
+            if not self._registrar_chave(conn, chave):
+                return
+
+            conn.execute("""
+                INSERT INTO produtos
+                (produto, foto, estoque_inicial, estoque_atual, preco, lucro, codigo)
+                VALUES (?,?,?,?,?,?,?)
+            """, tuple(dados[c] for c in COLUNAS_PRODUTO))
+
+    def atualizar_produto(self, produto_id, dados):
+        with self._codigo_unico(), self.transacao() as conn:
+            conn.execute("""
+                UPDATE produtos
+                SET produto=?, codigo=?, preco=?, lucro=?,
+                    estoque_inicial=?, estoque_atual=?
+                WHERE id=?
+            """, (
+                dados["produto"],
+                dados["codigo"],
+                dados["preco"],
+                dados["lucro"],
+                dados["estoque_inicial"],
+                dados["estoque_atual"],
+                produto_id
+            ))
+
+    def excluir_produto(self, produto_id):
+        with self.transacao() as conn:
+            # Sem ON DELETE CASCADE no modarte.db: apaga as vendas junto
+            conn.execute("DELETE FROM vendas WHERE produto_id=?", (produto_id,))
+            conn.execute("DELETE FROM produtos WHERE id=?", (produto_id,))
+
+    def importar_produtos(self, df):
+        linhas = df[COLUNAS_PRODUTO].astype(object).where(df[COLUNAS_PRODUTO].notna(), None)
+        codigos = linhas["codigo"].tolist()
+
+        with self.transacao() as conn:
+            marcadores = ",".join("?" * len(codigos))
+            existentes = {
+                codigo for (codigo,) in conn.execute(
+                    f"SELECT DISTINCT codigo FROM produtos WHERE codigo IN ({marcadores})",
+                    codigos
+                )
+            }
+
+            atualizar = linhas[linhas["codigo"].isin(existentes)]
+            inserir = linhas[~linhas["codigo"].isin(existentes)]
+
+            conn.executemany("""
+                UPDATE produtos
+                SET produto=?, foto=COALESCE(?, foto), estoque_inicial=?, estoque_atual=?, preco=?, lucro=?
+                WHERE codigo=?
+            """, atualizar.itertuples(index=False, name=None))
+
+            conn.executemany("""
+                INSERT INTO produtos
+                (produto, foto, estoque_inicial, estoque_atual, preco, lucro, codigo)
+                VALUES (?,COALESCE(?, ''),?,?,?,?,?)
+            """, inserir.itertuples(index=False, name=None))
+
+        return len(atualizar), len(inserir)
+
+    # ----- vendas -----
+
+    def pagina_vendas(self, produto_id, desde, ate, apos, limite):
+        params = [produto_id, _texto_data(desde), _texto_data(ate)]
+
+        filtro_apos = ""
+        if apos is not None:
+            filtro_apos = "AND (v.data_venda, v.id) < (?, ?)"
+            params += [_texto_data(apos[0]), apos[1]]
+
+        params.append(limite)
+
+        with self.transacao() as conn:
+            return pd.read_sql(f"""
+                SELECT
+                    v.id,
+                    v.produto_id,
+                    p.produto,
+                    v.data_venda,
+                    COALESCE(v.quantidade, 0) AS quantidade,
+                    v.preco_unit,
+                    v.lucro_unit
+                FROM vendas v
+                JOIN produtos p ON p.id = v.produto_id
+                WHERE v.produto_id = ?
+                  AND v.data_venda >= ?
+                  AND v.data_venda < ?
+                  {filtro_apos}
+                ORDER BY v.data_venda DESC, v.id DESC
+                LIMIT ?
+            """, conn, params=params, dtype=TIPOS_VENDA)
+
+    def serie_vendas(self, produto_id, inicio, fim, granularidade):
+        with self.transacao() as conn:
+            return pd.read_sql(f"""
+                SELECT
+                    {PERIODOS_SQLITE[granularidade]} AS periodo,
+                    SUM(quantidade) AS quantidade
+                FROM vendas
+                WHERE produto_id = ?
+                  AND date(data_venda) BETWEEN ? AND ?
+                GROUP BY 1
+                ORDER BY 1
+            """, conn, params=(produto_id, inicio.isoformat(), fim.isoformat()))
+
+    def vendas_diarias(self, desde):
+        with self.transacao() as conn:
+            return separar_marca(pd.read_sql("""
+                SELECT
+                    v.produto_id,
+                    date(v.data_venda) AS dia,
+                    SUM(v.quantidade) AS quantidade,
+                    m.ultimo_id
+                FROM (SELECT COALESCE(MAX(id), 0) AS ultimo_id FROM vendas) m
+                LEFT JOIN vendas v ON v.data_venda >= ?
+                GROUP BY v.produto_id, date(v.data_venda)
+            """, conn, params=(desde.isoformat(),)))
+
+    def vendas_novas(self, apos_id, desde):
+        with self.transacao() as conn:
+            return pd.read_sql("""
+                SELECT id, produto_id, date(data_venda) AS dia, quantidade
+                FROM vendas
+                WHERE id > ? AND data_venda >= ?
+                ORDER BY id
+            """, conn, params=(apos_id, desde.isoformat()))
+
+    def lotes_vendas(self, desde, ate, produto_id=None, tamanho=LOTE_EXPORTACAO):
+        params = [_texto_data(desde), _texto_data(ate)]
+
+        filtro_produto = ""
+        if produto_id is not None:
+            filtro_produto = "AND v.produto_id = ?"
+            params.append(produto_id)
+
+        with self.transacao() as conn:
+            cursor = conn.execute(f"""
+                SELECT
+                    v.data_venda,
+                    v.id,
+                    p.codigo,
+                    p.produto,
+                    COALESCE(v.quantidade, 0) AS quantidade,
+                    v.preco_unit,
+                    v.lucro_unit,
+                    COALESCE(v.quantidade, 0) * v.preco_unit AS total,
+                    COALESCE(v.quantidade, 0) * v.lucro_unit AS lucro_total
+                FROM vendas v
+                JOIN produtos p ON p.id = v.produto_id
+                WHERE v.data_venda >= ?
+                  AND v.data_venda < ?
+                  {filtro_produto}
+                ORDER BY v.data_venda, v.id
+            """, params)
+
+            # Datas ficam como texto no modarte.db
+            while True:
+                linhas = cursor.fetchmany(tamanho)
+                if not linhas:
+                    break
+                yield [(_data_sqlite(linha[0]), *linha[1:]) for linha in linhas]
+
+    def _baixar_estoque(self, conn, produto_id, quantidade):
+        # Condicional como no Postgres: nunca deixa o estoque negativo
+        cursor = conn.execute("""
+            UPDATE produtos
+            SET estoque_atual = estoque_atual - ?
+            WHERE id = ? AND estoque_atual >= ?
+        """, (quantidade, produto_id, quantidade))
+        return cursor.rowcount == 1
+
+    def _inserir_venda(self, conn, produto_id, quantidade, preco, lucro, data_venda):
+        cursor = conn.execute("""
+            INSERT INTO vendas
+            (produto_id, quantidade, data_venda, preco_unit, lucro_unit)
+            VALUES (?,?,?,?,?)
+        """, (produto_id, quantidade, _texto_data(data_venda), preco, lucro))
+        return cursor.lastrowid
+
+    def registrar_venda(self, produto_id, quantidade, preco, lucro, data_venda):
+        with self.transacao() as conn:
+            if not self._baixar_estoque(conn, produto_id, quantidade):
+                raise EstoqueInsuficiente("Estoque insuficiente para esta venda.")
+
+            venda_id = self._inserir_venda(conn, produto_id, quantidade, preco, lucro, data_venda)
+            (estoque,) = conn.execute(
+                "SELECT estoque_atual FROM produtos WHERE id = ?", (produto_id,)
+            ).fetchone()
+
+        return venda_id, estoque
+
+    def registrar_carrinho(self, itens, data_venda, chave=None):
+        totais = {}
+        for item in itens:
+            totais[item["produto_id"]] = totais.get(item["produto_id"], 0) + item["quantidade"]
+
+        with self.transacao() as conn:
+            if not self._registrar_chave(conn, chave):
+                return None
+
+            for produto_id, quantidade in totais.items():
+                if not self._baixar_estoque(conn, produto_id, quantidade):
+                    raise EstoqueInsuficiente("Estoque insuficiente para um ou mais itens do carrinho.")
+
+            self._inserir_itens(conn, itens, data_venda)
+
+        return len(itens)
+
+    def _inserir_itens(self, conn, itens, data_venda):
+        conn.executemany("""
+            INSERT INTO vendas
+            (produto_id, quantidade, data_venda, preco_unit, lucro_unit)
+            VALUES (?,?,?,?,?)
+        """, [
+            (item["produto_id"], item["quantidade"], _texto_data(data_venda), item["preco"], item["lucro"])
+            for item in itens
+        ])
+
+    def excluir_venda(self, venda_id, produto_id, quantidade, data_venda=None):
+        with self.transacao() as conn:
+            if conn.execute("DELETE FROM vendas WHERE id = ?", (venda_id,)).rowcount == 1:
+                conn.execute(
+                    "UPDATE produtos SET estoque_atual = estoque_atual + ? WHERE id = ?",
+                    (quantidade, produto_id)
+                )
+
+    # ----- chaves de idempotência -----
+    # Como a tabela de emails, só é criada na primeira escrita
+
+    def _registrar_chave(self, conn, chave):
+        if chave is None:
+            return True
+
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS escritas_aplicadas (
+                chave TEXT PRIMARY KEY,
+                aplicada_em TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        return conn.execute(
+            "INSERT OR IGNORE INTO escritas_aplicadas (chave) VALUES (?)", (chave,)
+        ).rowcount == 1
+
+    def limpar_chaves(self, dias):
+        with self.transacao() as conn:
+            try:
+                conn.execute(
+                    "DELETE FROM escritas_aplicadas WHERE aplicada_em < datetime('now', ?)",
+                    (f"-{int(dias)} days",)
+                )
+            except sqlite3.OperationalError:
+                pass
+
+    def manutencao(self, dias_chaves):
+        self.limpar_chaves(dias_chaves)
+
+    # ----- emails autorizados -----
+    # modarte.db não tem a tabela: ela só é criada na primeira escrita
+
+    def email_autorizado(self, email):
+        with self.transacao() as conn:
+            try:
+                linha = conn.execute(
+                    "SELECT 1 FROM usuarios_autorizados WHERE email = ?", (email,)
+                ).fetchone()
+            except sqlite3.OperationalError:
+                return False
+        return linha is not None
+
+    def _criar_tabela_emails(self, conn):
+        conn.execute("CREATE TABLE IF NOT EXISTS usuarios_autorizados (email TEXT PRIMARY KEY)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS usuarios_revogados (
+                email TEXT PRIMARY KEY,
+                revogado_em TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+    def autorizar_email(self, email):
+        with self.transacao() as conn:
+            self._criar_tabela_emails(conn)
+            conn.execute("INSERT OR IGNORE INTO usuarios_autorizados (email) VALUES (?)", (email,))
+
+    def revogar_email(self, email):
+        with self.transacao() as conn:
+            self._criar_tabela_emails(conn)
+            conn.execute("DELETE FROM usuarios_autorizados WHERE email = ?", (email,))
+            conn.execute("INSERT OR IGNORE INTO usuarios_revogados (email) VALUES (lower(?))", (email,))
+
+    def email_revogado(self, email):
+        with self.transacao() as conn:
+            try:
+                linha = conn.execute(
+                    "SELECT 1 FROM usuarios_revogados WHERE email = lower(?)", (email,)
+                ).fetchone()
+            except sqlite3.OperationalError:
+                return False
+        return linha is not None
+
+    def emails_revogados(self):
+        with self.transacao() as conn:
+            try:
+                return pd.read_sql(
+                    "SELECT email, revogado_em FROM usuarios_revogados ORDER BY revogado_em DESC",
+                    conn
+                )
+            except pd.errors.DatabaseError:
+                return pd.DataFrame(columns=["email", "revogado_em"])
+
+    def reativar_email(self, email):
+        with self.transacao() as conn:
+            self._criar_tabela_emails(conn)
+            conn.execute("DELETE FROM usuarios_revogados WHERE email = lower(?)", (email,))
@@ -0,0 +1,31 @@
+-- =====================
+-- ESQUEMA BASE
+-- =====================
+-- Tabelas do app. Em bancos que já existiam antes das migrações nada muda
+-- (IF NOT EXISTS); em um banco novo, cria tudo do zero.
+
+CREATE TABLE IF NOT EXISTS public.produtos (
+    id serial PRIMARY KEY,
+    produto text,
+    codigo text,
+    preco numeric,
+    lucro numeric,
+    estoque_inicial integer,
+    estoque_atual integer,
+    foto text,
+    renda_atual numeric,
+    lucro_atual numeric
+);
+
+CREATE TABLE IF NOT EXISTS public.vendas_modarte (
+    id serial PRIMARY KEY,
+    produto_id integer REFERENCES public.produtos (id) ON DELETE CASCADE,
+    quantidade integer,
+    data_venda timestamp,
+    preco_unit numeric,
+    lucro_unit numeric
+);
+
+CREATE TABLE IF NOT EXISTS public.usuarios_autorizados (
+    email text PRIMARY KEY
+);
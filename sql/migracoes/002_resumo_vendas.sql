@@ -0,0 +1,103 @@
+-- =====================
+-- RESUMO DIÁRIO DE VENDAS
+-- =====================
+-- Uma linha por produto × dia, mantida por trigger a cada venda inserida,
+-- alterada ou excluída. O gráfico do dashboard lê daqui (semana e mês são
+-- somas destas linhas) em vez de varrer vendas_modarte.
+
+DO $$
+BEGIN
+    IF to_regclass('public.vendas_resumo_diario') IS NULL THEN
+        CREATE TABLE public.vendas_resumo_diario (
+            produto_id integer NOT NULL,
+            dia date NOT NULL,
+            vendas integer NOT NULL DEFAULT 0,
+            quantidade bigint NOT NULL DEFAULT 0,
+            renda numeric NOT NULL DEFAULT 0,
+            lucro numeric NOT NULL DEFAULT 0,
+            PRIMARY KEY (produto_id, dia)
+        );
+
+        -- Carga inicial com o histórico existente. Vendas antigas podem ter
+        -- quantidade nula (conta 0, como no app); sem data ou sem produto
+        -- não há linha de resumo onde somar.
+        INSERT INTO public.vendas_resumo_diario
+            (produto_id, dia, vendas, quantidade, renda, lucro)
+        SELECT
+            produto_id,
+            data_venda::date,
+            COUNT(*),
+            SUM(COALESCE(quantidade, 0)),
+            SUM(COALESCE(quantidade, 0) * COALESCE(preco_unit, 0)),
+            SUM(COALESCE(quantidade, 0) * COALESCE(lucro_unit, 0))
+        FROM public.vendas_modarte
+        WHERE data_venda IS NOT NULL
+          AND produto_id IS NOT NULL
+        GROUP BY 1, 2;
+    END IF;
+END $$;
+
+CREATE OR REPLACE FUNCTION public.atualizar_resumo_vendas(
+    p_produto_id integer,
+    p_dia date,
+    p_sinal integer,
+    p_quantidade integer,
+    p_preco numeric,
+    p_lucro numeric
+) RETURNS void AS $$
+BEGIN
+    INSERT INTO public.vendas_resumo_diario AS r
+        (produto_id, dia, vendas, quantidade, renda, lucro)
+    VALUES (
+        p_produto_id,
+        p_dia,
+        p_sinal,
+        p_sinal * p_quantidade,
+        p_sinal * p_quantidade * COALESCE(p_preco, 0),
+        p_sinal * p_quantidade * COALESCE(p_lucro, 0)
+    )
+    ON CONFLICT (produto_id, dia) DO UPDATE SET
+        vendas = r.vendas + EXCLUDED.vendas,
+        quantidade = r.quantidade + EXCLUDED.quantidade,
+        renda = r.renda + EXCLUDED.renda,
+        lucro = r.lucro + EXCLUDED.lucro;
+
+    IF p_sinal < 0 THEN
+        DELETE FROM public.vendas_resumo_diario
+        WHERE produto_id = p_produto_id AND dia = p_dia AND vendas <= 0;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION public.trg_resumo_vendas() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        PERFORM public.atualizar_resumo_vendas(
+            OLD.produto_id, OLD.data_venda::date, -1,
+            OLD.quantidade, OLD.preco_unit, OLD.lucro_unit
+        );
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM public.atualizar_resumo_vendas(
+            NEW.produto_id, NEW.data_venda::date, 1,
+            NEW.quantidade, NEW.preco_unit, NEW.lucro_unit
+        );
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_trigger
+        WHERE tgname = 'resumo_vendas'
+          AND tgrelid = 'public.vendas_modarte'::regclass
+    ) THEN
+        CREATE TRIGGER resumo_vendas
+        AFTER INSERT OR UPDATE OR DELETE ON public.vendas_modarte
+        FOR EACH ROW EXECUTE FUNCTION public.trg_resumo_vendas();
+    END IF;
+END $$;
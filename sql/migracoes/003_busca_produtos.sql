@@ -0,0 +1,29 @@
+-- =====================
+-- BUSCA DE PRODUTOS
+-- =====================
+-- Índices do seletor de produtos (busca por nome ou código). Com pg_trgm
+-- disponível, índices GIN de trigramas atendem busca por qualquer trecho;
+-- sem ele, índices btree atendem busca por prefixo.
+
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+        BEGIN
+            CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        EXCEPTION WHEN insufficient_privilege THEN
+            RAISE NOTICE 'Sem permissão para criar pg_trgm; busca por prefixo.';
+        END;
+    END IF;
+
+    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm') THEN
+        CREATE INDEX IF NOT EXISTS produtos_produto_trgm
+            ON public.produtos USING gin (lower(produto) gin_trgm_ops);
+        CREATE INDEX IF NOT EXISTS produtos_codigo_trgm
+            ON public.produtos USING gin (lower(codigo) gin_trgm_ops);
+    END IF;
+
+    CREATE INDEX IF NOT EXISTS produtos_produto_prefixo
+        ON public.produtos (lower(produto) text_pattern_ops);
+    CREATE INDEX IF NOT EXISTS produtos_codigo_prefixo
+        ON public.produtos (lower(codigo) text_pattern_ops);
+END $$;
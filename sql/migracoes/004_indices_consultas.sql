@@ -0,0 +1,34 @@
+-- =====================
+-- ÍNDICES DAS CONSULTAS DO APP
+-- =====================
+-- Histórico de vendas: filtra por produto e período e pagina por
+-- (data_venda, id) decrescente. O mesmo índice atende o EXISTS de
+-- "produtos com vendas" e o ON DELETE CASCADE ao excluir um produto.
+
+CREATE INDEX IF NOT EXISTS vendas_modarte_produto_data
+    ON public.vendas_modarte (produto_id, data_venda, id);
+
+-- Importação da planilha: atualiza produtos pelo código. Único quando os
+-- dados permitem; com códigos repetidos já gravados, fica um índice comum
+-- até a limpeza (o aviso aparece no log da migração).
+DO $$
+BEGIN
+    IF to_regclass('public.produtos_codigo_unico') IS NULL
+       AND to_regclass('public.produtos_codigo') IS NULL THEN
+        IF EXISTS (
+            SELECT 1 FROM public.produtos
+            WHERE codigo IS NOT NULL
+            GROUP BY codigo
+            HAVING COUNT(*) > 1
+        ) THEN
+            RAISE WARNING 'Há códigos de produto repetidos; criando índice não único em produtos.codigo.';
+            CREATE INDEX produtos_codigo ON public.produtos (codigo);
+        ELSE
+            CREATE UNIQUE INDEX produtos_codigo_unico ON public.produtos (codigo);
+        END IF;
+    END IF;
+END $$;
+
+-- Seletor de produtos sem busca: primeiros por nome
+CREATE INDEX IF NOT EXISTS produtos_produto
+    ON public.produtos (produto);
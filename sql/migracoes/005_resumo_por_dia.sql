@@ -0,0 +1,9 @@
+-- =====================
+-- RESUMO DIÁRIO POR DATA
+-- =====================
+-- A previsão de reposição lê as últimas semanas de todos os produtos de
+-- uma vez (dia >= início da janela). A chave (produto_id, dia) não serve
+-- para filtrar só por dia.
+
+CREATE INDEX IF NOT EXISTS vendas_resumo_diario_dia
+    ON public.vendas_resumo_diario (dia);
@@ -0,0 +1,61 @@
+-- =====================
+-- SINCRONIZAÇÃO INCREMENTAL DAS VENDAS
+-- =====================
+-- O snapshot local das vendas (vendas_locais.py) busca só o que mudou desde
+-- a última sincronização: vendas com id novo ou atualizada_em recente, e as
+-- exclusões registradas em vendas_excluidas (lápides). Exclusões em cascata
+-- (excluir um produto) também passam pelo trigger.
+
+ALTER TABLE public.vendas_modarte
+    ADD COLUMN IF NOT EXISTS atualizada_em timestamptz NOT NULL DEFAULT now();
+
+CREATE INDEX IF NOT EXISTS vendas_modarte_atualizada_em
+    ON public.vendas_modarte (atualizada_em);
+
+CREATE TABLE IF NOT EXISTS public.vendas_excluidas (
+    venda_id integer PRIMARY KEY,
+    excluida_em timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS vendas_excluidas_excluida_em
+    ON public.vendas_excluidas (excluida_em);
+
+CREATE OR REPLACE FUNCTION public.trg_venda_alterada() RETURNS trigger AS $$
+BEGIN
+    NEW.atualizada_em := now();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION public.trg_venda_excluida() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO public.vendas_excluidas (venda_id)
+    VALUES (OLD.id)
+    ON CONFLICT (venda_id) DO UPDATE SET excluida_em = now();
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_trigger
+        WHERE tgname = 'venda_alterada'
+          AND tgrelid = 'public.vendas_modarte'::regclass
+    ) THEN
+        CREATE TRIGGER venda_alterada
+        BEFORE UPDATE ON public.vendas_modarte
+        FOR EACH ROW EXECUTE FUNCTION public.trg_venda_alterada();
+    END IF;
+
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_trigger
+        WHERE tgname = 'venda_excluida'
+          AND tgrelid = 'public.vendas_modarte'::regclass
+    ) THEN
+        CREATE TRIGGER venda_excluida
+        AFTER DELETE ON public.vendas_modarte
+        FOR EACH ROW EXECUTE FUNCTION public.trg_venda_excluida();
+    END IF;
+END $$;
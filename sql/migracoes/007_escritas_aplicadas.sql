@@ -0,0 +1,16 @@
+-- =====================
+-- CHAVES DE IDEMPOTÊNCIA DAS ESCRITAS
+-- =====================
+-- Cada venda ou produto novo enviado pela fila de escritas leva uma chave
+-- gerada na sessão do usuário e gravada na mesma transação da escrita. Um
+-- clique duplo (ou uma nova tentativa depois de uma queda de conexão)
+-- encontra a chave e não grava de novo. Chaves antigas são apagadas pela
+-- própria fila (fila_escritas.DIAS_CHAVES).
+
+CREATE TABLE IF NOT EXISTS public.escritas_aplicadas (
+    chave text PRIMARY KEY,
+    aplicada_em timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS escritas_aplicadas_aplicada_em
+    ON public.escritas_aplicadas (aplicada_em);
@@ -0,0 +1,221 @@
+-- =====================
+-- VENDAS PARTICIONADAS POR MÊS
+-- =====================
+-- vendas_modarte passa a ser particionada por data_venda: uma partição por
+-- mês (vendas_modarte_pAAAA_MM) e uma padrão (vendas_modarte_padrao) para
+-- datas sem partição. Consultas com período só leem os meses do intervalo,
+-- e meses antigos saem da tabela sem DELETE (arquivar_vendas), então o
+-- histórico pode crescer sem deixar as telas de vendas recentes lentas.
+-- A criação dos meses seguintes e o arquivamento rodam pelo app
+-- (particoes_vendas.py).
+--
+-- A tabela antiga é copiada com os mesmos ids e a mesma sequência. O resumo
+-- diário já está certo, então os triggers só são criados depois da cópia.
+-- data_venda vira NOT NULL (faz parte da chave): vendas antigas sem data,
+-- que também ficam fora do resumo diário (002), são guardadas em
+-- public.vendas_sem_data para correção manual, com um aviso no log.
+
+-- Cria as partições mensais que faltam de p_de até p_ate e devolve os
+-- nomes. A trava (a mesma do arquivamento) evita duas instâncias criando
+-- o mesmo mês.
+CREATE OR REPLACE FUNCTION public.criar_particoes_vendas(p_de date, p_ate date)
+RETURNS SETOF text AS $$
+DECLARE
+    v_mes date := date_trunc('month', p_de)::date;
+    v_fim date;
+    v_nome text;
+    v_movidas boolean;
+BEGIN
+    PERFORM pg_advisory_xact_lock(7404002);
+
+    WHILE v_mes <= p_ate LOOP
+        v_fim := (v_mes + interval '1 month')::date;
+        v_nome := 'vendas_modarte_p' || to_char(v_mes, 'YYYY_MM');
+
+        -- Meses arquivados não voltam: vendas com essas datas ficam na padrão
+        IF to_regclass('public.' || v_nome) IS NULL AND to_regclass('arquivo.' || v_nome) IS NULL THEN
+            -- Vendas do mês que já caíram na partição padrão mudam para a
+            -- nova. DELETE + INSERT na mesma transação: o resumo diário
+            -- volta ao mesmo valor e as lápides do DELETE são apagadas.
+            v_movidas := EXISTS (
+                SELECT 1 FROM public.vendas_modarte_padrao
+                WHERE data_venda >= v_mes AND data_venda < v_fim
+            );
+
+            IF v_movidas THEN
+                CREATE TEMP TABLE IF NOT EXISTS vendas_movidas (LIKE public.vendas_modarte) ON COMMIT DROP;
+                TRUNCATE vendas_movidas;
+
+                WITH movidas AS (
+                    DELETE FROM public.vendas_modarte_padrao
+                    WHERE data_venda >= v_mes AND data_venda < v_fim
+                    RETURNING *
+                )
+                INSERT INTO vendas_movidas SELECT * FROM movidas;
+            END IF;
+
+            EXECUTE format(
+                'CREATE TABLE public.%I PARTITION OF public.vendas_modarte FOR VALUES FROM (%L) TO (%L)',
+                v_nome, v_mes, v_fim
+            );
+
+            IF v_movidas THEN
+                INSERT INTO public.vendas_modarte SELECT * FROM vendas_movidas;
+                DELETE FROM public.vendas_excluidas WHERE venda_id IN (SELECT id FROM vendas_movidas);
+            END IF;
+
+            RETURN NEXT v_nome;
+        END IF;
+
+        v_mes := v_fim;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Desanexa os meses que terminam até p_antes e os move para o schema
+-- arquivo. Sem DELETE: o resumo diário (gráficos, reposição) continua com
+-- o histórico inteiro e nenhuma lápide é criada.
+CREATE OR REPLACE FUNCTION public.arquivar_vendas(p_antes date)
+RETURNS SETOF text AS $$
+DECLARE
+    v_nome text;
+BEGIN
+    PERFORM pg_advisory_xact_lock(7404002);
+
+    CREATE SCHEMA IF NOT EXISTS arquivo;
+
+    FOR v_nome IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'public.vendas_modarte'::regclass
+          AND c.relname ~ '^vendas_modarte_p[0-9]{4}_[0-9]{2}$'
+          AND to_date(substr(c.relname, 17), 'YYYY_MM') + interval '1 month' <= p_antes
+        ORDER BY c.relname
+    LOOP
+        EXECUTE format('ALTER TABLE public.vendas_modarte DETACH PARTITION public.%I', v_nome);
+        EXECUTE format('ALTER TABLE public.%I SET SCHEMA arquivo', v_nome);
+        RETURN NEXT v_nome;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Mudar a data de uma venda para outro mês move a linha de partição, e o
+-- Postgres faz isso como DELETE + INSERT: sem esta conferência a venda
+-- ganharia uma lápide e sumiria das vendas locais (vendas_locais.py).
+CREATE OR REPLACE FUNCTION public.trg_venda_excluida() RETURNS trigger AS $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM public.vendas_modarte WHERE id = OLD.id) THEN
+        RETURN NULL;
+    END IF;
+
+    INSERT INTO public.vendas_excluidas (venda_id)
+    VALUES (OLD.id)
+    ON CONFLICT (venda_id) DO UPDATE SET excluida_em = now();
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    v_sequencia text;
+    v_sem_data integer;
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 'public.vendas_modarte'::regclass) = 'p' THEN
+        RETURN;
+    END IF;
+
+    -- Os ids continuam na mesma sequência (serial). Uma coluna identity não
+    -- passa para a tabela particionada: vira uma sequência comum que
+    -- continua do maior id.
+    v_sequencia := pg_get_serial_sequence('public.vendas_modarte', 'id');
+
+    IF EXISTS (
+        SELECT 1 FROM pg_attribute
+        WHERE attrelid = 'public.vendas_modarte'::regclass
+          AND attname = 'id'
+          AND attidentity <> ''
+    ) THEN
+        ALTER TABLE public.vendas_modarte ALTER COLUMN id DROP IDENTITY;
+        v_sequencia := NULL;
+    END IF;
+
+    IF v_sequencia IS NULL THEN
+        CREATE SEQUENCE public.vendas_modarte_id_seq;
+        PERFORM setval('public.vendas_modarte_id_seq', COALESCE(MAX(id), 0) + 1, false)
+        FROM public.vendas_modarte;
+        v_sequencia := 'public.vendas_modarte_id_seq';
+    END IF;
+
+    -- Os nomes dos índices passam para a tabela nova
+    ALTER TABLE public.vendas_modarte RENAME TO vendas_modarte_antiga;
+    ALTER TABLE public.vendas_modarte_antiga DROP CONSTRAINT IF EXISTS vendas_modarte_pkey;
+    DROP INDEX IF EXISTS public.vendas_modarte_produto_data;
+    DROP INDEX IF EXISTS public.vendas_modarte_atualizada_em;
+
+    CREATE TABLE public.vendas_modarte (
+        id integer NOT NULL,
+        produto_id integer REFERENCES public.produtos (id) ON DELETE CASCADE,
+        quantidade integer,
+        data_venda timestamp NOT NULL,
+        preco_unit numeric,
+        lucro_unit numeric,
+        atualizada_em timestamptz NOT NULL DEFAULT now(),
+        CONSTRAINT vendas_modarte_pkey PRIMARY KEY (id, data_venda)
+    ) PARTITION BY RANGE (data_venda);
+
+    EXECUTE format('ALTER TABLE public.vendas_modarte ALTER COLUMN id SET DEFAULT nextval(%L::regclass)', v_sequencia);
+    EXECUTE format('ALTER SEQUENCE %s OWNED BY public.vendas_modarte.id', v_sequencia);
+
+    CREATE TABLE public.vendas_modarte_padrao PARTITION OF public.vendas_modarte DEFAULT;
+
+    CREATE INDEX vendas_modarte_produto_data
+        ON public.vendas_modarte (produto_id, data_venda, id);
+    CREATE INDEX vendas_modarte_atualizada_em
+        ON public.vendas_modarte (atualizada_em);
+
+    -- Do mês da venda mais antiga até 3 meses à frente
+    PERFORM public.criar_particoes_vendas(
+        COALESCE((SELECT MIN(data_venda) FROM public.vendas_modarte_antiga), current_date)::date,
+        (current_date + interval '3 months')::date
+    );
+
+    SELECT COUNT(*) INTO v_sem_data FROM public.vendas_modarte_antiga WHERE data_venda IS NULL;
+
+    IF v_sem_data > 0 THEN
+        CREATE TABLE IF NOT EXISTS public.vendas_sem_data AS
+        SELECT id, produto_id, quantidade, data_venda, preco_unit, lucro_unit, atualizada_em
+        FROM public.vendas_modarte_antiga
+        WITH NO DATA;
+
+        INSERT INTO public.vendas_sem_data
+        SELECT id, produto_id, quantidade, data_venda, preco_unit, lucro_unit, atualizada_em
+        FROM public.vendas_modarte_antiga
+        WHERE data_venda IS NULL;
+
+        RAISE WARNING '% vendas sem data guardadas em public.vendas_sem_data.', v_sem_data;
+    END IF;
+
+    INSERT INTO public.vendas_modarte
+        (id, produto_id, quantidade, data_venda, preco_unit, lucro_unit, atualizada_em)
+    SELECT id, produto_id, quantidade, data_venda, preco_unit, lucro_unit, atualizada_em
+    FROM public.vendas_modarte_antiga
+    WHERE data_venda IS NOT NULL;
+
+    DROP TABLE public.vendas_modarte_antiga;
+
+    CREATE TRIGGER resumo_vendas
+    AFTER INSERT OR UPDATE OR DELETE ON public.vendas_modarte
+    FOR EACH ROW EXECUTE FUNCTION public.trg_resumo_vendas();
+
+    CREATE TRIGGER venda_alterada
+    BEFORE UPDATE ON public.vendas_modarte
+    FOR EACH ROW EXECUTE FUNCTION public.trg_venda_alterada();
+
+    CREATE TRIGGER venda_excluida
+    AFTER DELETE ON public.vendas_modarte
+    FOR EACH ROW EXECUTE FUNCTION public.trg_venda_excluida();
+
+    ANALYZE public.vendas_modarte;
+END $$;
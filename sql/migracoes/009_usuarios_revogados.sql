@@ -0,0 +1,13 @@
+-- =====================
+-- ACESSOS REVOGADOS
+-- =====================
+-- Revogar um acesso grava o email (em minúsculas) aqui, além de tirá-lo de
+-- usuarios_autorizados. A revogação vale também para a lista fixa do app
+-- (emails_autorizados.py) e para todas as instâncias, inclusive depois de
+-- reiniciar. O cadastro pelo link do Google não apaga a revogação: só
+-- reativar o acesso na tela de acessos.
+
+CREATE TABLE IF NOT EXISTS public.usuarios_revogados (
+    email text PRIMARY KEY,
+    revogado_em timestamptz NOT NULL DEFAULT now()
+);
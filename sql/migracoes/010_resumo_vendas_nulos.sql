@@ -0,0 +1,42 @@
+-- =====================
+-- RESUMO DIÁRIO COM VENDAS INCOMPLETAS
+-- =====================
+-- Mesmas regras da carga inicial (002) para o trigger: quantidade nula
+-- conta 0 e vendas sem produto ou sem data ficam fora do resumo. Antes,
+-- gravar ou apagar uma venda assim falhava no NOT NULL do resumo.
+
+CREATE OR REPLACE FUNCTION public.atualizar_resumo_vendas(
+    p_produto_id integer,
+    p_dia date,
+    p_sinal integer,
+    p_quantidade integer,
+    p_preco numeric,
+    p_lucro numeric
+) RETURNS void AS $$
+BEGIN
+    IF p_produto_id IS NULL OR p_dia IS NULL THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO public.vendas_resumo_diario AS r
+        (produto_id, dia, vendas, quantidade, renda, lucro)
+    VALUES (
+        p_produto_id,
+        p_dia,
+        p_sinal,
+        p_sinal * COALESCE(p_quantidade, 0),
+        p_sinal * COALESCE(p_quantidade, 0) * COALESCE(p_preco, 0),
+        p_sinal * COALESCE(p_quantidade, 0) * COALESCE(p_lucro, 0)
+    )
+    ON CONFLICT (produto_id, dia) DO UPDATE SET
+        vendas = r.vendas + EXCLUDED.vendas,
+        quantidade = r.quantidade + EXCLUDED.quantidade,
+        renda = r.renda + EXCLUDED.renda,
+        lucro = r.lucro + EXCLUDED.lucro;
+
+    IF p_sinal < 0 THEN
+        DELETE FROM public.vendas_resumo_diario
+        WHERE produto_id = p_produto_id AND dia = p_dia AND vendas <= 0;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
@@ -1,13 +1,53 @@
-from supabase import create_client
 import streamlit as st
 import pandas as pd
-import psycopg2
 from pathlib import Path
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import cm
-from datetime import datetime
-import tempfile
+from datetime import date, datetime, timedelta
+import uuid
+
+from autorizacao import (
+    administrador,
+    autorizar_email,
+    cliente_sessao,
+    emails_revogados,
+    reativar_email,
+    revogar_autorizacao,
+    usuario_autorizado
+)
+from dados import (
+    GRANULARIDADES,
+    LIMITE_BUSCA,
+    EstoqueInsuficiente,
+    FilaCheia,
+    buscar_produtos,
+    carregar_produtos,
+    chave_pagina,
+    conflitos_offline,
+    filtrar_produto,
+    get_fila_escritas,
+    historico_vendas,
+    memoria_produtos,
+    modo_offline,
+    produto_por_id,
+    resolver_conflitos_offline,
+    serie_vendas,
+    sincronizar_vendas_offline,
+    vendas_offline_pendentes
+)
+from importar_planilha import importar_planilha
+from instrumentacao import finalizar_medicao, iniciar_medicao, painel_desempenho, trecho
+from listagem import (
+    COLUNAS_GRADE,
+    ORDENACOES,
+    TAMANHOS_PAGINA,
+    formatar_cards,
+    pagina_produtos,
+    total_paginas
+)
+from miniaturas import miniatura_produto
+from exportacao import FORMATOS
+from relatorios import relatorio_produtos, relatorio_vendas
+from reposicao import JANELA_DIAS, PRAZO_REPOSICAO_DIAS, reposicao_produtos
+from validacao import validar_produto
 
 # =====================
 # CONFIG INICIAL
@@ -18,10 +58,8 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-supabase = create_client(
-    st.secrets["supabase"]["url"],
-    st.secrets["supabase"]["anon_key"]
-)
+# Cliente da sessão, criado uma vez (ver autorizacao.py)
+supabase = cliente_sessao()
 
 # =====================
 # SESSION STATE
@@ -35,13 +73,6 @@ if "fase" not in st.session_state:
 # =====================
 # FUNÇÕES AUXILIARES
 # =====================
-def usuario_autorizado(email):
-    res = supabase.table("usuarios_autorizados") \
-        .select("email") \
-        .eq("email", email) \
-        .execute()
-    return len(res.data) > 0
-
 def sidebar_usuario():
     with st.sidebar:
         st.write(f"👤 Usuário: {st.session_state.user.email}")
@@ -99,9 +130,11 @@ params = st.query_params
 if "email" in params:
     email = params["email"]
 
-    supabase.table("usuarios_autorizados").insert({
-        "email": email
-    }).execute()
+    # Um acesso revogado só volta pela tela de acessos
+    if not autorizar_email(email):
+        st.query_params.clear()
+        st.error("⛔ Acesso revogado")
+        st.stop()
 
     st.success("✅ Email autorizado. Crie sua senha.")
     st.session_state.email_google = email
@@ -157,160 +190,160 @@ sidebar_usuario()
 st.title("📦 Painel de Produtos")
 st.success("🎉 Bem-vindo ao sistema!")
 
-def validar_produto(dados):
-    campos_texto = ["produto", "foto", "codigo"]
-    campos_num = ["estoque_inicial", "estoque_atual", "preco", "lucro"]
-
-    for campo in campos_texto:
-        if not dados[campo] or str(dados[campo]).strip() == "":
-            return False, f"Campo '{campo}' não pode ficar vazio."
-
-    for campo in campos_num:
-        if dados[campo] <= 0:
-            return False, f"Campo '{campo}' deve ser maior que zero."
+# =====================
+# CONFIGURAÇÕES
+# =====================
 
-    if dados["estoque_atual"] > dados["estoque_inicial"]:
-        return False, "Estoque atual não pode ser maior que o estoque inicial."
+BASE_DIR = Path(__file__).parent
 
-    return True, ""
+st.set_page_config(
+    page_title="MODARTE",
+    layout="wide",
+    initial_sidebar_state="expanded",
+    page_icon=str(BASE_DIR / "Logo_Modarte.jpg")
+)
 
-def gerar_pdf(df):
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
+# =====================
+# SELETOR DE PRODUTO
+# =====================
+# Busca por nome ou código no banco (com índice) e mostra só os resultados,
+# em vez de mandar o catálogo inteiro para o navegador. Devolve o id.
 
-    c = canvas.Canvas(temp_file.name, pagesize=A4)
-    largura, altura = A4
+def seletor_produto(rotulo, key, opcao_todos=False):
+    termo = st.text_input("🔎 Buscar produto (nome ou código)", key=f"{key}_busca")
 
-    y = altura - 2 * cm
+    resultados = buscar_produtos(termo)
 
-    # TÍTULO
-    c.setFont("Helvetica-Bold", 16)
-    c.drawString(2 * cm, y, "Relatório de Vendas - MODARTE")
-    y -= 1 * cm
+    rotulos = {
+        int(produto_id): f"{produto} · {codigo}" if codigo else produto
+        for produto_id, produto, codigo in resultados.itertuples(index=False)
+    }
+    opcoes = list(rotulos)
 
-    c.setFont("Helvetica", 10)
-    c.drawString(2 * cm, y, f"Data: {datetime.now().strftime('%d/%m/%Y %H:%M')}")
-    y -= 1 * cm
+    # Ids começam em 1: o 0 representa "Todos"
+    if opcao_todos:
+        rotulos[0] = "Todos"
+        opcoes = [0] + opcoes
 
-    # KPIs
-    c.setFont("Helvetica-Bold", 11)
-    c.drawString(2 * cm, y, f"Renda Total: R$ {df['renda_atual'].sum():,.2f}")
-    y -= 0.6 * cm
-    c.drawString(2 * cm, y, f"Lucro Total: R$ {df['lucro_atual'].sum():,.2f}")
-    y -= 1 * cm
+    if len(resultados) == LIMITE_BUSCA:
+        st.caption(f"Mostrando os {LIMITE_BUSCA} primeiros resultados. Refine a busca para ver outros.")
 
-    # TABELA
-    c.setFont("Helvetica-Bold", 10)
-    c.drawString(2 * cm, y, "Produtos:")
-    y -= 0.5 * cm
+    if not opcoes:
+        st.info("Nenhum produto encontrado.")
+        return None
 
-    c.setFont("Helvetica", 9)
-    for _, row in df.iterrows():
-        texto = (
-            f"{row['produto']} | "
-            f"Vendidos: {int(row['vendidos'])} | "
-            f"Renda: R$ {row['renda_atual']:,.2f}"
-        )
-        c.drawString(2 * cm, y, texto)
-        y -= 0.45 * cm
-
-        if y < 2 * cm:
-            c.showPage()
-            y = altura - 2 * cm
-            c.setFont("Helvetica", 9)
-
-    c.save()
-    return temp_file.name
-
-def registrar_venda(produto_id, quantidade, preco, lucro, data_venda):
-    conn = get_conn()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        INSERT INTO public.vendas_modarte
-        (produto_id, quantidade, data_venda, preco_unit, lucro_unit)
-        VALUES (%s,%s,%s,%s,%s)
-    """, (
-        produto_id,
-        quantidade,
-        data_venda,
-        preco,
-        lucro
-    ))
-
-    cursor.execute("""
-        UPDATE public.produtos
-        SET estoque_atual = estoque_atual - %s
-        WHERE id = %s
-    """, (quantidade, produto_id))
-
-    conn.commit()
+    return st.selectbox(rotulo, opcoes, format_func=rotulos.get, key=key) or None
 
 # =====================
-# CONFIGURAÇÕES
+# GRAVAÇÕES EM SEGUNDO PLANO
 # =====================
+# Os botões só enfileiram a escrita (dados.get_fila_escritas) e a página
+# continua respondendo. Cada formulário tem uma chave de gravação guardada
+# na sessão: clicar duas vezes reenvia a mesma chave e a escrita acontece
+# uma vez só. A chave troca quando a gravação termina.
 
-BASE_DIR = Path(__file__).parent
+MENSAGENS_ERRO = {
+    EstoqueInsuficiente: "Estoque insuficiente. Outro caixa pode ter vendido estas peças."
+}
 
-@st.cache_resource
-def get_conn():
-    return psycopg2.connect(
-        host=st.secrets["database"]["host"],
-        port=st.secrets["database"]["port"],
-        database=st.secrets["database"]["dbname"],
-        user=st.secrets["database"]["user"],
-        password=st.secrets["database"]["password"],
-        sslmode=st.secrets["database"]["sslmode"]
-    )
+def chave_gravacao(nome):
+    if nome not in st.session_state:
+        st.session_state[nome] = uuid.uuid4().hex
+    return st.session_state[nome]
 
-ESTOQUE_MINIMO = 5
+def gravando(nome):
+    return st.session_state.get(nome) in st.session_state.get("gravacoes", {})
 
-st.set_page_config(
-    page_title="MODARTE",
-    layout="wide",
-    initial_sidebar_state="expanded",
-    page_icon=str(BASE_DIR / "Logo_Modarte.jpg")
-)
+def enviar_gravacao(nome, mensagem, operacao, *args):
+    chave = chave_gravacao(nome)
 
-# =====================
-# CARREGAR DADOS
-# =====================
-    
-conn = get_conn()
+    try:
+        get_fila_escritas().enviar(chave, operacao, *args, offline=modo_offline())
+    except FilaCheia as erro:
+        st.error(f"❌ {erro}")
+        return
 
-df = pd.read_sql(
-    "SELECT * FROM public.produtos",
-    conn
-)
+    st.session_state.setdefault("gravacoes", {})[chave] = (nome, mensagem)
 
-# Garantir tipos corretos
-df["estoque_inicial"] = pd.to_numeric(df["estoque_inicial"], errors="coerce").fillna(0)
-df["estoque_atual"] = pd.to_numeric(df["estoque_atual"], errors="coerce").fillna(0)
-df["preco"] = pd.to_numeric(df["preco"], errors="coerce").fillna(0)
-df["lucro"] = pd.to_numeric(df["lucro"], errors="coerce").fillna(0)
+def concluir_gravacoes():
+    # Recolhe o que a fila já gravou e avisa o resultado
+    gravacoes = st.session_state.get("gravacoes", {})
+    fila = get_fila_escritas()
 
-# =====================
-# CÁLCULOS
-# =====================
-df["vendidos"] = (df["estoque_inicial"] - df["estoque_atual"]).clip(lower=0)
-df["renda_atual"] = df["vendidos"] * df["preco"]
-df["lucro_atual"] = df["vendidos"] * df["lucro"]
+    for chave, (nome, mensagem) in list(gravacoes.items()):
+        resultado = fila.resultado(chave)
+        if resultado is None:
+            continue
+
+        del gravacoes[chave]
+        st.session_state.pop(nome, None)
+        ok, valor = resultado
+
+        if ok:
+            st.toast(mensagem)
+            if nome == "gravacao_venda":
+                st.session_state.carrinho = []
+        else:
+            st.error(f"❌ {MENSAGENS_ERRO.get(type(valor), valor)}")
+
+@st.fragment(run_every=1)
+def aguardar_gravacoes():
+    # Só é desenhado com gravação pendente; ao terminar, roda a página toda
+    fila = get_fila_escritas()
+
+    if any(fila.resultado(chave) is not None for chave in st.session_state.gravacoes):
+        st.rerun()
+
+    st.caption(f"⏳ Gravando ({len(st.session_state.gravacoes)})...")
 
 # =====================
-# GERENCIAMENTO
+# CAIXA OFFLINE
 # =====================
+# Sem conexão com o banco o menu fica só com o caixa e as vendas são
+# guardadas no modarte_offline.db (ver dados.py e vendas_offline.py). Quando a
+# conexão volta, elas sobem no primeiro rerun; as que o banco recusar por
+# falta de estoque ficam listadas para alguém decidir.
 
-st.sidebar.title("⚙️ Gerenciamento")
+def situacao_offline(offline):
+    pendentes, conflitos = vendas_offline_pendentes()
 
-acao = st.sidebar.radio(
-    "Escolha uma ação:",
-    ["📦 Visualizar Produtos", "➕ Inserir Produto", "✏️ Alterar Produto", "💰 Registrar Venda", "🗑️ Excluir Produto"]
-)
+    if offline:
+        st.sidebar.warning(
+            f"📴 Sem conexão com o banco. As vendas ficam guardadas neste computador ({pendentes} pendentes)."
+        )
+        return
 
-if st.sidebar.button("❌ Encerrar aplicação"):
-    st.warning("Aplicação encerrada.")
-    st.stop()
+    if pendentes:
+        with st.spinner("📶 Sincronizando vendas feitas offline..."):
+            resultado = sincronizar_vendas_offline()
+
+        if resultado is not None:
+            gravados, _, novos_conflitos = resultado
+            conflitos += novos_conflitos
+            if gravados:
+                st.toast(f"📶 Vendas feitas offline gravadas no banco: {gravados}.")
+
+    if conflitos:
+        with st.sidebar.expander(f"⚠️ {conflitos} vendas offline sem estoque no banco", expanded=True):
+            st.dataframe(conflitos_offline(), hide_index=True, use_container_width=True)
+            st.caption("Outro caixa vendeu estas peças enquanto esta loja estava sem conexão.")
+
+            col_reenviar, col_descartar = st.columns(2)
+            if col_reenviar.button("🔁 Tentar de novo"):
+                resolver_conflitos_offline()
+                st.rerun()
+            if col_descartar.button("🗑️ Descartar"):
+                resolver_conflitos_offline(descartar=True)
+                st.rerun()
+
+# =====================
+# SEÇÕES
+# =====================
+# Cada ação do menu é uma função e só a escolhida roda, com as consultas de
+# que precisa. As partes interativas do painel e do histórico são
+# fragments: trocar filtro, página ou período reexecuta só aquele trecho.
 
-if acao == "➕ Inserir Produto":
+def secao_inserir_produto():
     st.subheader("➕ Inserir novo produto")
 
     with st.form("form_inserir"):
@@ -322,7 +355,7 @@ if acao == "➕ Inserir Produto":
         lucro = st.number_input("Lucro líquido (unidade)", min_value=0.0, step=0.01)
         codigo = st.text_input("Código do produto")
 
-        submit = st.form_submit_button("Salvar produto")
+        submit = st.form_submit_button("Salvar produto", disabled=gravando("gravacao_inserir"))
 
     if submit:
         novo = {
@@ -340,31 +373,45 @@ if acao == "➕ Inserir Produto":
         if not valido:
             st.error(f"❌ {msg}")
         else:
-            conn = get_conn()
-            cursor = conn.cursor()
-
-            cursor.execute("""
-            INSERT INTO public.produtos
-            (produto, foto, estoque_inicial, estoque_atual, preco, lucro, codigo)
-            VALUES (%s,%s,%s,%s,%s,%s,%s)
-            """, (
-                produto,
-                foto,
-                estoque_inicial,
-                estoque_atual,
-                preco,
-                lucro,
-                codigo
-            ))
-
-
-if acao == "✏️ Alterar Produto":
+            enviar_gravacao("gravacao_inserir", "➕ Produto inserido com sucesso!", "inserir_produto", novo)
+
+def secao_importar_planilha():
+    st.subheader("📥 Importar produtos da planilha")
+
+    st.caption(
+        "Colunas esperadas: PRODUTO, FOTO DO PRODUTO, ESTOQUE INICIAL, ESTOQUE ATUAL, "
+        "PREÇO FINAL, LUCRO LIQUIDO, CODIGO NF. Produtos com código já cadastrado são atualizados."
+    )
+
+    arquivo = st.file_uploader("Planilha (.xlsx)", type=["xlsx"])
+
+    if arquivo is not None and st.button("📥 Importar"):
+        with st.spinner("Importando..."):
+            resumo, relatorio = importar_planilha(arquivo)
+
+        st.success(
+            f"✅ {resumo['lidas']} linhas lidas: {resumo['inseridos']} inseridas, "
+            f"{resumo['atualizados']} atualizadas."
+        )
+
+        if not relatorio.empty:
+            st.error(f"❌ {resumo['com_erro']} linhas não foram importadas:")
+            st.dataframe(relatorio, hide_index=True, use_container_width=True)
+            st.download_button(
+                label="⬇️ Baixar relatório de erros",
+                data=relatorio.to_csv(index=False).encode("utf-8"),
+                file_name="erros_importacao.csv",
+                mime="text/csv"
+            )
+
+def secao_alterar_produto():
     st.subheader("✏️ Alterar produto")
 
-    produto_sel = st.selectbox("Selecione o produto", df["produto"])
+    produto_id = seletor_produto("Selecione o produto", key="alterar_produto")
+    row = produto_por_id(produto_id) if produto_id is not None else None
 
-    row = df[df["produto"] == produto_sel].iloc[0]
-    produto_id = int(row["id"])
+    if row is None:
+        return
 
     with st.form("form_editar"):
         produto = st.text_input("Produto", row["produto"])
@@ -374,270 +421,439 @@ if acao == "✏️ Alterar Produto":
         lucro = st.number_input("Lucro líquido (unidade)", value=float(row["lucro"]))
         codigo = st.text_input("Código do produto", row["codigo"])
 
-        submit = st.form_submit_button("Atualizar")
+        submit = st.form_submit_button("Atualizar", disabled=gravando("gravacao_alterar"))
 
     if submit:
-        conn = get_conn()
-        cursor = conn.cursor()
-        cursor.execute("""
-        UPDATE public.produtos
-        SET produto=%s, codigo=%s, preco=%s, lucro=%s,
-            estoque_inicial=%s, estoque_atual=%s
-        WHERE id=%s
-        """, (
-            produto,
-            codigo,
-            preco,
-            lucro,
-            estoque_inicial,
-            estoque_atual,
-            produto_id
-        ))
-
-
-        conn.commit()
-        st.success("✏️ Produto atualizado com sucesso!")
-        st.rerun()
+        enviar_gravacao("gravacao_alterar", "✏️ Produto atualizado com sucesso!", "atualizar_produto", produto_id, {
+            "produto": produto,
+            # Código em branco continua NULL (o índice de código é único)
+            "codigo": codigo or None,
+            "preco": preco,
+            "lucro": lucro,
+            "estoque_inicial": estoque_inicial,
+            "estoque_atual": estoque_atual
+        })
 
-if acao == "💰 Registrar Venda":
+def secao_registrar_venda():
     st.subheader("💰 Registrar Venda")
 
+    # Os itens se acumulam na sessão e o carrinho inteiro é gravado em uma
+    # única transação ao confirmar.
+    if "carrinho" not in st.session_state:
+        st.session_state.carrinho = []
+
+    carrinho = st.session_state.carrinho
+
     data_venda = st.date_input(
         "📅 Data da venda",
         value=datetime.today()
     )
     
-    produto_sel = st.selectbox(
-        "Produto",
-        df["produto"].tolist()
-    )
+    produto_id = seletor_produto("Produto", key="venda_produto")
+    row = produto_por_id(produto_id) if produto_id is not None else None
+
+    if row is not None:
+        # Desconta o que já foi colocado no carrinho
+        no_carrinho = sum(
+            item["quantidade"] for item in carrinho if item["produto_id"] == produto_id
+        )
+        estoque_disp = int(row["estoque_atual"]) - no_carrinho
+
+        def adicionar_ao_carrinho(produto_id, produto, preco, lucro):
+            carrinho.append({
+                "produto_id": produto_id,
+                "produto": produto,
+                "quantidade": int(st.session_state.quantidade_venda),
+                "preco": preco,
+                "lucro": lucro
+            })
 
-    row = df[df["produto"] == produto_sel].iloc[0]
+        if estoque_disp < 1:
+            st.warning("⚠️ Sem estoque disponível para este produto.")
+        else:
+            st.number_input(
+                "Quantidade vendida",
+                min_value=1,
+                max_value=estoque_disp,
+                step=1,
+                key="quantidade_venda"
+            )
 
-    estoque_disp = int(row["estoque_atual"])
+            st.button(
+                "🛒 Adicionar ao carrinho",
+                on_click=adicionar_ao_carrinho,
+                args=(produto_id, row["produto"], float(row["preco"]), float(row["lucro"])),
+                disabled=gravando("gravacao_venda")
+            )
 
-    quantidade = st.number_input(
-        "Quantidade vendida",
-        min_value=1,
-        max_value=estoque_disp,
-        step=1
-    )
+    if carrinho:
+        df_carrinho = pd.DataFrame(carrinho)
+        df_carrinho["total"] = df_carrinho["quantidade"] * df_carrinho["preco"]
 
-    if st.button("✅ Confirmar venda"):
-        registrar_venda(
-            produto_id=int(row["id"]),
-            quantidade=quantidade,
-            preco=float(row["preco"]),
-            lucro=float(row["lucro"]),
-            data_venda=datetime.combine(data_venda, datetime.min.time())
+        st.dataframe(
+            df_carrinho[["produto", "quantidade", "preco", "total"]],
+            hide_index=True,
+            use_container_width=True
         )
+        st.metric("🧾 Total da venda", f"R$ {df_carrinho['total'].sum():,.2f}")
 
-        st.success("✅ Venda registrada com sucesso!")
-        st.rerun()
+        col_confirmar, col_limpar = st.columns(2)
 
+        # Enquanto a venda grava, o carrinho fica como foi enviado
+        enviando = gravando("gravacao_venda")
 
-if acao == "🗑️ Excluir Produto":
+        with col_limpar:
+            st.button("🗑️ Limpar carrinho", on_click=carrinho.clear, disabled=enviando)
+
+        with col_confirmar:
+            confirmar_venda = st.button("✅ Confirmar venda", disabled=enviando)
+
+        if confirmar_venda:
+            enviar_gravacao(
+                "gravacao_venda",
+                "📴 Venda guardada offline. Ela sobe para o banco quando a conexão voltar."
+                if modo_offline() else "✅ Venda registrada com sucesso!",
+                "registrar_carrinho",
+                [dict(item) for item in carrinho],
+                datetime.combine(data_venda, datetime.min.time())
+            )
+
+def secao_excluir_produto():
     st.subheader("🗑️ Excluir produto")
 
-    produto_sel = st.selectbox(
-        "Selecione o produto",
-        df["produto"].unique()
-    )
+    produto_id = seletor_produto("Selecione o produto", key="excluir_produto")
+
+    if produto_id is None:
+        return
 
     st.warning("⚠️ Esta ação não pode ser desfeita.")
 
     confirmar = st.checkbox("Confirmo que desejo excluir este produto")
 
     if confirmar:
-        if st.button("🗑️ Excluir definitivamente"):
-            conn = get_conn()
-            cursor = conn.cursor()
+        if st.button("🗑️ Excluir definitivamente", disabled=gravando("gravacao_excluir_produto")):
+            enviar_gravacao(
+                "gravacao_excluir_produto",
+                "🗑️ Produto excluído com sucesso!",
+                "excluir_produto",
+                produto_id
+            )
+
+def secao_acessos():
+    st.subheader("👥 Acessos")
+
+    with st.form("form_revogar", clear_on_submit=True):
+        email = st.text_input("Email para revogar")
+
+        if st.form_submit_button("⛔ Revogar acesso"):
+            if not email.strip():
+                st.error("Informe o email.")
+            elif email.strip().lower() == st.session_state.user.email.lower():
+                st.error("Você não pode revogar o próprio acesso.")
+            else:
+                revogar_autorizacao(email)
+                st.success(f"⛔ Acesso de {email.strip()} revogado.")
+
+    revogados = emails_revogados()
+
+    if revogados.empty:
+        st.info("Nenhum acesso revogado.")
+        return
+
+    st.dataframe(revogados, hide_index=True, use_container_width=True)
+
+    email = st.selectbox("Reativar acesso", revogados["email"].tolist())
+
+    # O próximo acesso do email reativado é pelo link do Google
+    st.button("✅ Reativar", on_click=reativar_email, args=(email,))
+
+@st.fragment
+@trecho("Listagem de produtos")
+def listagem_produtos(produto_id):
+    df = filtrar_produto(carregar_produtos(), produto_id)
 
-            cursor.execute(
-                "DELETE FROM public.produtos WHERE produto=%s",
-                (produto_sel,)
+    st.subheader("🧾 Lista de Produtos")
+
+    col_ordem, col_tamanho, col_pagina = st.columns([2, 1, 1])
+
+    with col_ordem:
+        ordem = st.selectbox("Ordenar por", list(ORDENACOES))
+
+    with col_tamanho:
+        tamanho_pagina = st.selectbox("Por página", TAMANHOS_PAGINA)
+
+    paginas_produtos = total_paginas(df, tamanho_pagina)
+
+    # O filtro ou o tamanho da página podem ter encolhido a lista
+    if st.session_state.get("pagina_produtos", 1) > paginas_produtos:
+        st.session_state.pagina_produtos = paginas_produtos
+
+    with col_pagina:
+        pagina_atual = st.number_input(
+            f"Página (de {paginas_produtos})",
+            min_value=1,
+            max_value=paginas_produtos,
+            step=1,
+            key="pagina_produtos"
+        )
+
+    pagina = pagina_produtos(df, ordem, tamanho_pagina, pagina_atual)
+
+    fotos = pagina["foto"].tolist()
+    cards = formatar_cards(pagina)
+
+    for inicio in range(0, len(cards), COLUNAS_GRADE):
+        fim = inicio + COLUNAS_GRADE
+
+        for coluna, foto, card in zip(st.columns(COLUNAS_GRADE), fotos[inicio:fim], cards[inicio:fim]):
+            with coluna:
+                st.image(str(miniatura_produto(foto)), use_container_width=True)
+                st.markdown(card)
+
+@st.fragment
+def estoque_produtos():
+    # =====================
+    # FILTRO POR PRODUTO
+    # =====================
+    produto_id = seletor_produto("Filtrar produto:", key="filtro_produto", opcao_todos=True)
+
+    # =====================
+    # ALERTA ESTOQUE BAIXO
+    # =====================
+    with trecho("Alerta de estoque baixo"):
+        reposicao = filtrar_produto(reposicao_produtos(), produto_id)
+        estoque_baixo = reposicao[reposicao["repor"]].sort_values("dias_estoque")
+
+        if not estoque_baixo.empty:
+            st.error("🚨 Produtos com estoque baixo!")
+            st.caption(
+                f"Velocidade das vendas dos últimos {JANELA_DIAS} dias; ponto de "
+                f"reposição para {PRAZO_REPOSICAO_DIAS} dias de prazo de entrega."
+            )
+            st.dataframe(
+                estoque_baixo[["produto", "estoque_atual", "velocidade_dia", "dias_estoque", "ponto_reposicao"]],
+                hide_index=True,
+                use_container_width=True
             )
 
-            conn.commit()
-            st.success("🗑️ Produto excluído com sucesso!")
-            st.rerun()
+    st.markdown("---")
 
-if acao == "📦 Visualizar Produtos":
-    # aqui fica TODO o painel que você já construiu
-    pass             
+    listagem_produtos(produto_id)
+
+@st.fragment
+def exportacao_vendas():
+    # =====================
+    # LIVRO DE VENDAS
+    # =====================
+    # Filtros vão para o SQL; o arquivo só é gerado no clique do download
+    col_periodo, col_formato = st.columns([3, 1])
+
+    with col_periodo:
+        periodo = st.date_input(
+            "📅 Período",
+            value=(date.today().replace(month=1, day=1), date.today()),
+            key="exportar_periodo"
+        )
 
-# =====================
-# KPIs TOPO
-# =====================
-st.title("📦 Painel de Produtos")
+    with col_formato:
+        formato = st.radio("Formato", list(FORMATOS), horizontal=True, key="exportar_formato")
+
+    produto_id = seletor_produto("Produto", key="exportar_produto", opcao_todos=True)
 
-kpi1, kpi2, kpi3, kpi4 = st.columns(4)
+    inicio, fim = (periodo[0], periodo[-1]) if periodo else (date.today(), date.today())
+    extensao, mime = FORMATOS[formato]
 
-with kpi1:
-    st.metric("💰 Renda Total", f"R$ {df['renda_atual'].sum():,.2f}")
+    st.download_button(
+        label="⬇️ Baixar vendas",
+        data=lambda: relatorio_vendas(inicio, fim, produto_id, formato),
+        file_name=f"vendas_modarte_{inicio:%Y%m%d}_{fim:%Y%m%d}.{extensao}",
+        mime=mime,
+        on_click="ignore"
+    )
 
-with kpi2:
-    st.metric("📈 Lucro Total", f"R$ {df['lucro_atual'].sum():,.2f}")
+def secao_painel():
+    with trecho("Carregar produtos"):
+        df = carregar_produtos()
 
-with kpi3:
-    st.metric("🛒 Produtos Vendidos", int(df["vendidos"].sum()))
+    # =====================
+    # KPIs TOPO
+    # =====================
+    st.title("📦 Painel de Produtos")
 
-with kpi4:
-    st.metric("📦 Estoque Total", int(df["estoque_atual"].sum()))
+    with trecho("KPIs"):
+        kpi1, kpi2, kpi3, kpi4 = st.columns(4)
+
+        with kpi1:
+            st.metric("💰 Renda Total", f"R$ {df['renda_atual'].sum():,.2f}")
+
+        with kpi2:
+            st.metric("📈 Lucro Total", f"R$ {df['lucro_atual'].sum():,.2f}")
+
+        with kpi3:
+            st.metric("🛒 Produtos Vendidos", int(df["vendidos"].sum()))
+
+        with kpi4:
+            st.metric("📦 Estoque Total", int(df["estoque_atual"].sum()))
     
-st.markdown("### 🧾 Relatórios")
+    st.markdown("### 🧾 Relatórios")
+
+    if st.button("📄 Exportar relatório em PDF"):
+        with trecho("Exportar PDF"):
+            pdf = relatorio_produtos()
 
-if st.button("📄 Exportar relatório em PDF"):
-    pdf_path = gerar_pdf(df)
-    with open(pdf_path, "rb") as f:
         st.download_button(
             label="⬇️ Baixar PDF",
-            data=f,
+            data=pdf,
             file_name="relatorio_modarte.pdf",
             mime="application/pdf"
         )
 
-st.markdown("---")
+    with st.expander("📑 Exportar vendas (CSV / Excel)"):
+        exportacao_vendas()
 
-# =====================
-# FILTRO POR PRODUTO
-# =====================
-produtos = ["Todos"] + sorted(df["produto"].dropna().unique().tolist())
-produto_selecionado = st.selectbox("🔎 Filtrar produto:", produtos)
+    st.markdown("---")
 
-if produto_selecionado != "Todos":
-    df = df[df["produto"] == produto_selecionado]
+    estoque_produtos()
 
-# =====================
-# ALERTA ESTOQUE BAIXO
-# =====================
-estoque_baixo = df[df["estoque_atual"] <= ESTOQUE_MINIMO]
+@st.fragment
+@trecho("Painel de vendas")
+def secao_historico_vendas():
+    # =====================
+    # DASHBOARD DE VENDAS
+    # =====================
+    st.subheader("📊 Dashboard - Histórico de Vendas")
 
-if not estoque_baixo.empty:
-    st.error("🚨 Produtos com estoque baixo!")
-    st.dataframe(
-        estoque_baixo[["produto", "estoque_atual"]],
-        use_container_width=True
-    )
+    col_produto, col_periodo = st.columns(2)
 
-st.markdown("---")
+    with col_produto:
+        produto_sel = seletor_produto("Produto", key="historico_produto")
 
-# =====================
-# DASHBOARD DE VENDAS
-# =====================
-st.subheader("📊 Dashboard - Histórico de Vendas")
-
-conn = get_conn()
-
-df_vendas = pd.read_sql("""
-SELECT
-    v.id,
-    v.produto_id,
-    p.produto,
-    v.data_venda,
-    v.quantidade,
-    v.preco_unit,
-    v.lucro_unit
-FROM public.vendas_modarte v
-JOIN public.produtos p ON p.id = v.produto_id
-ORDER BY v.data_venda DESC
-""", conn)
-
-if not df_vendas.empty:
-    df_vendas["data_venda"] = pd.to_datetime(df_vendas["data_venda"])
-
-    produto_sel = st.selectbox(
-        "Produto",
-        df_vendas["produto"].unique()
-    )
+    if produto_sel is not None:
+        with col_periodo:
+            periodo = st.date_input(
+                "📅 Período",
+                value=(date.today() - timedelta(days=90), date.today())
+            )
 
-    df_prod = df_vendas[df_vendas["produto"] == produto_sel]
+        # Enquanto o usuário escolhe o intervalo, só a data inicial existe
+        inicio, fim = (periodo[0], periodo[-1]) if periodo else (date.today(), date.today())
 
-    st.line_chart(
-        df_prod.groupby(df_prod["data_venda"].dt.date)["quantidade"].sum()
-    )
+        # Mudou o filtro: volta para a primeira página
+        filtro = (produto_sel, inicio, fim)
+        if st.session_state.get("historico_filtro") != filtro:
+            st.session_state.historico_filtro = filtro
+            st.session_state.historico_paginas = [None]
 
-    st.dataframe(df_prod, use_container_width=True)
+        paginas = st.session_state.historico_paginas
 
-    st.markdown("### 🗑️ Excluir Venda")
+        granularidade = st.radio(
+            "Agrupar por",
+            list(GRANULARIDADES),
+            horizontal=True
+        )
 
-    produto_excluir = st.selectbox(
-        "📦 Selecione o produto",
-        df_vendas["produto"].unique()
-    )
+        st.line_chart(serie_vendas(produto_sel, inicio, fim, granularidade))
 
-    df_vendas_produto = df_vendas[
-        df_vendas["produto"] == produto_excluir
-    ].copy()
+        df_prod, tem_mais = historico_vendas(produto_sel, inicio, fim, apos=paginas[-1])
 
-    df_vendas_produto["label"] = df_vendas_produto.apply(
-        lambda x: f"{x['data_venda'].date()} | {x['quantidade']} un | R$ {(x['quantidade'] * x['preco_unit']):,.2f}",
-        axis=1
-    )
+        st.dataframe(df_prod, use_container_width=True)
 
-    venda_sel = st.selectbox(
-        "🧾 Selecione a venda",
-        df_vendas_produto["label"]
-    )
+        col_anterior, col_pagina, col_proxima = st.columns([1, 2, 1])
+
+        # Callbacks mudam a página antes do rerun do fragment
+        with col_anterior:
+            st.button("⬅️ Anterior", disabled=len(paginas) == 1, on_click=paginas.pop)
+
+        with col_pagina:
+            st.caption(f"Página {len(paginas)}")
+
+        with col_proxima:
+            st.button(
+                "Próxima ➡️",
+                disabled=not tem_mais,
+                on_click=paginas.append,
+                args=(chave_pagina(df_prod) if tem_mais else None,)
+            )
+
+        st.markdown("### 🗑️ Excluir Venda")
+
+        if df_prod.empty:
+            st.info("Nenhuma venda no período selecionado.")
+            venda_sel = None
+        else:
+            labels = (
+                df_prod["data_venda"].dt.date.astype(str)
+                + " | " + df_prod["quantidade"].astype(str) + " un | R$ "
+                + (df_prod["quantidade"] * df_prod["preco_unit"]).map("{:,.2f}".format)
+            )
+
+            venda_sel = st.selectbox(
+                "🧾 Selecione a venda",
+                df_prod.index,
+                format_func=labels.get
+            )
+
+        excluindo = gravando("gravacao_excluir_venda")
+
+        if venda_sel is not None and st.button("❌ Excluir venda selecionada", disabled=excluindo):
+            venda = df_prod.loc[venda_sel]
+
+            enviar_gravacao(
+                "gravacao_excluir_venda",
+                "🗑️ Venda excluída e estoque ajustado com sucesso!",
+                "excluir_venda",
+                int(venda["id"]),
+                int(venda["produto_id"]),
+                int(venda["quantidade"]),
+                venda["data_venda"].to_pydatetime()
+            )
 
-    if st.button("❌ Excluir venda selecionada"):
-        venda = df_vendas_produto[
-            df_vendas_produto["label"] == venda_sel
-        ].iloc[0]
-    
-        conn = get_conn()
-        cursor = conn.cursor()
-    
-        # Devolver estoque
-        cursor.execute("""
-            UPDATE public.produtos
-            SET estoque_atual = estoque_atual + %s
-            WHERE id = %s
-        """, (
-            int(venda["quantidade"]),
-            int(venda["produto_id"])
-        ))
-    
-        # Excluir venda
-        cursor.execute("""
-            DELETE FROM public.vendas_modarte
-            WHERE id = %s
-        """, (int(venda["id"]),))
-    
-        conn.commit()
-    
-        st.success("🗑️ Venda excluída e estoque ajustado com sucesso!")
-        st.rerun()
-else:
-    st.info("Nenhuma venda registrada ainda.")
 
 # =====================
-# LISTAGEM DE PRODUTOS
+# GERENCIAMENTO
 # =====================
-st.subheader("🧾 Lista de Produtos")
 
-for _, row in df.iterrows():
-    #st.markdown("—")
-    col1, col2 = st.columns([1, 3])
+SECOES = {
+    "📦 Visualizar Produtos": secao_painel,
+    "📊 Histórico de Vendas": secao_historico_vendas,
+    "➕ Inserir Produto": secao_inserir_produto,
+    "📥 Importar Planilha": secao_importar_planilha,
+    "✏️ Alterar Produto": secao_alterar_produto,
+    "💰 Registrar Venda": secao_registrar_venda,
+    "🗑️ Excluir Produto": secao_excluir_produto
+}
 
-    with col1:
-        img_path = BASE_DIR / str(row["foto"])
-        img_logo = BASE_DIR / "Logo_Modarte.jpg"
-        if img_path.exists():
-            st.image(str(img_path), use_container_width=True)
-        else:
-            st.image(str(img_logo), use_container_width=True)
-
-    with col2:
-        st.subheader(row["produto"])
-        st.write(f"📦 **Estoque Inicial:** {int(row['estoque_inicial'])}")
-        st.write(f"📦 **Estoque Atual:** {int(row['estoque_atual'])}")
-        st.write(f"🛒 **Vendidos:** {int(row['vendidos'])}")
-        st.write(f"💰 **Preço:** R$ {row['preco']:,.2f}")
-        st.write(f"📈 **Lucro unidade:** R$ {row['lucro']:,.2f}")
-        st.write(f"💵 **Renda Atual:** R$ {row['renda_atual']:,.2f}")
-        st.write(f"🏆 **Lucro Atual:** R$ {row['lucro_atual']:,.2f}")
-    
+if administrador(st.session_state.user.email):
+    SECOES["👥 Acessos"] = secao_acessos
 
-    st.markdown("---")
+st.sidebar.title("⚙️ Gerenciamento")
+
+offline = modo_offline()
+
+acao = st.sidebar.radio(
+    "Escolha uma ação:",
+    ["💰 Registrar Venda"] if offline else list(SECOES)
+)
+
+if st.sidebar.button("❌ Encerrar aplicação"):
+    st.warning("Aplicação encerrada.")
+    st.stop()
+
+mostrar_desempenho = st.sidebar.toggle("⏱️ Painel de desempenho")
+
+situacao_offline(offline)
+concluir_gravacoes()
+
+# Tempos e consultas SQL deste rerun (ver instrumentacao.py)
+iniciar_medicao(acao)
+try:
+    SECOES[acao]()
+finally:
+    medicao = finalizar_medicao()
+
+if st.session_state.get("gravacoes"):
+    with st.sidebar:
+        aguardar_gravacoes()
 
+if mostrar_desempenho:
+    painel_desempenho(medicao, {"Snapshot de produtos": memoria_produtos()})
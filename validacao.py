@@ -0,0 +1,53 @@
+import pandas as pd
+
+CAMPOS_TEXTO = ["produto", "foto", "codigo"]
+CAMPOS_NUM = ["estoque_inicial", "estoque_atual", "preco", "lucro"]
+CAMPOS_INTEIROS = ["estoque_inicial", "estoque_atual"]
+
+def validar_produto(dados):
+    for campo in CAMPOS_TEXTO:
+        if not dados[campo] or str(dados[campo]).strip() == "":
+            return False, f"Campo '{campo}' não pode ficar vazio."
+
+    for campo in CAMPOS_NUM:
+        if dados[campo] <= 0:
+            return False, f"Campo '{campo}' deve ser maior que zero."
+
+    for campo in CAMPOS_INTEIROS:
+        if dados[campo] != int(dados[campo]):
+            return False, f"Campo '{campo}' deve ser um número inteiro."
+
+    if dados["estoque_atual"] > dados["estoque_inicial"]:
+        return False, "Estoque atual não pode ser maior que o estoque inicial."
+
+    return True, ""
+
+def validar_produtos(df, campos_texto=CAMPOS_TEXTO):
+    # Mesmas regras e mensagens de validar_produto, aplicadas à tabela
+    # inteira de uma vez (números ausentes ou não numéricos são inválidos).
+    # campos_texto: os textos obrigatórios (a importação não exige a foto).
+    # Devolve o erro de cada linha ("" quando válida).
+    erros = pd.Series("", index=df.index)
+
+    def marcar(invalido, mensagem):
+        erros[invalido & (erros == "")] = mensagem
+
+    for campo in campos_texto:
+        texto = df[campo].astype("string").str.strip()
+        marcar(texto.isna() | (texto == ""), f"Campo '{campo}' não pode ficar vazio.")
+
+    numeros = df[CAMPOS_NUM].apply(pd.to_numeric, errors="coerce")
+
+    for campo in CAMPOS_NUM:
+        marcar(~(numeros[campo] > 0), f"Campo '{campo}' deve ser maior que zero.")
+
+    # Sem isso 3.5 seria arredondado pelo banco (estoque é integer)
+    for campo in CAMPOS_INTEIROS:
+        marcar(numeros[campo] % 1 != 0, f"Campo '{campo}' deve ser um número inteiro.")
+
+    marcar(
+        numeros["estoque_atual"] > numeros["estoque_inicial"],
+        "Estoque atual não pode ser maior que o estoque inicial."
+    )
+
+    return erros
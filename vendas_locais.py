@@ -0,0 +1,262 @@
+import json
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# =====================
+# SNAPSHOT LOCAL DAS VENDAS (ARROW)
+# =====================
+# Cópia colunar de vendas_modarte num arquivo Arrow IPC, lida por memory map
+# (o sistema carrega só as páginas usadas, sem copiar para o processo). A
+# cada escrita o snapshot busca no banco só o que mudou: vendas com id acima
+# da última vista ou atualizada_em recente, e as lápides de vendas_excluidas.
+#
+# As marcas d'água ficam nos metadados do próprio arquivo. Elas recuam
+# MARGEM_SINCRONIZACAO a cada busca, porque uma transação que começou antes
+# pode gravar depois; a aplicação é idempotente (por id).
+#
+# As linhas ficam ordenadas por (produto_id, data_venda, id): as vendas de
+# um produto num período são uma fatia contínua, achada por busca binária.
+#
+# Cada sincronização grava só o que mudou num arquivo delta
+# (delta_NNNNNN_KKKKKK.arrow: as vendas novas ou alteradas e, nos metadados,
+# os ids apagados), sem reescrever o histórico. Os deltas ficam em memória
+# por cima da base (vendas_NNNNNN.arrow). Depois de COMPACTAR_APOS_ARQUIVOS
+# deltas, ou quando as vendas alteradas passam de 1/COMPACTAR_FRACAO da base
+# (até COMPACTAR_APOS_LINHAS), tudo vira uma base nova: reescrever o
+# histórico custa, em média, poucas linhas por venda alterada.
+# É sempre um arquivo novo em vez de sobrescrever: no Windows um arquivo
+# mapeado não pode ser substituído. Apagar a pasta força uma recarga
+# completa.
+
+ESQUEMA = pa.schema([
+    ("id", pa.int64()),
+    ("produto_id", pa.int32()),
+    ("data_venda", pa.timestamp("us")),
+    ("quantidade", pa.int32()),
+    ("preco_unit", pa.float64()),
+    ("lucro_unit", pa.float64()),
+    ("atualizada_em", pa.timestamp("us", tz="UTC")),
+])
+
+ORDEM = [("produto_id", "ascending"), ("data_venda", "ascending"), ("id", "ascending")]
+
+MARGEM_SINCRONIZACAO = timedelta(minutes=5)
+
+COMPACTAR_APOS_ARQUIVOS = 50
+COMPACTAR_APOS_LINHAS = 50_000
+COMPACTAR_FRACAO = 10
+
+MARCAS_INICIAIS = {"ultimo_id": 0, "modificada_ate": None, "excluida_ate": None}
+
+
+def _recuar(marca):
+    return None if marca is None else datetime.fromisoformat(marca) - MARGEM_SINCRONIZACAO
+
+
+def _maior(atual, valores):
+    # Maior entre a marca guardada (texto ISO) e uma coluna de timestamps
+    if valores.empty:
+        return atual
+    maior = pd.Timestamp(valores.max()).isoformat()
+    return maior if atual is None or datetime.fromisoformat(maior) > datetime.fromisoformat(atual) else atual
+
+
+def _escrever(caminho, tabela, metadados):
+    temporario = caminho.with_suffix(".tmp")
+    tabela = tabela.replace_schema_metadata(metadados)
+
+    with pa.OSFile(str(temporario), "wb") as arquivo:
+        with pa.ipc.new_file(arquivo, tabela.schema) as escritor:
+            escritor.write_table(tabela)
+
+    temporario.replace(caminho)
+
+
+def _fatia_ordenada(tabela, produto_id, desde=None, ate=None):
+    # Linhas do produto com desde <= data_venda < ate numa tabela em ORDEM
+    produtos = tabela["produto_id"].to_numpy()
+    inicio, fim = np.searchsorted(produtos, [produto_id, produto_id + 1])
+    fatia = tabela.slice(inicio, fim - inicio)
+
+    if desde is not None:
+        datas = fatia["data_venda"].to_numpy()
+        inicio, fim = np.searchsorted(datas, [np.datetime64(desde, "us"), np.datetime64(ate, "us")])
+        fatia = fatia.slice(inicio, fim - inicio)
+
+    return fatia
+
+
+class SnapshotVendas:
+    def __init__(self, pasta):
+        self.pasta = Path(pasta)
+        self.pasta.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+
+        bases = self._bases()
+        if bases:
+            self._abrir(bases[-1])
+        else:
+            self.geracao = 0
+            self.base = ESQUEMA.empty_table()
+            self.marcas = dict(MARCAS_INICIAIS)
+            self._limpar_delta()
+
+        for caminho in self._deltas():
+            with pa.OSFile(str(caminho)) as arquivo:
+                tabela = pa.ipc.open_file(arquivo).read_all()
+            metadados = tabela.schema.metadata
+            self._aplicar(tabela, json.loads(metadados[b"excluidas"]))
+            self.marcas = json.loads(metadados[b"marcas"])
+            self.arquivos_delta += 1
+
+    def _bases(self):
+        return sorted(self.pasta.glob("vendas_*.arrow"))
+
+    def _deltas(self):
+        return sorted(self.pasta.glob(f"delta_{self.geracao:06d}_*.arrow"))
+
+    def _limpar_delta(self):
+        self.delta = ESQUEMA.empty_table()
+        self.fora = np.empty(0, dtype=np.int64)
+        self.arquivos_delta = 0
+
+    def _abrir(self, caminho):
+        self.base = pa.ipc.open_file(pa.memory_map(str(caminho))).read_all()
+        self.marcas = json.loads(self.base.schema.metadata[b"marcas"])
+        self.geracao = int(caminho.stem.split("_")[1])
+        self._limpar_delta()
+
+    def _aplicar(self, linhas, excluidas):
+        # linhas: versão nova das vendas; excluidas: ids apagados
+        fora = np.union1d(linhas["id"].to_numpy(), np.asarray(excluidas, dtype=np.int64))
+        mantidas = self.delta.filter(pc.invert(pc.is_in(self.delta["id"], value_set=pa.array(fora))))
+
+        self.delta = pa.concat_tables([mantidas, linhas.cast(ESQUEMA)]).sort_by(ORDEM).combine_chunks()
+        self.fora = np.union1d(self.fora, fora)
+
+    def _base_visivel(self, tabela):
+        # Tira da base as vendas alteradas ou apagadas desde a compactação
+        if not len(self.fora):
+            return tabela
+        return tabela.filter(pc.invert(pc.is_in(tabela["id"], value_set=pa.array(self.fora))))
+
+    def _linhas(self, ids):
+        # Versão local atual das vendas com estes ids
+        valores = pa.array(ids, type=pa.int64())
+        base = self._base_visivel(self.base.filter(pc.is_in(self.base["id"], value_set=valores)))
+        delta = self.delta.filter(pc.is_in(self.delta["id"], value_set=valores))
+        return pa.concat_tables([base.cast(ESQUEMA), delta])
+
+    def _gravar_delta(self, linhas, excluidas, marcas):
+        caminho = self.pasta / f"delta_{self.geracao:06d}_{self.arquivos_delta + 1:06d}.arrow"
+        _escrever(caminho, linhas, {"marcas": json.dumps(marcas), "excluidas": json.dumps(excluidas)})
+
+        self._aplicar(linhas, excluidas)
+        self.marcas = marcas
+        self.arquivos_delta += 1
+
+        limite = min(COMPACTAR_APOS_LINHAS, self.base.num_rows // COMPACTAR_FRACAO)
+        if self.arquivos_delta >= COMPACTAR_APOS_ARQUIVOS or len(self.fora) > limite:
+            self._compactar()
+
+    def _compactar(self):
+        # Base + deltas num arquivo novo; os antigos são apagados
+        tabela = pa.concat_tables([self._base_visivel(self.base).cast(ESQUEMA), self.delta])
+        caminho = self.pasta / f"vendas_{self.geracao + 1:06d}.arrow"
+        _escrever(caminho, tabela.sort_by(ORDEM).combine_chunks(), {"marcas": json.dumps(self.marcas)})
+        self._abrir(caminho)
+
+        # O que ainda estiver mapeado (Windows) fica para a próxima compactação
+        antigos = self._bases()[:-1] + [
+            delta for delta in self.pasta.glob("delta_*.arrow")
+            if int(delta.stem.split("_")[1]) < self.geracao
+        ]
+        for antigo in antigos:
+            try:
+                antigo.unlink()
+            except OSError:
+                pass
+
+    def sincronizar(self, repo):
+        # repo: RepositorioPostgres. Devolve quantas linhas mudaram.
+        with self.lock:
+            marcas = self.marcas
+            novas = repo.vendas_alteradas(marcas["ultimo_id"], _recuar(marcas["modificada_ate"]))
+            excluidas = repo.vendas_excluidas(_recuar(marcas["excluida_ate"]))
+
+            novas["atualizada_em"] = pd.to_datetime(novas["atualizada_em"], utc=True)
+            excluidas["excluida_em"] = pd.to_datetime(excluidas["excluida_em"], utc=True)
+
+            ids_excluidos = excluidas["venda_id"].to_numpy(dtype=np.int64)
+            locais = self._linhas(np.concatenate([novas["id"].to_numpy(dtype=np.int64), ids_excluidos]))
+            atualizada_local = pd.Series(
+                locais["atualizada_em"].to_pandas().to_numpy(),
+                index=locais["id"].to_numpy()
+            )
+
+            # A margem traz de volta linhas já aplicadas: só conta o que mudou
+            novas = novas[(novas["id"].map(atualizada_local) != novas["atualizada_em"]).to_numpy()]
+            removidas = [int(venda_id) for venda_id in np.intersect1d(ids_excluidos, atualizada_local.index)]
+
+            novas_marcas = {
+                "ultimo_id": max(marcas["ultimo_id"], int(novas["id"].max()) if not novas.empty else 0),
+                "modificada_ate": _maior(marcas["modificada_ate"], novas["atualizada_em"]),
+                "excluida_ate": _maior(marcas["excluida_ate"], excluidas["excluida_em"]),
+            }
+
+            if novas.empty and not removidas:
+                # Nada a gravar; as marcas só andam junto com um arquivo novo
+                return 0
+
+            delta = pa.Table.from_pandas(novas, schema=ESQUEMA, preserve_index=False)
+            self._gravar_delta(delta, removidas, novas_marcas)
+            return len(novas) + len(removidas)
+
+    def _fatia(self, produto_id, desde=None, ate=None):
+        # Vendas do produto com desde <= data_venda < ate: a fatia da base
+        # (sem copiar dados) mais a do delta, que é pequeno
+        fatia = self._base_visivel(_fatia_ordenada(self.base, produto_id, desde, ate))
+        recentes = _fatia_ordenada(self.delta, produto_id, desde, ate)
+
+        if not recentes.num_rows:
+            return fatia
+        return pa.concat_tables([fatia.cast(ESQUEMA), recentes]).sort_by(ORDEM)
+
+    def pagina(self, produto_id, desde, ate, apos, limite):
+        # Mesma ordem e chave de SQL_PAGINA_VENDAS: (data_venda, id) decrescente
+        fatia = self._fatia(produto_id, desde, ate)
+
+        if apos is not None:
+            chaves = pd.DataFrame({
+                "data_venda": fatia["data_venda"].to_numpy(),
+                "id": fatia["id"].to_numpy()
+            })
+            antes = (chaves["data_venda"] < apos[0]) | (
+                (chaves["data_venda"] == apos[0]) & (chaves["id"] < apos[1])
+            )
+            fatia = fatia.slice(0, int(antes.sum()))
+
+        inicio = max(fatia.num_rows - limite, 0)
+        df = fatia.slice(inicio).drop_columns("atualizada_em").to_pandas()
+        return df.iloc[::-1].reset_index(drop=True)
+
+    def serie(self, produto_id, desde, ate, granularidade):
+        # Mesmo formato de SQL_SERIE_VENDAS: (periodo, quantidade)
+        fatia = self._fatia(produto_id, desde, ate)
+        dias = fatia["data_venda"].to_numpy().astype("datetime64[D]")
+
+        if granularidade == "Semana":
+            # Segunda-feira da semana, como o date_trunc('week'); 1970-01-01
+            # foi uma quinta
+            dias = dias - (dias.view("int64") + 3) % 7
+        elif granularidade == "Mês":
+            dias = dias.astype("datetime64[M]").astype("datetime64[D]")
+
+        df = pd.DataFrame({"periodo": dias, "quantidade": fatia["quantidade"].to_numpy()})
+        return df.groupby("periodo", as_index=False)["quantidade"].sum()
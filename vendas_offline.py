@@ -0,0 +1,210 @@
+import sqlite3
+import uuid
+
+import pandas as pd
+
+from repositorio import EstoqueInsuficiente, RepositorioSQLite, _texto_data
+
+# =====================
+# CAIXA OFFLINE (modarte_offline.db)
+# =====================
+# Sem internet o Supabase não responde, mas o caixa continua vendendo: as
+# vendas e a baixa de estoque vão para um SQLite próprio (não o modarte.db,
+# que é a base antiga migrada por Banco_Modarte_Supabase_teste.py), com o
+# esquema do modarte.db mais as colunas chave e conflito. O catálogo local é
+# um espelho do banco, copiado quando o app recarrega os produtos com
+# conexão e eles mudaram (dados.py).
+#
+# Cada carrinho guarda a chave de idempotência da gravação (coluna chave).
+# Quando a conexão volta, sincronizar() sobe os carrinhos na ordem em que
+# foram vendidos, em transações de até LOTE_SINCRONIZACAO carrinhos:
+# - a chave vai para escritas_aplicadas junto com a venda, então repetir a
+#   sincronização (queda no meio, duas sessões) não duplica nada;
+# - a baixa no banco é condicional como no app: se outro caixa vendeu as
+#   peças enquanto esta loja estava offline, o carrinho fica marcado como
+#   conflito (coluna conflito) e não entra, sem desfazer os outros.
+
+LOTE_SINCRONIZACAO = 50
+
+ESQUEMA_OFFLINE = """
+    CREATE TABLE IF NOT EXISTS produtos (
+        id INTEGER PRIMARY KEY,
+        produto TEXT,
+        codigo TEXT,
+        preco REAL,
+        lucro REAL,
+        estoque_inicial INTEGER,
+        estoque_atual INTEGER,
+        foto TEXT
+    );
+    CREATE TABLE IF NOT EXISTS vendas (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        produto_id INTEGER,
+        quantidade INTEGER,
+        data_venda TEXT,
+        preco_unit REAL,
+        lucro_unit REAL,
+        chave TEXT,
+        conflito TEXT
+    );
+"""
+
+
+class RepositorioOffline(RepositorioSQLite):
+    def __init__(self, caminho, fabrica_conexao=sqlite3.Connection):
+        # O arquivo é criado na primeira vez; os índices vêm do RepositorioSQLite
+        conn = sqlite3.connect(str(caminho))
+        try:
+            conn.executescript(ESQUEMA_OFFLINE)
+        finally:
+            conn.close()
+
+        super().__init__(caminho, fabrica_conexao)
+
+        with self.transacao() as conn:
+            # Arquivos de antes das colunas de sincronização
+            colunas = {linha[1] for linha in conn.execute("PRAGMA table_info(vendas)")}
+            for coluna in ("chave", "conflito"):
+                if coluna not in colunas:
+                    conn.execute(f"ALTER TABLE vendas ADD COLUMN {coluna} TEXT")
+
+            conn.execute("CREATE INDEX IF NOT EXISTS vendas_chave ON vendas (chave)")
+
+    # ----- vendas offline -----
+
+    def registrar_carrinho(self, itens, data_venda, chave=None):
+        # Sem chave o carrinho não teria como ser conferido no banco. Ela
+        # vai em cada item para _inserir_itens gravar na coluna chave.
+        chave = chave or uuid.uuid4().hex
+        itens = [dict(item, chave=chave) for item in itens]
+        return super().registrar_carrinho(itens, data_venda, chave)
+
+    def _inserir_itens(self, conn, itens, data_venda):
+        conn.executemany("""
+            INSERT INTO vendas
+            (produto_id, quantidade, data_venda, preco_unit, lucro_unit, chave)
+            VALUES (?,?,?,?,?,?)
+        """, [
+            (item["produto_id"], item["quantidade"], _texto_data(data_venda), item["preco"], item["lucro"], item["chave"])
+            for item in itens
+        ])
+
+    def contar_pendentes(self):
+        # (carrinhos a sincronizar, carrinhos em conflito)
+        with self.transacao() as conn:
+            return conn.execute("""
+                SELECT
+                    COUNT(DISTINCT CASE WHEN conflito IS NULL THEN chave END),
+                    COUNT(DISTINCT CASE WHEN conflito IS NOT NULL THEN chave END)
+                FROM vendas
+                WHERE chave IS NOT NULL
+            """).fetchone()
+
+    def carrinhos_pendentes(self):
+        # [(chave, data_venda, itens)] na ordem em que foram vendidos
+        with self.transacao() as conn:
+            linhas = conn.execute("""
+                SELECT chave, data_venda, produto_id, quantidade, preco_unit, lucro_unit
+                FROM vendas
+                WHERE chave IS NOT NULL AND conflito IS NULL
+                ORDER BY id
+            """).fetchall()
+
+        carrinhos = {}
+        for chave, data_venda, produto_id, quantidade, preco, lucro in linhas:
+            _, _, itens = carrinhos.setdefault(chave, (chave, data_venda, []))
+            itens.append({"produto_id": produto_id, "quantidade": quantidade, "preco": preco, "lucro": lucro})
+
+        return list(carrinhos.values())
+
+    def concluir(self, sincronizadas, conflitos):
+        # sincronizadas: chaves que já estão no banco; conflitos: chave → motivo
+        with self.transacao() as conn:
+            conn.executemany("DELETE FROM vendas WHERE chave = ?", [(chave,) for chave in sincronizadas])
+            conn.executemany(
+                "UPDATE vendas SET conflito = ? WHERE chave = ?",
+                [(motivo, chave) for chave, motivo in conflitos.items()]
+            )
+
+    def vendas_em_conflito(self):
+        with self.transacao() as conn:
+            return pd.read_sql("""
+                SELECT v.data_venda, COALESCE(p.produto, '') AS produto, v.quantidade, v.conflito
+                FROM vendas v
+                LEFT JOIN produtos p ON p.id = v.produto_id
+                WHERE v.chave IS NOT NULL AND v.conflito IS NOT NULL
+                ORDER BY v.id
+            """, conn)
+
+    def reenviar_conflitos(self):
+        # Depois de repor o estoque no banco: tentam de novo na próxima sincronização
+        with self.transacao() as conn:
+            conn.execute("UPDATE vendas SET conflito = NULL WHERE conflito IS NOT NULL")
+
+    def descartar_conflitos(self):
+        with self.transacao() as conn:
+            conn.execute("""
+                UPDATE produtos
+                SET estoque_atual = estoque_atual + (
+                    SELECT SUM(v.quantidade) FROM vendas v
+                    WHERE v.produto_id = produtos.id AND v.conflito IS NOT NULL
+                )
+                WHERE id IN (SELECT produto_id FROM vendas WHERE conflito IS NOT NULL)
+            """)
+            conn.execute("DELETE FROM vendas WHERE chave IS NOT NULL AND conflito IS NOT NULL")
+
+    # ----- espelho do catálogo -----
+
+    def espelhar_produtos(self, df):
+        # df: listar_produtos() do banco. O estoque local desconta o que
+        # ainda não subiu, para o caixa não vender de novo as mesmas peças.
+        linhas = [
+            (
+                int(produto.id), produto.produto, produto.codigo or None, float(produto.preco),
+                float(produto.lucro), int(produto.estoque_inicial), int(produto.estoque_atual), produto.foto
+            )
+            for produto in df.itertuples(index=False)
+        ]
+
+        with self.transacao() as conn:
+            conn.execute("DELETE FROM produtos")
+            conn.executemany("""
+                INSERT INTO produtos
+                (id, produto, codigo, preco, lucro, estoque_inicial, estoque_atual, foto)
+                VALUES (?,?,?,?,?,?,?,?)
+            """, linhas)
+            conn.execute("""
+                UPDATE produtos
+                SET estoque_atual = MAX(estoque_atual - (
+                    SELECT SUM(v.quantidade) FROM vendas v
+                    WHERE v.produto_id = produtos.id AND v.chave IS NOT NULL
+                ), 0)
+                WHERE id IN (SELECT produto_id FROM vendas WHERE chave IS NOT NULL)
+            """)
+
+
+def sincronizar(repo, offline, lote=LOTE_SINCRONIZACAO):
+    # repo: RepositorioPostgres. Devolve (carrinhos gravados, já aplicados
+    # antes, em conflito). Uma queda de conexão no meio interrompe com
+    # erro; os lotes já confirmados não voltam a subir.
+    gravados = repetidos = conflitos = 0
+    carrinhos = offline.carrinhos_pendentes()
+
+    for inicio in range(0, len(carrinhos), lote):
+        parte = carrinhos[inicio:inicio + lote]
+        sincronizadas, motivos = [], {}
+
+        for (chave, _, _), resultado in zip(parte, repo.registrar_carrinhos(parte)):
+            if isinstance(resultado, EstoqueInsuficiente):
+                motivos[chave] = str(resultado)
+            else:
+                sincronizadas.append(chave)
+                if resultado is None:
+                    repetidos += 1
+                else:
+                    gravados += 1
+
+        offline.concluir(sincronizadas, motivos)
+        conflitos += len(motivos)
+
+    return gravados, repetidos, conflitos